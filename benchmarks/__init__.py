@@ -0,0 +1,2 @@
+"""Client benchmarks: `python -m benchmarks` runs the scenarios against a mock server,
+`python benchmarks/startup.py` checks the startup of lightweight commands."""
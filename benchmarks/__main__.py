@@ -0,0 +1,113 @@
+"""Run the client benchmarks against a local mock server and print JSON results.
+
+    python -m benchmarks [--repeat 5] [--scenario NAME ...] [--ships 500]
+                         [--fuel-table-rows 50000] [--latency-ms 2]
+                         [--output results.json] [--compare baseline.json]
+
+Each scenario runs once as warm-up and then `--repeat` times. The results hold
+the git commit, the settings and per scenario the run times, their median and
+minimum, and items and bytes per second at the median, so runs of different
+commits can be compared with --compare.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import subprocess
+from pathlib import Path
+from datetime import datetime, timezone
+from statistics import median
+
+from .mock_server import MockServer
+from .scenarios import ROOT, Bench, Scenarios
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def run_scenario(bench: Bench, name: str, repeat: int) -> dict:
+    scenario = Scenarios[name]
+    scenario(bench)
+
+    runs = []
+    metrics = {}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        metrics = scenario(bench)
+        runs.append(time.perf_counter() - start)
+
+    result = {"runs_s": [round(run, 4) for run in runs], "median_s": round(median(runs), 4), "min_s": round(min(runs), 4)}
+    result.update(metrics)
+    if "items" in metrics:
+        result["items_per_s"] = round(metrics["items"] / median(runs), 1)
+    if "bytes" in metrics:
+        result["mb_per_s"] = round(metrics["bytes"] / median(runs) / 1e6, 2)
+    return result
+
+
+def compare(results: dict, baseline: dict) -> str:
+    lines = [f"{'scenario':<16} {'baseline s':>10} {'current s':>10} {'change':>8}"]
+    for name, result in results["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if before is None:
+            continue
+        change = result["median_s"] / before["median_s"] - 1 if before["median_s"] else 0
+        lines.append(f"{name:<16} {before['median_s']:>10.4f} {result['median_s']:>10.4f} {change:>+8.1%}")
+    return "\n".join(lines)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scenario", action="append", choices=[*Scenarios], help="Run only these scenarios.")
+    parser.add_argument("--ships", type=int, default=500)
+    parser.add_argument("--fuel-table-rows", type=int, default=50000)
+    parser.add_argument("--latency-ms", type=float, default=2)
+    parser.add_argument("--output", type=Path, help="Also write the results to this file.")
+    parser.add_argument("--compare", type=Path, help="Print the change against earlier results on stderr.")
+    args = parser.parse_args()
+
+    sys.path[:0] = [str(ROOT), str(ROOT / "src")]
+
+    server = MockServer(args.ships, args.fuel_table_rows, args.latency_ms)
+    server.start()
+
+    previous_home = os.environ.get("HOME")
+    with tempfile.TemporaryDirectory() as home:
+        os.environ["HOME"] = home
+        try:
+            bench = Bench(server, Path(home), args.ships)
+            bench.write_config()
+            scenarios = {name: run_scenario(bench, name, args.repeat) for name in args.scenario or Scenarios}
+        finally:
+            if previous_home is not None:
+                os.environ["HOME"] = previous_home
+            server.stop()
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "settings": {"repeat": args.repeat, "ships": args.ships, "fuel_table_rows": args.fuel_table_rows,
+                     "latency_ms": args.latency_ms},
+        "server": server.stats,
+        "scenarios": scenarios,
+    }
+
+    print(json.dumps(results, indent=4))
+    if args.output is not None:
+        args.output.write_text(json.dumps(results, indent=4))
+    if args.compare is not None:
+        print(compare(results, json.loads(args.compare.read_text())), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
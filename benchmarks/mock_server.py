@@ -0,0 +1,270 @@
+"""Stand-in Shipyard GraphQL server for benchmarks.
+
+Answers the operations the client sends by matching the query text, with
+synthetic data: login, version, digitalShip.get (also aliased batches),
+digitalShip.list, digitalShip.custom and a fuelTable whose size is set by
+`fuel_table_rows`. Automatic Persisted Queries are supported, or answered with
+PersistedQueryNotSupported when `persisted_queries` is False. With `auth` set to
+"status" or "errors", requests other than login need a valid token of at most
+`token_seconds` and are otherwise answered 401 or with an UNAUTHENTICATED
+error. Responses are
+gzip compressed when the client accepts it and gzip request bodies are
+decoded, every response is delayed by `latency_ms`, and `{ __stats }` returns
+request counters.
+
+    python -m benchmarks.mock_server [--port 8765] [--ships 500] [--fuel-table-rows 50000] [--latency-ms 5]
+"""
+import re
+import gzip
+import json
+import time
+import asyncio
+import hashlib
+import argparse
+import threading
+from functools import lru_cache
+from typing import Dict
+
+import jwt
+import numpy as np
+from aiohttp import web
+
+Drafts = {"scantling_draft": 14.0, "design_draft": 12.0, "ballast_draft": 8.0}
+
+# Per speed, the fuel table has a row for every draft, TWA, TWS, wave direction and height.
+TWA = np.arange(0, 181, 15.0)
+TWS = np.arange(0, 26, 5.0)
+WaveDirections = np.arange(0, 181, 45.0)
+WaveHeights = np.array([0.0, 1.0, 2.0, 4.0])
+RowsPerSpeed = len(Drafts) * len(TWA) * len(TWS) * len(WaveDirections) * len(WaveHeights)
+
+FilterColumns = {
+    "draft": 0,
+    "speed": 1,
+    "twa": 2,
+    "tws": 3,
+    "waveDir": 4,
+    "sigWaveHeight": 5,
+}
+
+
+class MockServer:
+    """The server, run on a background thread with `start`, or standalone through `main`."""
+
+    def __init__(self, ships: int = 500, fuel_table_rows: int = 50000, latency_ms: float = 0,
+                 compression_level: int = 6, persisted_queries: bool = True, auth: str = None,
+                 token_seconds: float = 3600):
+        self.ships = ships
+        self.persisted_queries = persisted_queries
+        self.auth = auth
+        self.token_seconds = token_seconds
+        self.compression_level = compression_level
+        self.speeds = np.linspace(4, 12, max(1, round(fuel_table_rows / RowsPerSpeed)))
+        self.latency = latency_ms / 1000
+        self.persisted: Dict[str, str] = {}
+        self.created = 0
+        self.stats = {"requests": 0, "request_bytes": 0, "response_bytes": 0, "apq_hit": 0, "apq_miss": 0,
+                      "logins": 0, "rejected": 0}
+        self.url = None
+        self._loop = None
+        self._runner = None
+
+    def ship(self, i: int) -> dict:
+        return {
+            "modelType": {"readableName": "bulk" if i % 2 else "tanker"},
+            "id": f"ship-{i}",
+            "status": "done",
+            "name": f"Ship {i}",
+            "shipData": {
+                "shipType": "bulk", "lengthOverall": 180.0 + i % 50, "beam": 30.0 + i % 7, "depth": 18.0,
+                "drafts": [*Drafts.values()], "csr": 0.85, "deadweight": 50000 + i, "grossTonnage": 30000 + i,
+                "typeOfFuel": "HFO", "speedAtCsr": 12.5,
+            },
+            "outputVariables": ["FC ME [ton/day]", "Power brake [kW]", "Heel [deg]", "Leeway [deg]"],
+            "company": {"name": "Benchmark Shipping"},
+            "drafts": [{"name": name, "draft": draft, "loadcaseCount": 100, "failureCount": 0}
+                       for name, draft in Drafts.items()],
+        }
+
+    @lru_cache(maxsize=64)
+    def fuel_table(self, filters: tuple) -> str:
+        """The fuelTable JSON for a tuple of (filter, value) pairs, cached per filter."""
+
+        grid = np.stack(np.meshgrid([*Drafts.values()], self.speeds, TWA, TWS, WaveDirections, WaveHeights,
+                                    indexing="ij"), axis=-1).reshape(-1, 6)
+        mask = np.ones(len(grid), dtype=bool)
+        for name, value in filters:
+            if name == "draft":
+                value = Drafts.get(value, value)
+            mask &= np.isclose(grid[:, FilterColumns[name]], float(value))
+        draft, speed, twa, tws, wave_direction, wave_height = grid[mask].T
+
+        fuel = 5 + 0.4 * draft + 0.02 * speed ** 3 + 0.01 * tws ** 2 * (1 + np.cos(np.deg2rad(twa))) + 1.5 * wave_height
+        columns = {
+            "Draft [m]": draft,
+            "Speed [m/s]": speed,
+            "TWA [deg]": twa,
+            "TWS [m/s]": tws,
+            "Wave direction [deg]": wave_direction,
+            "Wave height Hs [m]": wave_height,
+            "FC ME [ton/day]": fuel,
+            "Power brake [kW]": fuel * 210,
+            "Heel [deg]": 0.05 * tws * np.sin(np.deg2rad(twa)),
+            "Leeway [deg]": 0.02 * tws * np.sin(np.deg2rad(twa)),
+        }
+        return json.dumps({name: np.round(values, 6).tolist() for name, values in columns.items()})
+
+    def respond(self, query: str, variables: dict) -> str:
+        if "__stats" in query:
+            return json.dumps({"data": {"stats": self.stats}})
+
+        if "login(" in query:
+            self.stats["logins"] += 1
+            token = jwt.encode({"exp": time.time() + self.token_seconds, "sub": variables.get("username")}, "benchmark",
+                               algorithm="HS256")
+            return json.dumps({"data": {"login": {"__typename": "LoginSuccess", "token": {"accessToken": token},
+                                                  "user": {"username": variables.get("username")}}}})
+
+        if re.search(r"\bversion\b", query) and "digitalShip" not in query:
+            return json.dumps({"data": {"version": "benchmark"}})
+
+        if "list(" in query:
+            limit, offset = variables.get("limit", 10), variables.get("offset", 0)
+            ships = [self.ship(i) for i in range(offset, min(offset + limit, self.ships))]
+            page = {"meta": {"count": self.ships, "limit": limit, "offset": offset}, "data": ships}
+            return json.dumps({"data": {"digitalShip": {"list": page}}})
+
+        if "custom(" in query:
+            self.created += 1
+            created = {"id": f"ship-{self.ships + self.created}", "name": variables["shipdata"]["name"], "status": "queued"}
+            return json.dumps({"data": {"digitalShip": {"custom": created}}})
+
+        aliases = re.findall(r"(\w+)\s*:\s*get\(id:\s*\$(\w+)", query)
+        if aliases:
+            found = {alias: self.get(variables[name]) for alias, name in aliases}
+            return json.dumps({"data": {"digitalShip": found}})
+
+        ship = self.get(variables.get("id", ""))
+        if ship is None:
+            return json.dumps({"data": {"digitalShip": {"get": None}}, "errors": [{"message": "Ship not found"}]})
+
+        if "fuelTable(" in query:
+            filters = tuple(sorted((name, variables[name]) for name in FilterColumns if variables.get(name) is not None))
+            table = self.fuel_table(filters)
+            ship_json = json.dumps({"name": ship["name"], "status": ship["status"], "drafts": ship["drafts"]})
+            return f'{{"data": {{"digitalShip": {{"get": {ship_json[:-1]}, "fuelTable": {table}}}}}}}}}'
+
+        return json.dumps({"data": {"digitalShip": {"get": ship}}})
+
+    def authorized(self, request: web.Request) -> bool:
+        token = request.headers.get("Authorization", "")
+        if token.startswith("Bearer "):
+            token = token[len("Bearer "):]
+        try:
+            jwt.decode(token, "benchmark", algorithms=["HS256"])
+        except jwt.InvalidTokenError:
+            return False
+        return True
+
+    def get(self, id: str):
+        number = id.rsplit("-", 1)[-1]
+        if not id.startswith("ship-") or not number.isdigit():
+            return None
+        return self.ship(int(number))
+
+    async def handle(self, request: web.Request) -> web.Response:
+        # aiohttp has already decoded a gzip request body, content_length is the size sent.
+        raw = await request.read()
+        body = json.loads(raw)
+        self.stats["requests"] += 1
+        self.stats["request_bytes"] += request.content_length or len(raw)
+
+        persisted = (body.get("extensions") or {}).get("persistedQuery")
+        if persisted and not self.persisted_queries:
+            if "query" not in body:
+                return web.json_response({"errors": [{"message": "PersistedQueryNotSupported",
+                                                      "extensions": {"code": "PERSISTED_QUERY_NOT_SUPPORTED"}}]})
+        elif persisted:
+            query_hash = persisted["sha256Hash"]
+            if "query" in body:
+                if hashlib.sha256(body["query"].encode()).hexdigest() != query_hash:
+                    return web.json_response({"errors": [{"message": "provided sha does not match query"}]})
+                self.persisted[query_hash] = body["query"]
+            elif query_hash in self.persisted:
+                self.stats["apq_hit"] += 1
+                body["query"] = self.persisted[query_hash]
+            else:
+                self.stats["apq_miss"] += 1
+                return web.json_response({"errors": [{"message": "PersistedQueryNotFound",
+                                                      "extensions": {"code": "PERSISTED_QUERY_NOT_FOUND"}}]})
+
+        if self.auth and not re.search(r"\blogin\(|__stats", body["query"]) and not self.authorized(request):
+            self.stats["rejected"] += 1
+            if self.auth == "status":
+                return web.Response(status=401, text="Unauthorized")
+            return web.json_response({"data": None, "errors": [{"message": "Not authenticated",
+                                                                "extensions": {"code": "UNAUTHENTICATED"}}]})
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        started = time.perf_counter()
+        text = self.respond(body["query"], body.get("variables") or {})
+        elapsed = (time.perf_counter() - started) * 1000
+
+        headers = {"Server-Timing": f"app;dur={elapsed:.2f}"}
+        data = text.encode()
+        if "gzip" in request.headers.get("Accept-Encoding", ""):
+            data = gzip.compress(data, compresslevel=self.compression_level)
+            headers["Content-Encoding"] = "gzip"
+
+        self.stats["response_bytes"] += len(data)
+        return web.Response(body=data, content_type="application/json", headers=headers)
+
+    def app(self) -> web.Application:
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_post("/graphql", self.handle)
+        return app
+
+    def start(self, port: int = 0) -> str:
+        """Serve on a background thread, on a free port by default. Returns the GraphQL url."""
+
+        started = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._runner = web.AppRunner(self.app())
+            self._loop.run_until_complete(self._runner.setup())
+            site = web.TCPSite(self._runner, "127.0.0.1", port)
+            self._loop.run_until_complete(site.start())
+            bound = site._server.sockets[0].getsockname()[1]
+            self.url = f"http://127.0.0.1:{bound}/graphql"
+            started.set()
+            self._loop.run_forever()
+
+        threading.Thread(target=run, daemon=True).start()
+        started.wait()
+        return self.url
+
+    def stop(self):
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ships", type=int, default=500)
+    parser.add_argument("--fuel-table-rows", type=int, default=50000)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    args = parser.parse_args()
+
+    server = MockServer(args.ships, args.fuel_table_rows, args.latency_ms)
+    web.run_app(server.app(), host="127.0.0.1", port=args.port)
+
+
+if __name__ == "__main__":
+    main()
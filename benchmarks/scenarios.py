@@ -0,0 +1,150 @@
+"""Benchmark scenarios, each timing one client workload against the mock server.
+
+A scenario is a function taking the `Bench` environment and returning the
+number of items it processed and any extra metrics; `Scenarios` lists them in
+run order.
+"""
+import io
+import os
+import sys
+import time
+import subprocess
+from pathlib import Path
+from contextlib import redirect_stdout
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+class Bench:
+    """The environment shared by the scenarios: a mock server, a temporary HOME with a
+    client config pointing at it and a scratch directory."""
+
+    def __init__(self, server, home: Path, ships: int):
+        self.server = server
+        self.home = home
+        self.ships = ships
+        self.scratch = home / "scratch"
+        self.scratch.mkdir(exist_ok=True)
+
+    def write_config(self):
+        import jwt
+
+        token = jwt.encode({"exp": int(time.time()) + 24 * 3600}, "benchmark", algorithm="HS256")
+        shipyard_dir = self.home / ".shipyard"
+        shipyard_dir.mkdir(exist_ok=True)
+        (shipyard_dir / "config.ini").write_text(
+            f"[DEFAULT]\nenv = local\n\n[local]\nurl = {self.server.url}\nusername = bench\npassword = bench\n"
+            f"persisted_queries = true\ntoken = {token}\n"
+        )
+
+    def invoke(self, *args: str) -> str:
+        """Run the client in this process with `args`, returning its stdout."""
+
+        from src.cli.client import shipyard_client
+
+        buffer = io.StringIO()
+        with redirect_stdout(buffer):
+            shipyard_client.main(["-q", *args], standalone_mode=False)
+        return buffer.getvalue()
+
+    def spawn(self, *args: str):
+        """Run the client in a fresh interpreter with `args`."""
+
+        code = "from src.cli.client import shipyard_client; shipyard_client()"
+        env = {**os.environ, "HOME": str(self.home)}
+        process = subprocess.run([sys.executable, "-c", code, "-q", *args], cwd=ROOT, env=env, capture_output=True)
+        if process.returncode != 0:
+            raise RuntimeError(f"client {' '.join(args)} failed:\n{process.stderr.decode()}")
+
+
+def cold_start(bench: Bench) -> dict:
+    """`client --help` and `client shipyard-version` in fresh interpreters."""
+
+    bench.spawn("--help")
+    bench.spawn("shipyard-version")
+    return {"items": 2}
+
+
+def list_pagination(bench: Bench) -> dict:
+    """`ship list --all` over every ship, 50 per page with 4 pages in flight."""
+
+    output = bench.invoke("ship", "list", "--all", "--limit", "50", "--prefetch", "4")
+    return {"items": output.count("\n")}
+
+
+def bulk_get(bench: Bench) -> dict:
+    """`ship get` of every ship, batched into aliased queries."""
+
+    ids = [f"ship-{i}" for i in range(bench.ships)]
+    output = bench.invoke("ship", "get", *ids, "--fields", "id,status,name,shipData.beam")
+    return {"items": output.count("\n")}
+
+
+def fuel_table(bench: Bench) -> dict:
+    """Download and stream-decode the full fuel table of one ship into an npz file."""
+
+    before = bench.server.stats["response_bytes"]
+    path = bench.scratch / "fuel_table.npz"
+    bench.invoke("ship", "fuel-table", "ship-1", "--no-cache", "--format", "npz", "--output", str(path))
+
+    from lib.export import read_fuel_table
+
+    rows = len(read_fuel_table(path)["Draft [m]"])
+    return {"items": rows, "bytes": bench.server.stats["response_bytes"] - before}
+
+
+def _table(bench: Bench) -> dict:
+    path = bench.scratch / "fuel_table.npz"
+    if not path.exists():
+        fuel_table(bench)
+
+    from lib.export import read_fuel_table
+
+    return read_fuel_table(path)
+
+
+def csv_export(bench: Bench) -> dict:
+    """Write the fuel table of the fuel_table scenario as CSV."""
+
+    from lib.export import write_csv
+
+    table = _table(bench)
+    path = bench.scratch / "fuel_table.csv"
+    with open(path, "w", newline="") as file:
+        write_csv(table, file)
+    return {"items": len(table["Draft [m]"]), "bytes": path.stat().st_size}
+
+
+def polar_plot(bench: Bench) -> dict:
+    """Build the polar plot figure and compact HTML of one calm water slice, scattered
+    and resampled onto a 200 point grid."""
+
+    import numpy as np
+    import pandas as pd
+    from lib.fuel_table import SortingColumns
+    from lib.polar_plot import polar_plot as figure, polar_contour, resample_polar, compact_html
+
+    table = _table(bench)
+    mask = ((table["Draft [m]"] == 12.0) & (table["Speed [m/s]"] == np.unique(table["Speed [m/s]"])[0])
+            & (table["Wave direction [deg]"] == 0) & (table["Wave height Hs [m]"] == 0))
+    frame = pd.DataFrame({column: values[mask] for column, values in table.items()})
+    variables = [column for column in frame.columns if column not in SortingColumns]
+
+    fig = figure(frame, "benchmark", "FC ME [ton/day]", SortingColumns, compact=True)
+    html = compact_html(fig, {column: frame[column] for column in variables}, include_plotlyjs="cdn")
+
+    x, y, grids = resample_polar(frame, variables, 200)
+    fig = polar_contour(x, y, grids, "benchmark", "FC ME [ton/day]", frame["TWS [m/s]"], compact=True)
+    grid_html = compact_html(fig, grids, traces=[0], steps=12, include_plotlyjs="cdn")
+
+    return {"items": 2, "bytes": len(html) + len(grid_html)}
+
+
+Scenarios = {
+    "cold_start": cold_start,
+    "list_pagination": list_pagination,
+    "bulk_get": bulk_get,
+    "fuel_table": fuel_table,
+    "csv_export": csv_export,
+    "polar_plot": polar_plot,
+}
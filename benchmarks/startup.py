@@ -0,0 +1,93 @@
+"""Startup benchmark of the client CLI.
+
+Runs lightweight commands in fresh interpreters and fails when they import
+heavy libraries or exceed the time budget:
+
+    python benchmarks/startup.py [--repeat N] [--budget SECONDS]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+from typing import List, Set, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Commands that must start without importing any of HEAVY_MODULES.
+LIGHT_COMMANDS = [
+    ["--help"],
+    ["config"],
+    ["set-env", "local"],
+    ["cache", "info"],
+]
+
+HEAVY_MODULES = ["pandas", "plotly", "gql", "aiohttp"]
+
+RUNNER = """
+import sys
+from src.cli.client import shipyard_client
+try:
+    shipyard_client(sys.argv[1:], standalone_mode=False)
+except SystemExit:
+    pass
+sys.stderr.write("\\nMODULES " + " ".join(sorted({name.split('.')[0] for name in sys.modules})) + "\\n")
+"""
+
+
+def write_config(home: Path):
+    shipyard_dir = home / ".shipyard"
+    shipyard_dir.mkdir()
+    (shipyard_dir / "config.ini").write_text(
+        "[DEFAULT]\nenv = local\n\n[local]\nurl = http://127.0.0.1:9/graphql\nusername = user\npassword = password\n"
+    )
+
+
+def run(command: List[str], home: Path) -> Tuple[float, Set[str]]:
+    env = {**os.environ, "HOME": str(home)}
+    start = time.perf_counter()
+    process = subprocess.run([sys.executable, "-c", RUNNER, *command], cwd=ROOT, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+
+    modules_line = [line for line in process.stderr.splitlines() if line.startswith("MODULES ")]
+    if process.returncode != 0 or not modules_line:
+        raise RuntimeError(f"client {' '.join(command)} failed:\n{process.stderr}")
+    return elapsed, set(modules_line[-1].split()[1:])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=0.5, help="Maximum best-of-repeat seconds per command.")
+    args = parser.parse_args()
+
+    results = []
+    failed = False
+
+    with tempfile.TemporaryDirectory() as home:
+        write_config(Path(home))
+
+        for command in LIGHT_COMMANDS:
+            timings = []
+            for _ in range(args.repeat):
+                elapsed, modules = run(command, Path(home))
+                timings.append(elapsed)
+
+            heavy = sorted(modules.intersection(HEAVY_MODULES))
+            best = min(timings)
+            ok = not heavy and best <= args.budget
+            failed |= not ok
+
+            results.append({"command": " ".join(command), "best_s": round(best, 4),
+                            "median_s": round(sorted(timings)[len(timings) // 2], 4),
+                            "heavy_modules": heavy, "ok": ok})
+
+    print(json.dumps(results, indent=4))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
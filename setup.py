@@ -28,6 +28,11 @@ setuptools.setup(
         'numpy',
         'plotly'
     ],
+    extras_require={
+        'arrow': ['pyarrow'],
+        'yaml': ['pyyaml'],
+        'zstd': ['zstandard'],
+    },
     python_requires='>=3.8',
     entry_points={
         'console_scripts': [
@@ -4,24 +4,90 @@ sys.path.append('src')
 import logging
 import pathlib
 import configparser
-from datetime import datetime
 
-from gql import Client
-from gql.transport.aiohttp import AIOHTTPTransport
-import jwt
 import click
 
-from .commands.custom import custom
-from .commands.utils import shipyard_version, config, login, set_env
-from .commands.ship.ship import ship
+from lib import profiling
+from lib.profiling import span
+from .lazy_group import LazyGroup
 
-@click.group()
+
+class ContextObject(dict):
+    """ctx.obj that only creates the Shipyard client once a command asks for it,
+    so commands that never hit the network do not import gql and aiohttp."""
+
+    def __missing__(self, key):
+        if key not in ["transport", "client", "shipyard"]:
+            raise KeyError(key)
+        connect(self)
+        return self[key]
+
+
+def connect(obj: dict):
+    """Set up obj["shipyard"], the ShipyardClient, and its gql client and transport for
+    commands that execute queries directly. In batch mode it wraps the shared session."""
+
+    from lib.client import ShipyardClient
+
+    config: configparser.ConfigParser = obj["config"]
+    env = obj["env"]
+
+    def save_token(token: str):
+        config[env]["token"] = token
+        with open(obj["config_file"], 'w') as configfile:
+            config.write(configfile)
+
+    with span("jwt", "config"):
+        shipyard = ShipyardClient.from_config(config[env], on_token=save_token, client=obj.get("client"))
+
+    obj["shipyard"] = shipyard
+    obj.setdefault("client", shipyard.client)
+    obj.setdefault("transport", shipyard.transport)
+
+    if 'token' in config[env] and shipyard.token is None:
+        del config[env]["token"]
+        logging.info("Token expired")
+
+        with open(obj["config_file"], 'w') as configfile:
+            config.write(configfile)
+    elif shipyard.token is not None:
+        logging.info("Valid token found")
+
+
+class ShipyardGroup(LazyGroup):
+    """The root group, which starts profiling before its subcommand is resolved so
+    that the import of the command module is recorded too."""
+
+    def invoke(self, ctx):
+        profile, histogram_file = ctx.params.get("profile"), ctx.params.get("histogram_file")
+        if profile or histogram_file:
+            start_profiling(ctx, ctx.params["trace_file"] if profile else None, histogram_file)
+        return super().invoke(ctx)
+
+
+@click.group(cls=ShipyardGroup, package=__package__, lazy_subcommands={
+    "custom": ".commands.custom:custom",
+    "shipyard-version": ".commands.utils:shipyard_version",
+    "ship": ".commands.ship.ship:ship",
+    "config": ".commands.utils:config",
+    "login": ".commands.utils:login",
+    "set-env": ".commands.utils:set_env",
+    "cache": ".commands.cache:cache",
+    "batch": ".commands.batch:batch",
+    "sync": ".commands.catalog:sync",
+})
 @click.option("-q", "--quiet", is_flag=True)
 @click.option("-p", "--pretty", is_flag=True)
 @click.option("-e", "--env", type=click.Choice(["local", "dev", "prod"]))
+@click.option("--profile", is_flag=True, help="Record timed spans, print a summary to stderr and write a trace.")
+@click.option("--trace-file", type=click.Path(dir_okay=False, path_type=pathlib.Path), default="shipyard-trace.json",
+              help="Chrome trace-event JSON written by --profile.")
+@click.option("--histogram-file", type=click.Path(dir_okay=False, path_type=pathlib.Path),
+              help="Also keep per-span duration histograms in this JSON file, for long batch sessions.")
 @click.pass_context
-def shipyard_client(ctx, quiet: bool, pretty: bool, env: str=None):
-    ctx.ensure_object(dict)
+def shipyard_client(ctx, quiet: bool, pretty: bool, env: str=None, profile: bool=False, trace_file: pathlib.Path=None,
+                    histogram_file: pathlib.Path=None):
+    ctx.ensure_object(ContextObject)
     ctx.obj["pretty"] = pretty
 
     ### Set up logging
@@ -50,41 +116,35 @@ def shipyard_client(ctx, quiet: bool, pretty: bool, env: str=None):
     ctx.obj["config_file"] = config_file
 
     config = configparser.ConfigParser()
-    config.read(config_file)
+    with span("config", "config"):
+        config.read(config_file)
 
     if not env:
         env = config["DEFAULT"]["env"]
-        ctx.obj["env"] = env
+    ctx.obj["env"] = env
     
     if not env in config:
         raise ValueError(f"Environment {env} not found in config file {config_file}")
 
     ctx.obj["config"] = config
-    
-    ### Set up client
-    transport = AIOHTTPTransport(url=config[env]["url"], headers={})
-    client = Client(transport=transport, execute_timeout=30)
-    ctx.obj["transport"] = transport
-    ctx.obj["client"] = client
-
-    if 'token' in config[env]:
-        payload = jwt.decode(config[env]["token"], algorithms=["HS256"], options={"verify_signature": False})
-        exp_dt = payload.get("exp")
-
-        if datetime.now().timestamp() > exp_dt:
-            del config[env]["token"]
-            logging.info("Token expired")
-        else:
-            logging.info("Valid token found")
-            transport.headers["Authorization"] = f"Bearer {config[env]["token"]}"
-
-    with open(ctx.obj["config_file"], 'w') as configfile:
-        config.write(configfile)
-
-
-shipyard_client.add_command(custom)
-shipyard_client.add_command(shipyard_version)
-shipyard_client.add_command(ship)
-shipyard_client.add_command(config)
-shipyard_client.add_command(login)
-shipyard_client.add_command(set_env)
+
+    ### The client is set up on first use, see ContextObject
+
+
+def start_profiling(ctx, trace_file: pathlib.Path = None, histogram_file: pathlib.Path = None):
+    """Profile the rest of the invocation; the report is written when the root context closes."""
+
+    sink = profiling.HistogramSink(histogram_file) if histogram_file else None
+    profiler = profiling.Profiler(sink, keep_events=trace_file is not None)
+    profiling.start(profiler)
+
+    def report():
+        profiling.stop()
+        if sink is not None:
+            sink.flush()
+        if trace_file is not None:
+            profiler.write_trace(trace_file)
+            click.echo(profiler.summary(), err=True)
+            click.echo(f"Trace written to {trace_file}", err=True)
+
+    ctx.call_on_close(report)
@@ -0,0 +1,126 @@
+import io
+import sys
+import json
+import shlex
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Tuple
+
+import click
+
+from lib.client import ShipyardClient
+from lib.session import SharedSession
+
+
+class StepOutput(io.TextIOBase):
+    """sys.stdout replacement that collects the output of the step running in the current thread."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    @property
+    def encoding(self):
+        return "utf-8"
+
+    def writable(self):
+        return True
+
+    def write(self, text: str) -> int:
+        buffer = getattr(self.local, "buffer", None)
+        if buffer is None:
+            return self.stream.write(text)
+        return buffer.write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+
+def parse_steps(lines) -> List[List[Tuple[str, List[str]]]]:
+    """Split a batch script into stages of `(step_id, args)`.
+
+    Every line is one command line, optionally prefixed by "<step-id>:". Steps run
+    concurrently until a line "wait", which waits for all earlier steps to finish.
+    Empty lines and lines starting with "#" are ignored.
+    """
+
+    stages = [[]]
+    for number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+
+        if line == "wait":
+            stages.append([])
+            continue
+
+        step_id = str(number)
+        head, separator, rest = line.partition(":")
+        if separator and head.strip() and " " not in head.strip():
+            step_id, line = head.strip(), rest
+
+        stages[-1].append((step_id, shlex.split(line)))
+    return [stage for stage in stages if stage]
+
+
+@click.command()
+@click.argument("script", type=click.File("r"), default="-")
+@click.option("--concurrency", "-c", type=int, default=4, help="Maximum number of steps running at once.")
+@click.pass_context
+def batch(ctx, script, concurrency: int):
+    """Run a script of commands over one persistent session.
+
+    SCRIPT (default stdin) holds one command per line, e.g.
+    "a: ship get <id>", optionally prefixed by a step id. Steps run concurrently
+    up to a "wait" line. Every step's output is printed as one JSON line
+    tagged with its step id, in the order the steps finish.
+    """
+
+    stages = parse_steps(script)
+    root = ctx.find_root()
+
+    # Steps run their command directly, so the root callback (logging, config) runs once for the batch.
+    # They all use one ShipyardClient over the shared session, which logs in and saves the token once.
+    shipyard: ShipyardClient = ctx.obj["shipyard"]
+    shared = SharedSession(shipyard.client)
+    shared_obj = {key: value for key, value in ctx.obj.items() if key not in ["shipyard", "client", "transport"]}
+    shared_obj.update(client=shared, transport=shipyard.transport, shipyard=ShipyardClient.from_config(
+        ctx.obj["config"][ctx.obj["env"]], on_token=shipyard.on_token, client=shared))
+
+    output = StepOutput(sys.stdout)
+    stdout, sys.stdout = sys.stdout, output
+    failures = 0
+
+    def run(step_id: str, args: List[str]) -> dict:
+        output.local.buffer = io.StringIO()
+        try:
+            obj = type(ctx.obj)(shared_obj)
+            name, command, command_args = root.command.resolve_command(root, args)
+            # Under standalone_mode=False, ctx.exit(code) is returned rather than raised.
+            code = command.main(command_args, prog_name=f"{root.info_name} {name}", obj=obj, standalone_mode=False)
+            return {"step": step_id, "ok": not code, "output": output.local.buffer.getvalue()}
+        except SystemExit as e:
+            ok = not e.code
+            return {"step": step_id, "ok": ok, "output": output.local.buffer.getvalue()}
+        except Exception as e:
+            return {"step": step_id, "ok": False, "output": output.local.buffer.getvalue(), "error": str(e)}
+        finally:
+            output.local.buffer = None
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+            for stage in stages:
+                futures = [executor.submit(run, step_id, args) for step_id, args in stage]
+                for future in as_completed(futures):
+                    result = future.result()
+                    failures += not result["ok"]
+                    stdout.write(json.dumps(result) + "\n")
+                    stdout.flush()
+    finally:
+        sys.stdout = stdout
+        shared.close()
+
+    if failures:
+        logging.error(f"{failures} steps failed")
+        ctx.exit(1)
@@ -0,0 +1,50 @@
+import logging
+from configparser import ConfigParser
+
+import click
+
+
+def fueltable_store(ctx):
+    """The fuel table store under the shipyard dir, capped by `fueltable_cache_mb` in the config."""
+    from lib.fueltable_store import FuelTableStore
+
+    config: ConfigParser = ctx.obj["config"]
+    max_mb = config["DEFAULT"].getint("fueltable_cache_mb", fallback=1024)
+    return FuelTableStore(ctx.obj["shipyard_dir"] / "fueltables", max_mb * 1024 * 1024)
+
+
+def jsonify_cache(ctx):
+    """The cache of evaluated ship input files under the shipyard dir."""
+    from lib.jsonify import JsonifyCache
+
+    return JsonifyCache(ctx.obj["shipyard_dir"] / "inputs")
+
+
+@click.group()
+@click.pass_context
+def cache(ctx):
+    """Manage the local fuel table store and input cache."""
+    pass
+
+
+@cache.command()
+@click.pass_context
+def clear(ctx):
+    """Remove all stored fuel tables and cached inputs."""
+
+    removed = fueltable_store(ctx).clear()
+    logging.info(f"Removed {removed} stored fuel tables")
+    removed = jsonify_cache(ctx).clear()
+    logging.info(f"Removed {removed} cached inputs")
+
+
+@cache.command()
+@click.pass_context
+def info(ctx):
+    """Print the location and size of the fuel table store."""
+
+    store = fueltable_store(ctx)
+    click.echo(f"directory = {store.directory}")
+    click.echo(f"entries = {len(store.entries())}")
+    click.echo(f"size = {store.size() / 1024 / 1024:.1f} MB of {store.max_bytes / 1024 / 1024:.0f} MB")
+    click.echo(f"inputs = {len(jsonify_cache(ctx).entries())}")
@@ -0,0 +1,50 @@
+import asyncio
+import logging
+from datetime import datetime
+
+import click
+
+
+def ship_catalog(ctx):
+    """The SQLite ship catalog under the shipyard dir, for the current environment."""
+    from lib.catalog import ShipCatalog
+
+    return ShipCatalog(ctx.obj["shipyard_dir"] / "catalog.sqlite", ctx.obj["env"])
+
+
+@click.command()
+@click.option("--full", is_flag=True, help="Fetch every ship again instead of only the changed ones.")
+@click.option("--page-size", type=int, default=100, help="Number of ships per list request.")
+@click.option("--prefetch", type=int, default=4, help="Number of list pages in flight.")
+@click.option("--batch-size", type=int, default=50, help="Maximum number of changed ships fetched per request.")
+@click.option("--concurrency", "-c", type=int, default=4, help="Maximum number of ship requests in flight.")
+@click.pass_context
+def sync(ctx, full: bool, page_size: int, prefetch: int, batch_size: int, concurrency: int):
+    """Mirror the ship list into the local catalog for ship search.
+
+    Only ships that are new or whose status or drafts changed since the
+    last sync are fetched again.
+    """
+
+    if page_size < 1:
+        logging.error("Please provide a positive page size.")
+        return
+
+    catalog = ship_catalog(ctx)
+    last_sync = catalog.last_sync()
+    if last_sync is not None:
+        logging.info(f"Last sync {datetime.fromtimestamp(last_sync[0]):%Y-%m-%d %H:%M:%S} with {last_sync[1]} ships")
+
+    async def run():
+        async with ctx.obj["shipyard"] as session:
+            return await catalog.sync(session, page_size, prefetch, batch_size, concurrency, full)
+
+    try:
+        stats = asyncio.run(run())
+    finally:
+        catalog.close()
+
+    logging.info(f"Listed {stats['listed']} ships, fetched {stats['fetched']}, removed {stats['removed']}")
+    if stats["failed"]:
+        logging.error(f"{stats['failed']} ships or pages failed, run sync again to retry")
+        ctx.exit(1)
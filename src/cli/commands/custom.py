@@ -1,9 +1,12 @@
 
 import logging
 import json
+from typing import TYPE_CHECKING
 
 import click
-from gql import gql, Client
+
+if TYPE_CHECKING:
+    from lib.client import ShipyardClient
 
 
 @click.command()
@@ -16,8 +19,8 @@ def custom(ctx, query: str=None):
         logging.error("Please provide a query.")
         return
 
-    client: Client = ctx.obj["client"]
-    result = client.execute(gql(query), variable_values={})
+    shipyard: ShipyardClient = ctx.obj["shipyard"]
+    result = shipyard.run(shipyard.execute(query))
     click.echo(json.dumps(result))
 
     if ctx.obj["pretty"]:
@@ -1,3 +0,0 @@
-from .postprocessing import *
-from .ship_mutations import *
-from .ship_queries import *
\ No newline at end of file
@@ -0,0 +1,175 @@
+import time
+import asyncio
+import logging
+from pathlib import Path
+from typing import Dict, Tuple
+
+import click
+import numpy as np
+import pandas as pd
+
+from lib.client import ShipyardClient
+from lib.export import fuel_table_arrays, read_fuel_table, write_csv, iter_table_chunks
+from lib.fuel_table import SortingColumns
+from lib.interpolation import FuelTableInterpolator, EdgeModes
+from lib.voyage import VoyageEstimator, FuelVariable
+from lib.speed_optimization import optimize_speed as solve_speed, WeatherColumns
+
+from ..cache import fueltable_store
+from .postprocessing import get_fuel_table
+from .ship import ship
+
+
+def load_fuel_table(ctx, id: str, fuel_table_file: Path, no_cache: bool) -> Dict[str, np.ndarray]:
+    """The full fuel table of ship `id`, or read from `fuel_table_file` to work offline."""
+
+    if fuel_table_file is not None:
+        return read_fuel_table(fuel_table_file)
+
+    shipyard: ShipyardClient = ctx.obj["shipyard"]
+    store = None if no_cache else fueltable_store(ctx)
+    result = asyncio.run(get_fuel_table(shipyard, {"id": id}, store, ctx.obj["env"]))
+    return fuel_table_arrays(result["digitalShip"]["get"]["fuelTable"])
+
+
+def fuel_table_source_options(func):
+    func = click.option("--no-cache", is_flag=True, help="Always download, bypassing the local fuel table store.")(func)
+    func = click.option("--fuel-table", "fuel_table_file", type=click.Path(exists=True, dir_okay=False, path_type=Path),
+                        help="Use a fuel table saved by fuel-table instead of downloading it.")(func)
+    func = click.option("--id", "id", type=str, help="The uuid identifying the ship.")(func)
+    return func
+
+
+@ship.command()
+@click.argument("conditions", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@fuel_table_source_options
+@click.option("--variable", "-v", "variables", multiple=True, help="Output variable to evaluate, repeatable. Default: all.")
+@click.option("--edge", type=click.Choice(EdgeModes), default="clip", help="Handling of conditions outside the table.")
+@click.option("--output", "-O", type=click.Path(dir_okay=False, path_type=Path), help="Output csv, default stdout.")
+@click.pass_context
+def evaluate(ctx, conditions: Path, id: str, fuel_table_file: Path, no_cache: bool, variables: Tuple[str], edge: str,
+             output: Path):
+    """Interpolate output variables at the conditions in a csv file.
+
+    The csv needs the columns "Draft [m]", "Speed [m/s]", "TWA [deg]", "TWS [m/s]",
+    "Wave direction [deg]" and "Wave height Hs [m]". The result repeats the
+    conditions followed by one column per output variable.
+    """
+
+    if (id is None) == (fuel_table_file is None):
+        logging.error("Please provide either --id or --fuel-table.")
+        return
+
+    frame = pd.read_csv(conditions, skipinitialspace=True)
+    missing = [column for column in SortingColumns if column not in frame.columns]
+    if missing:
+        logging.error(f"Conditions are missing the columns {', '.join(missing)}")
+        return
+
+    interpolator = FuelTableInterpolator(load_fuel_table(ctx, id, fuel_table_file, no_cache), edge=edge)
+    variables = [*variables] or interpolator.variables
+
+    start = time.perf_counter()
+    points = interpolator.points(frame)
+    result = {column: frame[column].to_numpy() for column in frame.columns}
+    for variable in variables:
+        result[variable] = interpolator(variable, points)
+    logging.info(f"Evaluated {len(points)} conditions in {time.perf_counter() - start:.2f} s")
+
+    if output is None:
+        write_csv(result, click.get_text_stream("stdout"))
+    else:
+        with open(output, "w", buffering=1 << 20) as file:
+            write_csv(result, file)
+
+
+@ship.command()
+@click.argument("route", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@fuel_table_source_options
+@click.option("--time-column", type=str, default="time", help="Column with the timestamp of every row.")
+@click.option("--step-hours", type=float, help="Fixed time step if the route has no time column.")
+@click.option("--chunk-size", type=int, default=100000, help="Rows read per chunk.")
+@click.option("--edge", type=click.Choice(EdgeModes), default="clip", help="Handling of conditions outside the table.")
+@click.option("--output", "-O", type=click.Path(dir_okay=False, path_type=Path), help="Output csv, default stdout.")
+@click.pass_context
+def voyage(ctx, route: Path, id: str, fuel_table_file: Path, no_cache: bool, time_column: str, step_hours: float,
+           chunk_size: int, edge: str, output: Path):
+    """Estimate fuel, power, heel and leeway over a route or weather time series.
+
+    The route is a csv or parquet file with the fuel table sorting columns per
+    time step. Optional "leg" and "ship" columns group the result; with a
+    "ship" column the fuel table of every ship id in it is downloaded.
+    """
+
+    if id is not None and fuel_table_file is not None:
+        logging.error("Please provide either --id or --fuel-table.")
+        return
+
+    interpolators = {}
+
+    def interpolator(ship_id: str) -> FuelTableInterpolator:
+        ship_id = ship_id if ship_id is not None else id
+        if ship_id not in interpolators:
+            if ship_id is None and fuel_table_file is None:
+                raise click.UsageError("Please provide --id, --fuel-table or a ship column.")
+            table = load_fuel_table(ctx, ship_id, fuel_table_file, no_cache)
+            interpolators[ship_id] = FuelTableInterpolator(table, edge=edge)
+        return interpolators[ship_id]
+
+    estimator = VoyageEstimator(interpolator, time_column, step_hours)
+
+    start = time.perf_counter()
+    rows = 0
+    for chunk in iter_table_chunks(route, chunk_size):
+        estimator.add(chunk)
+        rows += len(chunk)
+    legs = estimator.finish()
+    logging.info(f"Processed {rows} route rows in {time.perf_counter() - start:.2f} s")
+
+    if output is None:
+        click.echo(legs.to_csv(index=False), nl=False)
+    else:
+        legs.to_csv(output, index=False)
+
+
+@ship.command()
+@fuel_table_source_options
+@click.option("--draft", "-d", type=float, required=True, help="Draft [m] to optimize for.")
+@click.option("--conditions", type=click.Path(exists=True, dir_okay=False, path_type=Path),
+              help="Csv with TWA, TWS, wave direction and Hs columns. Default: every condition in the table.")
+@click.option("--variable", "-v", type=str, default=FuelVariable, help="Consumption variable to minimize.")
+@click.option("--output", "-O", type=click.Path(dir_okay=False, path_type=Path), help="Output csv, default stdout.")
+@click.option("--pareto", type=click.Path(dir_okay=False, path_type=Path), help="Write the Pareto fronts to this csv.")
+@click.pass_context
+def optimize_speed(ctx, id: str, fuel_table_file: Path, no_cache: bool, draft: float, conditions: Path, variable: str,
+                   output: Path, pareto: Path):
+    """Find the speed with the least fuel per nautical mile for each weather condition."""
+
+    if (id is None) == (fuel_table_file is None):
+        logging.error("Please provide either --id or --fuel-table.")
+        return
+
+    frame = None
+    if conditions is not None:
+        frame = pd.read_csv(conditions, skipinitialspace=True)
+        missing = [column for column in WeatherColumns if column not in frame.columns]
+        if missing:
+            logging.error(f"Conditions are missing the columns {', '.join(missing)}")
+            return
+
+    interpolator = FuelTableInterpolator(load_fuel_table(ctx, id, fuel_table_file, no_cache))
+    if variable not in interpolator.variables:
+        logging.error(f"Unknown output variable {variable}")
+        return
+
+    start = time.perf_counter()
+    optimum, front = solve_speed(interpolator, draft, frame, variable)
+    logging.info(f"Optimized {len(optimum)} conditions in {time.perf_counter() - start:.2f} s")
+
+    if output is None:
+        click.echo(optimum.to_csv(index=False), nl=False)
+    else:
+        optimum.to_csv(output, index=False)
+
+    if pareto is not None:
+        front.to_csv(pareto, index=False)
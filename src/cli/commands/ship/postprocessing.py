@@ -1,14 +1,25 @@
 
+import sys
 import json
+import asyncio
 import logging
+from pathlib import Path
+from typing import List, Tuple
 
 import click
-from gql import gql, Client
-import pandas as pd
 
-from lib.queries import fueltable
-from lib.polar_plot import polar_plot as pp
+from lib.client import ShipyardClient
+from lib.documents import document
+from lib.profiling import span
+from lib.queries import ship_status
+from lib.streaming import execute_fuel_table
+from lib.concurrency import imap_bounded
+from lib.fueltable_store import FuelTableStore
+from lib.fuel_table import SortingColumns
+from lib.partition import PartitionAxes, download_partitioned
+from lib.export import json_default, fuel_table_arrays, write_csv, write_npz, write_parquet, write_arrow, require_pyarrow
 
+from ..cache import fueltable_store
 from .ship import ship
 
 DraftNames = [
@@ -17,27 +28,193 @@ DraftNames = [
     "ballast_draft",
 ]
 
+FuelTableFormats = ["json", "csv", "parquet", "arrow", "npz"]
+BinaryFormats = ["parquet", "arrow", "npz"]
+
+
+@ship.command()
+@click.argument("ids", nargs=-1)
+@click.option("--format", "-f", type=click.Choice(FuelTableFormats), default="json")
+@click.option("--ids-file", type=click.File("r"), help="File with one ship id per line, '-' for stdin.")
+@click.option("--output", "-O", type=click.Path(dir_okay=False, path_type=Path), help="Output file for a single ship.")
+@click.option("--output-dir", "-o", type=click.Path(file_okay=False, path_type=Path))
+@click.option("--concurrency", "-c", type=int, default=8, help="Maximum number of downloads in flight.")
+@click.option("--no-cache", is_flag=True, help="Always download, bypassing the local fuel table store.")
+@click.pass_context
+def fuel_table(ctx, ids: Tuple[str], format: str, ids_file, output: Path, output_dir: Path, concurrency: int,
+               no_cache: bool):
+    """Download the fueltable of the specified ships.
+    available output formats: json, csv, parquet, arrow, npz
+
+    A single id without --output-dir is written to --output, or printed to
+    stdout for json and csv. Otherwise all tables are downloaded concurrently
+    and written to <output-dir>/<id>.<format>.
+    """
+
+    ids = [*ids]
+    if ids_file is not None:
+        ids += [line.strip() for line in ids_file if line.strip()]
+
+    if not ids:
+        logging.error("Please provide at least one ship id.")
+        return
+
+    single = len(ids) == 1 and output_dir is None
+    if output is not None and not single:
+        logging.error("--output takes a single ship, use --output-dir for several.")
+        return
+
+    if single and output is None and format in BinaryFormats:
+        logging.error(f"Please provide an --output file for the {format} format.")
+        return
+
+    if format in ["parquet", "arrow"]:
+        try:
+            require_pyarrow()
+        except ImportError as e:
+            logging.error(str(e))
+            return
+
+    shipyard: ShipyardClient = ctx.obj["shipyard"]
+    store = None if no_cache else fueltable_store(ctx)
+    env = ctx.obj["env"]
+
+    if single:
+        result = asyncio.run(get_fuel_table(shipyard, {"id": ids[0]}, store, env))
+        write_fuel_table(result, format, output)
+        return
+
+    output_dir = output_dir or Path.cwd()
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    failures = asyncio.run(download_fuel_tables(shipyard, ids, format, output_dir, concurrency, store, env))
+    if failures:
+        logging.error(f"{failures} of {len(ids)} fuel tables failed to download")
+        ctx.exit(1)
+
+
+async def fetch_fuel_table(session, variables: dict, store: FuelTableStore = None, env: str = None) -> dict:
+    """Execute the fueltable query with `variables`, with the fuelTable columns as numpy arrays.
+
+    With a store, the ship's status and drafts are queried first and a stored table
+    is returned while they are unchanged; a freshly downloaded table is stored.
+    """
+
+    if store is None:
+        return await execute_fuel_table(session, variables)
+
+    status = await session.execute(document(ship_status), variable_values={"id": variables["id"]})
+    fingerprint = store.fingerprint(status["digitalShip"]["get"])
+    key = store.key(env, variables)
+
+    stored = store.get(key, fingerprint)
+    if stored is not None:
+        logging.info(f"Using stored fuel table of {variables['id']}")
+        name, fuel_table = stored
+        return {"digitalShip": {"get": {"name": name, "fuelTable": fuel_table}}}
+
+    result = await execute_fuel_table(session, variables)
+    ship_data = result["digitalShip"]["get"]
+    store.put(key, fingerprint, ship_data["name"], ship_data["fuelTable"])
+    return result
+
+
+async def get_fuel_table(shipyard: ShipyardClient, variables: dict, store: FuelTableStore = None, env: str = None) -> dict:
+    async with shipyard as session:
+        return await fetch_fuel_table(session, variables, store, env)
+
+
+async def download_fuel_tables(shipyard: ShipyardClient, ids: List[str], format: str, output_dir: Path, concurrency: int,
+                               store: FuelTableStore = None, env: str = None) -> int:
+    """Download the fuel tables of `ids` over one session, writing each as it arrives.
+    Returns the number of ships that failed."""
+
+    failures = 0
+
+    async with shipyard as session:
+        async def fetch(id: str):
+            return await fetch_fuel_table(session, {"id": id}, store, env)
+
+        async for id, result, error in imap_bounded(fetch, ids, concurrency):
+            if error is not None:
+                failures += 1
+                logging.error(f"Fuel table of {id} failed: {error}")
+                continue
+
+            path = output_dir / f"{id}.{format}"
+            write_fuel_table(result, format, path)
+            logging.info(f"Fuel table of {id} written to {path}")
+
+    return failures
+
 
 @ship.command()
 @click.argument("id")
-@click.option("--format", "-f", type=click.Choice(["json", "csv"]), default="json")
+@click.argument("output", type=click.Path(dir_okay=False, path_type=Path))
+@click.option("--partition-by", "-p", default="draft,speed",
+              help=f"Comma separated axes to split the download along, of {', '.join(PartitionAxes)}.")
+@click.option("--concurrency", "-c", type=int, default=8, help="Maximum number of partitions in flight.")
+@click.option("--retries", type=int, default=3, help="Retries of a failed partition.")
 @click.pass_context
-def fuel_table(ctx, id: str, format: str):
-    """Download the fueltable of specified ship.
-    available output formats: json, csv
+def fuel_table_partitioned(ctx, id: str, output: Path, partition_by: str, concurrency: int, retries: int):
+    """Download one large fueltable in partitions, merged into a .npy file.
+
+    The table is split along the given axes, the partitions are fetched
+    concurrently and merged in order into a memory-mapped structured array,
+    readable with numpy.load(OUTPUT, mmap_mode="r"). The speeds and wave
+    conditions of every draft are found by probing its calm water and one
+    wind condition; rows outside of those are only included when splitting
+    by draft alone.
     """
 
-    client: Client = ctx.obj["client"]
-    result = client.execute(gql(fueltable), variable_values={"id": id})
+    axes = [axis.strip() for axis in partition_by.split(",") if axis.strip()]
+    unknown = [axis for axis in axes if axis not in PartitionAxes]
+    if unknown or not axes:
+        logging.error(f"Unknown partition axes {unknown}, choose from {', '.join(PartitionAxes)}.")
+        return
+
+    if output.suffix != ".npy":
+        output = output.with_suffix(".npy")
+
+    shipyard: ShipyardClient = ctx.obj["shipyard"]
+
+    async def download():
+        async with shipyard as session:
+            return await download_partitioned(session, id, axes, output, concurrency, retries)
+
+    try:
+        rows = asyncio.run(download())
+    except Exception as e:
+        logging.error(f"Partitioned download of {id} failed: {e}")
+        ctx.exit(1)
+
+    logging.info(f"{rows} rows of {id} written to {output}")
+
+
+def write_fuel_table(result: dict, format: str, path: Path = None):
+    """Write a fueltable query result to `path`, or to stdout for json and csv."""
 
     if format == "json":
-        click.echo(json.dumps(result))
-    elif format == "csv":
-        fuel_table = result["digitalShip"]["get"]["fuelTable"]
-        keys = tuple(fuel_table.keys())
-        click.echo(', '.join(keys))
-        for i in range(len(fuel_table[keys[0]])):
-            click.echo(', '.join([str(fuel_table[key][i]) for key in keys]))
+        if path is None:
+            click.echo(json.dumps(result, default=json_default))
+        else:
+            path.write_text(json.dumps(result, default=json_default) + "\n")
+        return
+
+    arrays = fuel_table_arrays(result["digitalShip"]["get"]["fuelTable"])
+
+    if format == "csv":
+        if path is None:
+            write_csv(arrays, sys.stdout)
+        else:
+            with open(path, "w", buffering=1 << 20) as file:
+                write_csv(arrays, file)
+    elif format == "npz":
+        write_npz(arrays, path)
+    elif format == "parquet":
+        write_parquet(arrays, path)
+    elif format == "arrow":
+        write_arrow(arrays, path)
 
 
 @ship.command()
@@ -46,24 +223,35 @@ def fuel_table(ctx, id: str, format: str):
 @click.option("--speed", "-s", type=float, default=0)
 @click.option("--wave-direction", "-wd", type=float, default=0)
 @click.option("--significant-wave-height", "-wh", type=float, default=0)
+@click.option("--no-cache", is_flag=True, help="Always download, bypassing the local fuel table store.")
+@click.option("--output", "-O", type=click.Path(dir_okay=False, path_type=Path),
+              help="Write a compact HTML file instead of opening the plot.")
+@click.option("--plotlyjs", type=click.Choice(["inline", "cdn"]), default="inline",
+              help="Embed plotly.js in the HTML file or load it from the CDN.")
+@click.option("--resolution", "-r", type=click.IntRange(min=10),
+              help="Resample onto a polar grid of this many points across and draw a precomputed contour.")
 @click.pass_context
-def polar_plot(ctx, id: str, draft: str, speed: float, wave_direction: float, significant_wave_height: float):
+def polar_plot(ctx, id: str, draft: str, speed: float, wave_direction: float, significant_wave_height: float, no_cache: bool,
+               output: Path, plotlyjs: str, resolution: int):
     """Plot one output variable as polarplot.
 
     id: The uuid identifying the ship
 
     output_variable: The output variable to plot
+
+    With --output the figure is written as HTML that stores every output
+    variable once as binary float32, switched by a script in the page.
+
+    With --resolution the slice is resampled onto a fixed grid, so the browser
+    only draws one lightweight contour however large the fuel table is.
     """
+    with span("import pandas, plotly", "import"):
+        import pandas as pd
+        from lib.polar_plot import polar_plot as pp, polar_contour, resample_polar, compact_html
+
     logging.getLogger().setLevel("WARNING")
 
-    sorting_cols = [
-        "Draft [m]",
-        "Speed [m/s]",
-        "TWA [deg]",
-        "TWS [m/s]",
-        "Wave direction [deg]",
-        "Wave height Hs [m]"
-    ]
+    sorting_cols = SortingColumns
     variables = {
         "id": id,
         "draft": draft,
@@ -74,12 +262,162 @@ def polar_plot(ctx, id: str, draft: str, speed: float, wave_direction: float, si
 
     default_variable = "FC ME [ton/day]"
 
-    client: Client = ctx.obj["client"]
-    result = client.execute(gql(fueltable), variable_values=variables)
+    shipyard: ShipyardClient = ctx.obj["shipyard"]
+    store = None if no_cache else fueltable_store(ctx)
+    result = asyncio.run(get_fuel_table(shipyard, variables, store, ctx.obj["env"]))
 
     name = result["digitalShip"]["get"]["name"]
-    fuel_table = pd.DataFrame(result["digitalShip"]["get"]["fuelTable"])
+    with span("dataframe", "pandas"):
+        fuel_table = pd.DataFrame(result["digitalShip"]["get"]["fuelTable"])
+
+    if fuel_table.empty:
+        logging.error("The fuel table has no rows for these conditions.")
+        return
+
+    include_plotlyjs = True if plotlyjs == "inline" else "cdn"
+    compact = output is not None
+
+    if resolution is None:
+        with span("figure", "plotly"):
+            fig = pp(fuel_table, name, default_variable, sorting_cols, compact=compact)
+        if not compact:
+            with span("show", "plotly"):
+                fig.show()
+            return
+        columns = {col: fuel_table[col] for col in fuel_table.columns if col not in sorting_cols}
+        with span("html", "plotly"):
+            html = compact_html(fig, columns, include_plotlyjs=include_plotlyjs)
+    else:
+        variables = [col for col in fuel_table.columns if col not in sorting_cols]
+        with span("resample", "numpy"):
+            x, y, grids = resample_polar(fuel_table, variables, resolution)
+        with span("figure", "plotly"):
+            fig = polar_contour(x, y, grids, name, default_variable, fuel_table["TWS [m/s]"], compact=compact)
+        if not compact:
+            with span("show", "plotly"):
+                fig.show()
+            return
+        with span("html", "plotly"):
+            html = compact_html(fig, grids, traces=[0], steps=12, include_plotlyjs=include_plotlyjs)
+
+    output.write_text(html, encoding="utf-8")
+    click.echo(f"Polar plot written to {output}", err=True)
+
+
+@ship.command()
+@click.argument("ids", nargs=-1)
+@click.option("--ids-file", type=click.File("r"), help="File with one ship id per line, '-' for stdin.")
+@click.option("--output-dir", "-o", type=click.Path(file_okay=False, path_type=Path), default="polar-report")
+@click.option("--wave-direction", "-wd", type=float, default=0)
+@click.option("--significant-wave-height", "-wh", type=float, default=0)
+@click.option("--resolution", "-r", type=click.IntRange(min=10),
+              help="Resample onto a polar grid of this many points across, see polar-plot.")
+@click.option("--processes", "-j", type=int, default=None, help="Render processes, defaults to the CPU count.")
+@click.option("--concurrency", "-c", type=int, default=8, help="Maximum number of downloads in flight.")
+@click.option("--no-cache", is_flag=True, help="Always download, bypassing the local fuel table store.")
+@click.option("--force", is_flag=True, help="Render every page, even if its inputs are unchanged.")
+@click.pass_context
+def polar_report(ctx, ids: Tuple[str], ids_file, output_dir: Path, wave_direction: float, significant_wave_height: float,
+                 resolution: int, processes: int, concurrency: int, no_cache: bool, force: bool):
+    """Render polar plots of every draft and speed of the specified ships.
+
+    Each fuel table is downloaded once and sliced locally; the pages are rendered
+    in a process pool to <output-dir>/<id>/, share one plotly.js bundle and are
+    linked from <output-dir>/index.html. Pages whose data and options are
+    unchanged since the last run are skipped.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    from lib.fuel_table import FuelTable, SparseTableError
+    from lib.polar_report import (slices, slice_key, page_name, sea_state_label, render_page, write_plotly_bundle,
+                                  load_manifest, save_manifest, write_index)
+
+    ids = [*ids]
+    if ids_file is not None:
+        ids += [line.strip() for line in ids_file if line.strip()]
+
+    if not ids:
+        logging.error("Please provide at least one ship id.")
+        return
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    write_plotly_bundle(output_dir)
+
+    default_variable = "FC ME [ton/day]"
+    shipyard: ShipyardClient = ctx.obj["shipyard"]
+    store = None if no_cache else fueltable_store(ctx)
+    env = ctx.obj["env"]
+
+    manifest = {} if force else load_manifest(output_dir)
+    ships = []
+    renders = {}
+    failures = 0
+    skipped = 0
+
+    async def download(pool: ProcessPoolExecutor):
+        nonlocal failures, skipped
+
+        async with shipyard as session:
+            async def fetch(id: str):
+                return await fetch_fuel_table(session, {"id": id}, store, env)
+
+            async for id, result, error in imap_bounded(fetch, ids, concurrency):
+                if error is not None:
+                    failures += 1
+                    logging.error(f"Fuel table of {id} failed: {error}")
+                    continue
+
+                name = result["digitalShip"]["get"]["name"]
+                fuel_table = result["digitalShip"]["get"]["fuelTable"]
+                try:
+                    try:
+                        tables = [FuelTable.from_dict(fuel_table, name=name)]
+                    except SparseTableError as e:
+                        logging.info(f"Fuel table of {id} is gridded per draft, {e}")
+                        tables = FuelTable.split(fuel_table, name=name, min_fill=0)
+                    ship_slices = [item for table in tables
+                                   for item in slices(table, wave_direction, significant_wave_height)]
+                except KeyError as e:
+                    failures += 1
+                    logging.error(f"Fuel table of {id} cannot be sliced: {e}")
+                    continue
+
+                (output_dir / id).mkdir(exist_ok=True)
+                pages = []
+                for draft, speed, columns in ship_slices:
+                    page = f"{id}/{page_name(draft, speed, wave_direction, significant_wave_height)}"
+                    pages.append((draft, speed, page))
+
+                    title = (f"{name} - draft {draft:g} m, speed {speed:g} m/s, "
+                             f"{sea_state_label(wave_direction, significant_wave_height)}")
+                    key = slice_key(columns, title=title, default_variable=default_variable, resolution=resolution)
+                    if manifest.get(page) == key and (output_dir / page).exists():
+                        skipped += 1
+                        continue
+
+                    future = pool.submit(render_page, str(output_dir / page), columns, title, default_variable,
+                                         SortingColumns, resolution)
+                    renders[future] = (page, key)
+
+                ships.append({"id": id, "name": name, "pages": pages})
+
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        asyncio.run(download(pool))
+
+        for future, (page, key) in renders.items():
+            try:
+                future.result()
+                manifest[page] = key
+            except Exception as e:
+                failures += 1
+                manifest.pop(page, None)
+                logging.error(f"Rendering {page} failed: {e}")
 
-    fig = pp(fuel_table, name, default_variable, sorting_cols)
+    save_manifest(output_dir, manifest)
+    write_index(output_dir, sorted(ships, key=lambda ship: ids.index(ship["id"])), wave_direction,
+                significant_wave_height)
+    logging.info(f"{len(renders)} pages rendered, {skipped} unchanged, index at {output_dir / 'index.html'}")
 
-    fig.show()
+    if failures:
+        logging.error(f"{failures} ships or pages failed")
+        ctx.exit(1)
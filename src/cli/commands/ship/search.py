@@ -0,0 +1,61 @@
+import json
+import logging
+from datetime import datetime
+from typing import Tuple
+
+import click
+
+from ..catalog import ship_catalog
+from .ship import ship
+
+
+@ship.command()
+@click.argument("conditions", nargs=-1)
+@click.option("--sort", "-s", "sort_fields", multiple=True,
+              help="Field to sort by, descending with a leading -. May be repeated.")
+@click.option("--limit", "-l", type=int, help="Maximum number of ships.")
+@click.option("--fields", type=str, help="Comma separated fields to print, e.g. id,status,shipData.beam.")
+@click.option("--count", is_flag=True, help="Only print the number of matching ships.")
+@click.pass_context
+def search(ctx, conditions: Tuple[str], sort_fields: Tuple[str], limit: int, fields: str, count: bool):
+    """Search the local ship catalog written by sync.
+
+    Every condition is <field><op><value> with op one of = != > >= < <= or ~
+    (contains), e.g. status=done modelType=bulk "beam>40". Fields are ship
+    fields like shipData.beam, or just beam where unique; loadcaseCount and
+    failureCount are summed over the drafts. Ships matching all conditions
+    are printed one per line.
+    """
+    from lib.catalog import parse_condition, parse_sort
+    from lib.query_builder import parse_fields, select_fields
+
+    try:
+        where = [parse_condition(condition) for condition in conditions]
+        order = [parse_sort(field) for field in sort_fields]
+        paths = parse_fields(fields) if fields else None
+    except ValueError as e:
+        logging.error(str(e))
+        return
+
+    catalog = ship_catalog(ctx)
+    try:
+        last_sync = catalog.last_sync()
+        if last_sync is None:
+            logging.error("The ship catalog is empty, run sync first.")
+            return
+        logging.info(f"Catalog synced {datetime.fromtimestamp(last_sync[0]):%Y-%m-%d %H:%M:%S}")
+        ships = catalog.search(where, order, limit)
+    finally:
+        catalog.close()
+
+    if count:
+        click.echo(len(ships))
+        return
+
+    for ship_data in ships:
+        if paths is not None:
+            ship_data = select_fields(ship_data, paths)
+        if ctx.obj["pretty"]:
+            click.echo(json.dumps(ship_data, indent=4))
+        else:
+            click.echo(json.dumps(ship_data))
@@ -1,8 +1,23 @@
 
 import click
 
+from ...lazy_group import LazyGroup
 
-@click.group()
+
+@click.group(cls=LazyGroup, package=__package__, lazy_subcommands={
+    "fuel-table": ".postprocessing:fuel_table",
+    "fuel-table-partitioned": ".postprocessing:fuel_table_partitioned",
+    "polar-plot": ".postprocessing:polar_plot",
+    "polar-report": ".postprocessing:polar_report",
+    "create": ".ship_mutations:create",
+    "create-many": ".ship_mutations:create_many",
+    "get": ".ship_queries:get",
+    "list": ".ship_queries:list",
+    "search": ".search:search",
+    "evaluate": ".analysis:evaluate",
+    "voyage": ".analysis:voyage",
+    "optimize-speed": ".analysis:optimize_speed",
+})
 @click.pass_context
 def ship(ctx):
     pass
@@ -1,15 +1,45 @@
-
-
 import json
+import time
+import asyncio
+import logging
 from pathlib import Path
+from datetime import datetime, timezone
+from typing import List, Tuple
 
 import click
-from gql import gql, Client
-
 
-from lib.jsonify import jsonify
+from lib.client import ShipyardClient
+from lib.jsonify import jsonify_many
+from lib.concurrency import imap_bounded
+from ..cache import jsonify_cache
 from .ship import ship
 
+OutputVariables = [
+    "Draft [m]",
+    "Speed [m/s]",
+    "TWS [m/s]",
+    "TWA [deg]",
+    "Wave direction [deg]",
+    "Wave height Hs [m]",
+    "FC ME [ton/day]",
+    "Heel [deg]",
+    "Leeway [deg]",
+    "Rudder angle [deg]",
+    "FC ME [ton/day]",
+    "Power brake [kW]"
+]
+
+
+def ship_input(name: str, model_type: str, depth: float, csr: float, inputs: List[dict]) -> dict:
+    return {
+        "name": name,
+        "modelType": model_type,
+        "depth": depth,
+        "inputs": inputs,
+        "csr": csr,
+        "outputVariables": OutputVariables
+    }
+
 
 @ship.command()
 @click.option("--name", type=str)
@@ -17,55 +47,150 @@ from .ship import ship
 @click.option("--depth", type=float)
 @click.option("--csr", type=float)
 @click.option("-i", "--input-file", type=click.Path(exists=True), multiple=True)
+@click.option("--processes", "-j", type=int, default=None, help="Processes evaluating input files, defaults to the CPU count.")
+@click.option("--no-cache", is_flag=True, help="Evaluate every input file, bypassing the input cache.")
 @click.pass_context
-def create(ctx, name: str, model_type: str, depth: float, csr: float, input_file: list[str]):
-    """Run a custom query."""
-
-    out_vars = [
-        "Draft [m]",
-        "Speed [m/s]",
-        "TWS [m/s]",
-        "TWA [deg]",
-        "Wave direction [deg]",
-        "Wave height Hs [m]",
-        "FC ME [ton/day]",
-        "Heel [deg]",
-        "Leeway [deg]",
-        "Rudder angle [deg]",
-        "FC ME [ton/day]",
-        "Power brake [kW]"
-    ]
-    inputs = [jsonify(Path(file)) for file in input_file]
-
-    ship_data = {
-        "name": name,
-        "modelType": model_type,
-        "depth": depth,
-        "inputs": inputs,
-        "csr": csr,
-        "outputVariables": out_vars
-    }
+def create(ctx, name: str, model_type: str, depth: float, csr: float, input_file: List[str], processes: int,
+           no_cache: bool):
+    """Run a custom query.
 
-    query = """mutation createShip($shipdata: ShipInput!) {
-        digitalShip {
-            custom(shipInput: $shipdata) {
-                ... on DigitalShip {
-                    id
-                    name
-                    status
-                }
-                ... on Error {
-                    message
-                }
-            }
-        }
-    }
+    Input files are evaluated in parallel; their outputs are cached by the
+    content of the file and the local modules it imports.
     """
 
-    client: Client = ctx.obj["client"]
-    result = client.execute(gql(query), variable_values={"shipdata": ship_data})
+    cache = None if no_cache else jsonify_cache(ctx)
+    inputs = jsonify_many([Path(file) for file in input_file], cache, processes)
+
+    ship_data = ship_input(name, model_type, depth, csr, inputs)
+
+    shipyard: ShipyardClient = ctx.obj["shipyard"]
+    result = {"digitalShip": {"custom": shipyard.run(shipyard.create(ship_data))}}
 
     if ctx.obj["pretty"]:
         click.echo(json.dumps(result, indent=4))
     else:
-        click.echo(json.dumps(result))
\ No newline at end of file
+        click.echo(json.dumps(result))
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+@ship.command()
+@click.argument("manifest", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option("--results", "-r", type=click.Path(dir_okay=False, path_type=Path),
+              help="Results table, defaults to <manifest>.results.csv next to the manifest.")
+@click.option("--concurrency", "-c", type=int, default=4, help="Maximum number of requests in flight.")
+@click.option("--processes", "-j", type=int, default=None, help="Processes evaluating input files, defaults to the CPU count.")
+@click.option("--no-cache", is_flag=True, help="Evaluate every input file, bypassing the input cache.")
+@click.option("--wait/--no-wait", default=True, help="Track the status of the ships until they finish.")
+@click.option("--poll-interval", type=float, default=10, help="Seconds between status checks.")
+@click.option("--timeout", type=float, default=3600,
+              help="Stop tracking after this many seconds, defaults to an hour. Ships still pending are reported.")
+@click.option("--final-status", "final_statuses", multiple=True,
+              help="Additional status after which a ship is no longer tracked, besides done, failed and error.")
+@click.pass_context
+def create_many(ctx, manifest: Path, results: Path, concurrency: int, processes: int, no_cache: bool, wait: bool,
+                poll_interval: float, timeout: float, final_statuses: Tuple[str]):
+    """Create every ship of a CSV or YAML manifest.
+
+    Columns/keys: name, model_type, depth, csr and input_files (';' separated in
+    CSV). Ships are submitted concurrently and their status is tracked until it
+    is final (done, failed, error or a --final-status) or --timeout passes. The results table is rewritten after every change;
+    running again with the same table only submits ships without an id and
+    resumes tracking the pending ones.
+    """
+    from lib.manifest import FinalStatuses, read_manifest, read_results, write_results
+
+    final_statuses = [*FinalStatuses, *final_statuses]
+
+    try:
+        rows = read_manifest(manifest)
+    except (ValueError, ImportError, KeyError) as e:
+        logging.error(f"Could not read manifest {manifest}: {e}")
+        return
+
+    results = results or manifest.with_name(f"{manifest.stem}.results.csv")
+    previous = read_results(results)
+    table = {row["name"]: previous.get(row["name"]) or {"name": row["name"]} for row in rows}
+
+    submit = [row for row in rows if not table[row["name"]].get("id")]
+    missing = sorted({str(file) for row in submit for file in row["input_files"] if not file.is_file()})
+    if missing:
+        logging.error(f"Missing input files: {', '.join(missing)}")
+        return
+
+    # Every distinct input file is evaluated once and its payload shared by all variants using it.
+    files = [*dict.fromkeys(file.resolve() for row in submit for file in row["input_files"])]
+    cache = None if no_cache else jsonify_cache(ctx)
+    payloads = dict(zip(files, jsonify_many(files, cache, processes)))
+    logging.info(f"Submitting {len(submit)} of {len(rows)} ships with {len(files)} distinct input files")
+
+    shipyard: ShipyardClient = ctx.obj["shipyard"]
+
+    def set_status(entry: dict, status: str):
+        entry["status"] = status
+        if status in final_statuses and not entry.get("completed"):
+            entry["completed"] = _now()
+
+    async def run():
+        async with shipyard:
+            async def create_one(row: dict):
+                inputs = [payloads[file.resolve()] for file in row["input_files"]]
+                ship_data = ship_input(row["name"], row["model_type"], row["depth"], row["csr"], inputs)
+                return await shipyard.create(ship_data)
+
+            async for row, created, error in imap_bounded(create_one, submit, concurrency):
+                entry = table[row["name"]]
+                entry["submitted"] = _now()
+                if error is None and created and created.get("message"):
+                    error = created["message"]
+                if error is not None:
+                    entry.update(id=None, status="failed", error=str(error))
+                    logging.error(f"Creating {row['name']} failed: {error}")
+                else:
+                    entry.update(id=created["id"], error=None)
+                    set_status(entry, created.get("status"))
+                write_results(results, table)
+
+            if wait:
+                await track()
+
+    async def track():
+        deadline = time.monotonic() + timeout
+
+        while True:
+            pending = {entry["id"]: entry for entry in table.values()
+                       if entry.get("id") and entry.get("status") not in final_statuses}
+            if not pending:
+                return
+            if time.monotonic() > deadline:
+                for entry in pending.values():
+                    entry["error"] = f"No final status after {timeout:g} s"
+                logging.warning(f"Stopped tracking {len(pending)} pending ships after {timeout:g} s: "
+                                + ", ".join(f"{entry['name']} ({entry['status']})" for entry in pending.values()))
+                return
+
+            logging.info(f"{len(pending)} ships pending")
+            await asyncio.sleep(poll_interval)
+
+            async for id, ship_data, error in shipyard.get_many([*pending], ("status",), concurrency=concurrency):
+                if error is not None or ship_data is None:
+                    logging.warning(f"Status of {id} unavailable: {error or 'not found'}")
+                    continue
+                entry = pending[id]
+                entry["error"] = None
+                set_status(entry, ship_data["status"])
+            write_results(results, table)
+
+    asyncio.run(run())
+    write_results(results, table)
+
+    statuses = {}
+    for entry in table.values():
+        statuses[entry.get("status")] = statuses.get(entry.get("status"), 0) + 1
+    logging.info(f"Results written to {results}: "
+                 + ", ".join(f"{count} {status}" for status, count in sorted(statuses.items(), key=str)))
+
+    if any(entry.get("error") for entry in table.values()):
+        ctx.exit(1)
@@ -1,96 +1,73 @@
 import json
+import logging
+from typing import Tuple
 
 import click
-from gql import gql, Client
 
+from lib.client import ShipyardClient
+from lib.query_builder import GetFields, ListFields, parse_fields
 from .ship import ship
 
+
 @ship.command()
-@click.argument("id")
+@click.argument("ids", nargs=-1, required=True)
 @click.option("--include-fueltable", is_flag=True)
+@click.option("--fields", type=str, help="Comma separated fields to fetch, e.g. id,status,shipData.beam.")
+@click.option("--batch-size", type=int, default=50, help="Maximum number of ships per request.")
+@click.option("--max-bytes", type=int, default=65536, help="Maximum request size in bytes.")
+@click.option("--concurrency", "-c", type=int, default=4, help="Maximum number of requests in flight.")
 @click.pass_context
-def get(ctx, id: str, include_fueltable: bool):
-    """Run a custom query."""
-
-    query = """query ships($id: String!) {
-        digitalShip {
-            get(id: $id) {
-                modelType {
-                    readableName
-                }
-                id
-                status
-                name
-                shipData {
-                    shipType
-                    lengthOverall
-                    beam
-                    depth
-                    drafts
-                    csr
-                    deadweight
-                    grossTonnage
-                    typeOfFuel
-                    speedAtCsr
-                }
-                outputVariables
-                company {
-                    name
-                }
-                drafts {
-                    name
-                    draft
-                    loadcaseCount
-                    failureCount
-                }
-            }
-        }
-    }
-    """
+def get(ctx, ids: Tuple[str], include_fueltable: bool, fields: str, batch_size: int, max_bytes: int, concurrency: int):
+    """Run a custom query.
 
-    query_ft = """query ships($id: String!) {
-        digitalShip {
-            get(id: $id) {
-                modelType {
-                    readableName
-                }
-                id
-                status
-                name
-                shipData {
-                    shipType
-                    lengthOverall
-                    beam
-                    depth
-                    drafts
-                    csr
-                    deadweight
-                    grossTonnage
-                    typeOfFuel
-                    speedAtCsr
-                }
-                outputVariables
-                company {
-                    name
-                }
-                drafts {
-                    name
-                    draft
-                    loadcaseCount
-                    failureCount
-                }
-                fuelTable
-            }
-        }
-    }
+    Several ids are packed into few aliased requests and every ship is
+    printed as its own result, one per line, as the requests complete.
     """
 
-    client: Client = ctx.obj["client"]
-    if include_fueltable:
-        result = client.execute(gql(query_ft), variable_values={"id": id})
-    else:
-        result = client.execute(gql(query), variable_values={"id": id})
+    paths = projected_fields(fields, GetFields)
+    if paths is None:
+        return
+    if include_fueltable and "fuelTable" not in paths:
+        paths += ("fuelTable",)
+
+    shipyard: ShipyardClient = ctx.obj["shipyard"]
+
+    if len(ids) == 1:
+        ship_data = shipyard.run(shipyard.get(ids[0], paths))
+        echo_result(ctx, {"digitalShip": {"get": ship_data}})
+        return
+
+    failures = shipyard.run(get_many(ctx, shipyard, ids, paths, batch_size, max_bytes, concurrency))
+    if failures:
+        logging.error(f"{failures} of {len(ids)} ships failed")
+        ctx.exit(1)
+
+
+async def get_many(ctx, shipyard: ShipyardClient, ids: Tuple[str], paths: Tuple[str, ...], batch_size: int,
+                   max_bytes: int, concurrency: int) -> int:
+    failures = 0
+    async for id, ship_data, error in shipyard.get_many(ids, paths, batch_size, max_bytes, concurrency):
+        if error is not None or ship_data is None:
+            failures += 1
+            logging.error(f"Ship {id} failed: {error or 'not found'}")
+            continue
+        echo_result(ctx, {"digitalShip": {"get": ship_data}})
+    return failures
+
+
+def projected_fields(fields: str, default: Tuple[str, ...]):
+    """The parsed --fields option, or `default` without it. Logs and returns None if invalid."""
+
+    if fields is None:
+        return default
+    try:
+        return parse_fields(fields)
+    except ValueError as e:
+        logging.error(str(e))
+        return None
 
+
+def echo_result(ctx, result: dict):
     if ctx.obj["pretty"]:
         click.echo(json.dumps(result, indent=4))
     else:
@@ -100,50 +77,47 @@ def get(ctx, id: str, include_fueltable: bool):
 @click.pass_context
 @click.option("--limit", "-l", type=int, default=10)
 @click.option("--offset", "-o", type=int, default=0)
-def list(ctx, limit: int, offset: int):
-    """Run a custom query."""
-
-    query = """query ships ($limit: Int!, $offset: Int!) {
-        digitalShip {
-            list(limit: $limit, offset: $offset) {
-                meta {
-                    count
-                    limit
-                    offset
-                }
-                data {
-                    modelType {
-                        readableName
-                    }
-                    id
-                    status
-                    name
-                    shipData {
-                        shipType
-                        lengthOverall
-                        beam
-                        depth
-                        drafts
-                        csr
-                        deadweight
-                        grossTonnage
-                        typeOfFuel
-                        speedAtCsr
-                    }
-                    outputVariables
-                    company {
-                        name
-                    }
-                }
-            }
-        }
-    }
+@click.option("--all", "-a", "all_pages", is_flag=True, help="Walk every page and stream the ships as NDJSON.")
+@click.option("--prefetch", type=int, default=4, help="Number of pages in flight with --all.")
+@click.option("--fields", type=str, help="Comma separated fields to fetch, e.g. id,status,name.")
+def list(ctx, limit: int, offset: int, all_pages: bool, prefetch: int, fields: str):
+    """Run a custom query.
+
+    With --all, --limit is the page size and every ship from --offset on is
+    printed as one JSON line as soon as its page arrives.
     """
 
-    client: Client = ctx.obj["client"]
-    result = client.execute(gql(query), variable_values={"limit": limit, "offset": offset})
+    paths = projected_fields(fields, ListFields)
+    if paths is None:
+        return
+    shipyard: ShipyardClient = ctx.obj["shipyard"]
 
-    if ctx.obj["pretty"]:
-        click.echo(json.dumps(result, indent=4))
-    else:
-        click.echo(json.dumps(result))
\ No newline at end of file
+    if all_pages:
+        if limit < 1:
+            logging.error("Please provide a positive page size.")
+            return
+
+        failures = shipyard.run(stream_ships(shipyard, paths, limit, offset, prefetch))
+        if failures:
+            logging.error(f"{failures} pages failed to download")
+            ctx.exit(1)
+        return
+
+    page = shipyard.run(shipyard.list(limit, offset, paths))
+    echo_result(ctx, {"digitalShip": {"list": page}})
+
+
+async def stream_ships(shipyard: ShipyardClient, paths: Tuple[str, ...], page_size: int, offset: int,
+                       prefetch: int) -> int:
+    """Print every ship from `offset` on as NDJSON as its page arrives.
+    Returns the number of pages that failed."""
+
+    failures = 0
+    async for page_offset, page, error in shipyard.iter_pages(page_size, offset, prefetch, paths):
+        if error is not None:
+            failures += 1
+            logging.error(f"Page at offset {page_offset} failed: {error}")
+            continue
+        for ship_data in page["data"]:
+            click.echo(json.dumps(ship_data))
+    return failures
@@ -3,20 +3,20 @@ import logging
 import json
 from configparser import ConfigParser
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 import click
-from gql import gql, Client
-from gql.transport.aiohttp import AIOHTTPTransport
 
-from lib.queries import login as login_query, version as version_query
+if TYPE_CHECKING:
+    from lib.client import ShipyardClient
 
 @click.command()
 @click.pass_context
 def shipyard_version(ctx):
     """Return the current api version."""
 
-    client: Client = ctx.obj["client"]
-    result = client.execute(gql(version_query), variable_values={})
+    shipyard: ShipyardClient = ctx.obj["shipyard"]
+    result = {"version": shipyard.run(shipyard.version())}
     
     if ctx.obj["pretty"]:
         click.echo(json.dumps(result, indent=4))
@@ -28,30 +28,17 @@ def shipyard_version(ctx):
 @click.pass_context
 def login(ctx):
     """Obtain a valid jwt token."""
-    
+    from lib.client import AuthenticationError
+
     logging.info("Logging in...")
     logging.getLogger().setLevel("WARNING")
 
-    config: ConfigParser = ctx.obj["config"]
-    client: Client = ctx.obj["client"]
-    transport: AIOHTTPTransport = ctx.obj["transport"]
-    config_file: Path = ctx.obj["config_file"]
-    env = ctx.obj["env"]
-
-    query = gql(login_query)
-    params = {"username": config[env]["username"], "password": config[env]["password"]}
-    result = client.execute(query, variable_values=params)
-
-    if result['login']['__typename'] == "LoginError":
-        logging.error(result['login']['message'])
-        return
-    
-    token = result['login']['token']['accessToken']
-    config[env]["token"] = token
-    transport.headers["Authorization"] = f"Bearer {token}"
-
-    with open(config_file, 'w') as configfile:
-        config.write(configfile)
+    shipyard: ShipyardClient = ctx.obj["shipyard"]
+    try:
+        # The new token is written to the config file by the client's on_token.
+        shipyard.run(shipyard.login())
+    except AuthenticationError as e:
+        logging.error(str(e))
 
 
 @click.command()
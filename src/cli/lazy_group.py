@@ -0,0 +1,32 @@
+import importlib
+from typing import Dict, List
+
+import click
+
+from lib.profiling import span
+
+
+class LazyGroup(click.Group):
+    """A click group whose subcommands are imported on first use.
+
+    `lazy_subcommands` maps a command name to "module:attribute", with the module
+    relative to `package`. Modules that register themselves through a
+    `@group.command()` decorator are found after import as well.
+    """
+
+    def __init__(self, *args, lazy_subcommands: Dict[str, str] = None, package: str = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_subcommands = lazy_subcommands or {}
+        self.package = package
+
+    def list_commands(self, ctx) -> List[str]:
+        return sorted({*super().list_commands(ctx), *self.lazy_subcommands})
+
+    def get_command(self, ctx, cmd_name: str):
+        if cmd_name not in self.commands and cmd_name in self.lazy_subcommands:
+            module_name, attribute = self.lazy_subcommands[cmd_name].split(":")
+            with span(f"import {module_name.lstrip('.')}", "import"):
+                module = importlib.import_module(module_name, self.package)
+            if cmd_name not in self.commands:
+                self.add_command(getattr(module, attribute), cmd_name)
+        return super().get_command(ctx, cmd_name)
@@ -0,0 +1,108 @@
+import json
+from typing import Any, AsyncIterator, Iterable, Iterator, List, Optional, Tuple
+
+from gql.transport.exceptions import TransportQueryError
+
+from lib.documents import document
+from lib.concurrency import imap_bounded
+
+
+class AliasedBatcher:
+    """Pack many lookups of one field into few GraphQL documents using aliases.
+
+    For `root="digitalShip", field="get", argument="id"` the values a and b become
+
+        query batch($v0: String!, $v1: String!) {
+          digitalShip {
+            v0: get(id: $v0) { <selection> }
+            v1: get(id: $v1) { <selection> }
+          }
+        }
+
+    A document holds at most `batch_size` aliases and stays below `max_bytes` of
+    query text plus variables. Results are split back per value, and errors that
+    point at one alias only fail that value.
+    """
+
+    def __init__(self, root: str, field: str, argument: str, argument_type: str, selection: str,
+                 batch_size: int = 50, max_bytes: int = 65536):
+        self.root = root
+        self.field = field
+        self.argument = argument
+        self.argument_type = argument_type
+        self.selection = selection
+        self.batch_size = max(1, batch_size)
+        self.max_bytes = max_bytes
+
+    def _field(self, alias: str) -> str:
+        return f"    {alias}: {self.field}({self.argument}: ${alias}) {{\n{self.selection}\n    }}\n"
+
+    def _document(self, aliases: List[str]) -> str:
+        arguments = ", ".join(f"${alias}: {self.argument_type}" for alias in aliases)
+        fields = "".join(self._field(alias) for alias in aliases)
+        return f"query batch({arguments}) {{\n  {self.root} {{\n{fields}  }}\n}}\n"
+
+    def documents(self, values: Iterable[Any]) -> Iterator[Tuple[str, dict]]:
+        """Yield `(query, variables)` pairs covering all values, with the aliases as variable names."""
+
+        aliases: List[str] = []
+        variables: dict = {}
+        size = len(self._document([]))
+
+        for value in values:
+            alias = f"v{len(aliases)}"
+            added = len(self._field(alias)) + len(alias) + len(self.argument_type) + 4 + len(json.dumps(value)) + 8
+
+            if aliases and (len(aliases) >= self.batch_size or size + added > self.max_bytes):
+                yield self._document(aliases), variables
+                aliases, variables = [], {}
+                size = len(self._document([]))
+                alias = "v0"
+
+            aliases.append(alias)
+            variables[alias] = value
+            size += added
+
+        if aliases:
+            yield self._document(aliases), variables
+
+    def split(self, data: Optional[dict], variables: dict, errors: list = None) -> Iterator[Tuple[Any, Any, Optional[str]]]:
+        """Yield `(value, result, error)` per value of one executed document."""
+
+        data = (data or {}).get(self.root) or {}
+        failed = {}
+        for error in errors or []:
+            path = error.get("path") or []
+            alias = path[1] if len(path) > 1 and path[0] == self.root else None
+            if alias in variables:
+                failed[alias] = error.get("message", str(error))
+            else:
+                failed = {alias: error.get("message", str(error)) for alias in variables}
+                break
+
+        for alias, value in variables.items():
+            if alias in failed:
+                yield value, None, failed[alias]
+            else:
+                yield value, data.get(alias), None
+
+    async def execute(self, session, values: Iterable[Any], concurrency: int = 4) -> AsyncIterator[Tuple[Any, Any, Optional[str]]]:
+        """Execute the documents for `values` with at most `concurrency` in flight, yielding
+        `(value, result, error)` as documents complete."""
+
+        async def run(batch: Tuple[str, dict]):
+            query, variables = batch
+            try:
+                return await session.execute(document(query), variable_values=variables), None
+            except TransportQueryError as e:
+                return e.data, e.errors
+
+        async for (_, variables), outcome, error in imap_bounded(run, self.documents(values), concurrency):
+            if error is not None:
+                for value in variables.values():
+                    yield value, None, str(error)
+                continue
+
+            data, errors = outcome
+            for item in self.split(data, variables, errors):
+                yield item
@@ -0,0 +1,262 @@
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from lib.query_builder import ship_list_query, ship_selection
+
+# Fields mirrored per ship, the list projection plus the drafts.
+CatalogFields = ("modelType", "id", "status", "name", "shipData", "outputVariables", "company", "drafts")
+
+# Fields fetched to find the ships that changed since the last sync.
+ChangeFields = ("id", "status", "drafts")
+
+# Searchable ship fields and their columns. The last part of a path works as well
+# where it is unique, e.g. beam for shipData.beam, and is rejected where it is not.
+SearchColumns = {
+    "id": "id",
+    "name": "name",
+    "status": "status",
+    "modelType.readableName": "model_type",
+    "company.name": "company",
+    "shipData.shipType": "ship_type",
+    "shipData.lengthOverall": "length_overall",
+    "shipData.beam": "beam",
+    "shipData.depth": "depth",
+    "shipData.csr": "csr",
+    "shipData.deadweight": "deadweight",
+    "shipData.grossTonnage": "gross_tonnage",
+    "shipData.typeOfFuel": "type_of_fuel",
+    "shipData.speedAtCsr": "speed_at_csr",
+    "drafts.loadcaseCount": "loadcase_count",
+    "drafts.failureCount": "failure_count",
+}
+SearchAliases = {"modelType": "model_type", "company": "company"}
+AmbiguousAliases: Dict[str, List[str]] = {}
+for _path in SearchColumns:
+    if "." in _path:
+        AmbiguousAliases.setdefault(_path.rsplit(".", 1)[-1], []).append(_path)
+for _alias, _paths in [*AmbiguousAliases.items()]:
+    if len(_paths) == 1:
+        del AmbiguousAliases[_alias]
+        if _alias not in SearchColumns and _alias not in SearchAliases:
+            SearchAliases[_alias] = SearchColumns[_paths[0]]
+
+NumericColumns = ["length_overall", "beam", "depth", "csr", "deadweight", "gross_tonnage", "speed_at_csr",
+                  "loadcase_count", "failure_count"]
+
+Operators = {"=": "=", "!=": "!=", ">=": ">=", "<=": "<=", ">": ">", "<": "<", "~": "LIKE"}
+ConditionPattern = re.compile(r"([\w.]+)\s*(!=|>=|<=|=|>|<|~)\s*(.*)")
+
+Schema = f"""
+CREATE TABLE IF NOT EXISTS ships (
+    env TEXT NOT NULL,
+    {", ".join(f"{column} {'REAL' if column in NumericColumns else 'TEXT'}" for column in SearchColumns.values())},
+    fingerprint TEXT NOT NULL,
+    data TEXT NOT NULL,
+    synced_at REAL NOT NULL,
+    PRIMARY KEY (env, id)
+);
+{"".join(f"CREATE INDEX IF NOT EXISTS ships_{column} ON ships (env, {column});" for column in SearchColumns.values() if column != "id")}
+CREATE TABLE IF NOT EXISTS syncs (
+    env TEXT PRIMARY KEY,
+    synced_at REAL NOT NULL,
+    ships INTEGER NOT NULL
+);
+"""
+
+
+def fingerprint(ship: dict) -> str:
+    """Fingerprint of the status and drafts of a ship, which change while it is computed."""
+    payload = json.dumps({"status": ship.get("status"), "drafts": ship.get("drafts")}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def search_column(field: str) -> str:
+    """The catalog column of a search field or its unique alias."""
+
+    column = SearchColumns.get(field) or SearchAliases.get(field)
+    if column is None and field in AmbiguousAliases:
+        raise ValueError(f"Ambiguous field {field}, use one of {AmbiguousAliases[field]}")
+    if column is None:
+        raise ValueError(f"Unknown field {field}")
+    return column
+
+
+def like_pattern(value: str) -> str:
+    """LIKE pattern for values containing `value`, with its wildcards escaped by a backslash."""
+    escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def parse_condition(condition: str) -> Tuple[str, str, Any]:
+    """Split a search condition like "beam>40" or "status=done" into `(column, operator, value)`."""
+
+    match = ConditionPattern.fullmatch(condition.strip())
+    if match is None:
+        raise ValueError(f"Invalid condition {condition}, expected <field><op><value> with op one of {[*Operators]}")
+
+    field, symbol, value = match.groups()
+    column = search_column(field)
+
+    if symbol == "~":
+        return column, Operators[symbol], like_pattern(value)
+    if column in NumericColumns:
+        try:
+            return column, Operators[symbol], float(value)
+        except ValueError:
+            raise ValueError(f"{field} is numeric, got {value}")
+    return column, Operators[symbol], value
+
+
+def parse_sort(sort: str) -> Tuple[str, str]:
+    """`(column, direction)` for a sort field, descending with a leading "-"."""
+
+    column = search_column(sort.lstrip("-"))
+    return column, "DESC" if sort.startswith("-") else "ASC"
+
+
+class ShipCatalog:
+    """SQLite mirror of the ship list, per environment.
+
+    Every ship is stored as its JSON together with indexed columns for the
+    searchable fields. The API has no changed-since filter, so a sync first
+    lists only the ids, status and drafts of all ships and then fetches the full
+    data of ships that are new or whose fingerprint of status and drafts changed.
+    Ships that are no longer listed are removed.
+    """
+
+    def __init__(self, path: Path, env: str):
+        self.path = path
+        self.env = env
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(Schema)
+
+    def close(self):
+        self.connection.close()
+
+    def fingerprints(self) -> Dict[str, str]:
+        rows = self.connection.execute("SELECT id, fingerprint FROM ships WHERE env = ?", (self.env,))
+        return dict(rows.fetchall())
+
+    def last_sync(self) -> Optional[Tuple[float, int]]:
+        """`(timestamp, ships)` of the last complete sync, or None."""
+        row = self.connection.execute("SELECT synced_at, ships FROM syncs WHERE env = ?", (self.env,)).fetchone()
+        return tuple(row) if row else None
+
+    def put(self, ships: List[dict]):
+        now = time.time()
+        rows = []
+        for ship in ships:
+            ship_data = ship.get("shipData") or {}
+            drafts = ship.get("drafts") or []
+            values = {
+                "id": ship["id"],
+                "name": ship.get("name"),
+                "status": ship.get("status"),
+                "model_type": (ship.get("modelType") or {}).get("readableName"),
+                "company": (ship.get("company") or {}).get("name"),
+                "ship_type": ship_data.get("shipType"),
+                "length_overall": ship_data.get("lengthOverall"),
+                "beam": ship_data.get("beam"),
+                "depth": ship_data.get("depth"),
+                "csr": ship_data.get("csr"),
+                "deadweight": ship_data.get("deadweight"),
+                "gross_tonnage": ship_data.get("grossTonnage"),
+                "type_of_fuel": ship_data.get("typeOfFuel"),
+                "speed_at_csr": ship_data.get("speedAtCsr"),
+                "loadcase_count": sum(draft.get("loadcaseCount") or 0 for draft in drafts),
+                "failure_count": sum(draft.get("failureCount") or 0 for draft in drafts),
+            }
+            rows.append((self.env, *(values[column] for column in SearchColumns.values()),
+                         fingerprint(ship), json.dumps(ship), now))
+
+        columns = ", ".join(["env", *SearchColumns.values(), "fingerprint", "data", "synced_at"])
+        placeholders = ", ".join("?" * (len(SearchColumns) + 4))
+        self.connection.executemany(f"INSERT OR REPLACE INTO ships ({columns}) VALUES ({placeholders})", rows)
+
+    def remove(self, ids: List[str]):
+        self.connection.executemany("DELETE FROM ships WHERE env = ? AND id = ?", [(self.env, id) for id in ids])
+
+    def search(self, conditions: List[Tuple[str, str, Any]], sort: List[Tuple[str, str]] = (),
+               limit: int = None) -> List[dict]:
+        """Ships matching all `conditions` from `parse_condition`, ordered by `sort`."""
+
+        sql = "SELECT data FROM ships WHERE env = ?"
+        parameters: list = [self.env]
+        for column, operator, value in conditions:
+            sql += f" AND {column} {operator} ?"
+            if operator == "LIKE":
+                sql += " ESCAPE '\\'"
+            parameters.append(value)
+        sql += " ORDER BY " + ", ".join([f"{column} {direction}" for column, direction in sort] + ["id"])
+        if limit is not None:
+            sql += " LIMIT ?"
+            parameters.append(limit)
+        return [json.loads(data) for data, in self.connection.execute(sql, parameters)]
+
+    async def sync(self, session, page_size: int = 100, prefetch: int = 4, batch_size: int = 50,
+                   concurrency: int = 4, full: bool = False) -> dict:
+        """Bring the mirror up to date, returning counts of listed, fetched, removed and failed ships.
+
+        The first sync or a `full` one lists the complete ships directly."""
+        from lib.batching import AliasedBatcher
+
+        known = {} if full else self.fingerprints()
+        fields = ChangeFields if known else CatalogFields
+
+        listed, failures = await list_ships(session, fields, page_size, prefetch)
+        stats = {"listed": len(listed), "fetched": 0, "removed": 0, "failed": failures}
+
+        if fields == CatalogFields:
+            self.put(listed)
+            stats["fetched"] = len(listed)
+        else:
+            changed = [ship["id"] for ship in listed if known.get(ship["id"]) != fingerprint(ship)]
+            batcher = AliasedBatcher("digitalShip", "get", "id", "String!", ship_selection(CatalogFields), batch_size)
+            ships = []
+            async for id, ship, error in batcher.execute(session, changed, concurrency):
+                if error is not None or ship is None:
+                    stats["failed"] += 1
+                    logging.error(f"Ship {id} failed: {error or 'not found'}")
+                    continue
+                ships.append(ship)
+            self.put(ships)
+            stats["fetched"] = len(ships)
+
+        # Ships missing from an incomplete listing may still exist.
+        if not failures:
+            removed = [*self.fingerprints().keys() - {ship["id"] for ship in listed}]
+            self.remove(removed)
+            stats["removed"] = len(removed)
+            self.connection.execute("INSERT OR REPLACE INTO syncs VALUES (?, ?, ?)", (self.env, time.time(), len(listed)))
+
+        self.connection.commit()
+        return stats
+
+
+async def list_ships(session, fields: Tuple[str, ...], page_size: int, prefetch: int) -> Tuple[List[dict], int]:
+    """Every listed ship with `fields`, and the number of pages that failed."""
+    from lib.documents import document
+    from lib.concurrency import imap_bounded
+
+    query = ship_list_query(fields)
+
+    async def fetch(offset: int) -> dict:
+        result = await session.execute(document(query), variable_values={"limit": page_size, "offset": offset})
+        return result["digitalShip"]["list"]
+
+    first = await fetch(0)
+    ships = [*first["data"]]
+    failures = 0
+    async for offset, page, error in imap_bounded(fetch, range(page_size, first["meta"]["count"], page_size), prefetch):
+        if error is not None:
+            failures += 1
+            logging.error(f"Page at offset {offset} failed: {error}")
+            continue
+        ships.extend(page["data"])
+    return ships, failures
@@ -0,0 +1,279 @@
+import asyncio
+import logging
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional, Tuple
+
+from gql import Client
+from gql.transport.exceptions import TransportQueryError, TransportServerError
+
+from lib.documents import document
+from lib.queries import login as login_query, version as version_query, create_ship
+from lib.batching import AliasedBatcher
+from lib.concurrency import imap_bounded
+from lib.session import SharedSession
+from lib.query_builder import GetFields, ListFields, ship_get_query, ship_list_query, ship_selection
+from lib.transport import ShipyardTransport, _error_codes
+
+Unauthenticated = {"UNAUTHENTICATED", "Unauthenticated", "Unauthorized", "Not authenticated"}
+
+
+class AuthenticationError(Exception):
+    pass
+
+
+class ShipyardClient:
+    """Async client of the Shipyard API.
+
+    All requests share one gql session over the pooled aiohttp connection of a
+    ShipyardTransport. The session is opened by `async with` or on first use and
+    methods may be awaited concurrently by tasks of that event loop. With a
+    username and password a missing token, one about to expire within
+    `refresh_margin` seconds, or one the server rejects is renewed by logging in,
+    once for all requests waiting on it; `on_token` is called with every new token.
+
+        async with ShipyardClient(url, username=username, password=password) as shipyard:
+            ship = await shipyard.get("ship-1")
+
+    `client` replaces the gql client, e.g. with a SharedSession in batch mode. The
+    instance may then be used from event loops in any thread, its requests and
+    logins all run on the loop of the SharedSession, which stays connected.
+    The instance can also stand in for a gql session: `execute` takes a parsed
+    document, and fuel tables are streamed when passed to execute_fuel_table.
+    """
+
+    def __init__(self, url: str, token: str = None, username: str = None, password: str = None,
+                 persisted_queries: bool = False, compression: str = "gzip", request_compression: str = None,
+                 request_compression_min_bytes: int = 65536, execute_timeout: float = 30,
+                 on_token: Callable[[str], Any] = None, refresh_margin: float = 60, client=None):
+        if client is None:
+            transport = ShipyardTransport(
+                url=url,
+                headers={},
+                persisted_queries=persisted_queries,
+                compression=compression,
+                request_compression=request_compression,
+                request_compression_min_bytes=request_compression_min_bytes,
+            )
+            client = Client(transport=transport, execute_timeout=execute_timeout)
+
+        self.client = client
+        self.shared: Optional[SharedSession] = client if isinstance(client, SharedSession) else None
+        self.transport: ShipyardTransport = client.transport
+        self.username = username
+        self.password = password
+        self.on_token = on_token
+        self.refresh_margin = refresh_margin
+        self.session = None
+        self._connect_lock: Optional[asyncio.Lock] = None
+        self._token_lock: Optional[asyncio.Lock] = None
+
+        self.token = None
+        if token and not self.token_expired(token):
+            self._set_token(token)
+
+    @classmethod
+    def from_config(cls, section, on_token: Callable[[str], Any] = None, client=None) -> "ShipyardClient":
+        """A client for one environment section of config.ini."""
+
+        return cls(
+            url=section["url"],
+            token=section.get("token"),
+            username=section.get("username"),
+            password=section.get("password"),
+            persisted_queries=section.getboolean("persisted_queries", fallback=False),
+            compression=section.get("compression", fallback="gzip"),
+            request_compression=section.get("request_compression", fallback=None),
+            request_compression_min_bytes=section.getint("request_compression_min_bytes", fallback=65536),
+            on_token=on_token,
+            client=client,
+        )
+
+    @staticmethod
+    def token_expiry(token: str) -> float:
+        import jwt
+
+        payload = jwt.decode(token, algorithms=["HS256"], options={"verify_signature": False})
+        return payload.get("exp") or float("inf")
+
+    def token_expired(self, token: str = None, margin: float = 0) -> bool:
+        token = token or self.token
+        return token is None or time.time() + margin > self.token_expiry(token)
+
+    def _set_token(self, token: str):
+        self.token = token
+        self.transport.headers["Authorization"] = f"Bearer {token}"
+        if self.transport.session is not None:
+            # The aiohttp session copied the headers when it was connected.
+            self.transport.session.headers["Authorization"] = f"Bearer {token}"
+
+    def _elsewhere(self) -> bool:
+        """Whether the running loop is not the one of the SharedSession."""
+        return self.shared is not None and asyncio.get_running_loop() is not self.shared.loop
+
+    async def connect(self):
+        if self.shared is not None:
+            self.session = self.shared.session
+            return
+
+        # Created in the running loop, before Python 3.10 a lock binds to the loop current when it is made.
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if self.session is None:
+                self.session = await self.client.__aenter__()
+
+    async def close(self):
+        # A SharedSession is closed by its owner, other users may still be running.
+        if self.shared is not None:
+            return
+        if self.session is not None:
+            self.session = None
+            await self.client.__aexit__(None, None, None)
+        # The next connect may run in another event loop.
+        self._connect_lock = None
+        self._token_lock = None
+
+    async def __aenter__(self) -> "ShipyardClient":
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def run(self, coroutine: Awaitable):
+        """Await `coroutine` of this client in a new event loop, for synchronous callers."""
+
+        async def main():
+            async with self:
+                return await coroutine
+
+        try:
+            return asyncio.run(main())
+        finally:
+            coroutine.close()
+
+    async def login(self) -> str:
+        """Log in with the username and password, returning the new token."""
+
+        if not self.username or not self.password:
+            raise AuthenticationError("No username and password to log in with")
+        if self._elsewhere():
+            return await self.shared.run_async(self.login())
+
+        await self.connect()
+        variables = {"username": self.username, "password": self.password}
+        result = await self.session.execute(document(login_query), variable_values=variables)
+        if result["login"]["__typename"] == "LoginError":
+            raise AuthenticationError(result["login"]["message"])
+
+        token = result["login"]["token"]["accessToken"]
+        self._set_token(token)
+        if self.on_token is not None:
+            self.on_token(token)
+        return token
+
+    async def _refresh(self, stale_token: Optional[str]):
+        """Log in unless another task already replaced `stale_token`."""
+
+        if self._token_lock is None:
+            self._token_lock = asyncio.Lock()
+        async with self._token_lock:
+            if self.token == stale_token:
+                logging.info("Logging in" if stale_token is None else "Token expired, logging in")
+                await self.login()
+
+    async def call(self, function: Callable[..., Awaitable], *args):
+        """Await `function(session, *args)` with the gql session, renewing the token as needed."""
+
+        if self._elsewhere():
+            return await self.shared.run_async(self.call(function, *args))
+
+        await self.connect()
+        can_login = bool(self.username and self.password)
+        if can_login and self.token_expired(margin=self.refresh_margin):
+            await self._refresh(self.token)
+
+        token = self.token
+        try:
+            return await function(self.session, *args)
+        except (TransportServerError, TransportQueryError) as e:
+            rejected = (getattr(e, "code", None) in [401, 403]
+                        or bool(_error_codes(getattr(e, "errors", None)) & Unauthenticated))
+            if not (can_login and rejected):
+                raise
+        await self._refresh(token)
+        return await function(self.session, *args)
+
+    async def execute(self, request, variable_values: dict = None, **kwargs) -> dict:
+        """Execute a query, given as text or parsed document, returning its data."""
+
+        if isinstance(request, str):
+            request = document(request)
+
+        async def execute(session):
+            return await session.execute(request, variable_values=variable_values or {}, **kwargs)
+
+        return await self.call(execute)
+
+    async def version(self) -> str:
+        result = await self.execute(version_query)
+        return result["version"]
+
+    async def get(self, id: str, fields: Tuple[str, ...] = GetFields) -> dict:
+        """One ship with `fields`, see query_builder.ShipFields."""
+
+        result = await self.execute(ship_get_query(fields), {"id": id})
+        return result["digitalShip"]["get"]
+
+    async def get_many(self, ids, fields: Tuple[str, ...] = GetFields, batch_size: int = 50,
+                       max_bytes: int = 65536, concurrency: int = 4) -> AsyncIterator[Tuple[str, Any, Optional[str]]]:
+        """Yield `(id, ship, error)` for many ships packed into aliased requests, as they complete."""
+
+        batcher = AliasedBatcher("digitalShip", "get", "id", "String!", ship_selection(fields), batch_size, max_bytes)
+        async for item in batcher.execute(self, ids, concurrency):
+            yield item
+
+    async def list(self, limit: int = 10, offset: int = 0, fields: Tuple[str, ...] = ListFields) -> dict:
+        """One page of ships, with `meta` holding count, limit and offset and the ships in `data`."""
+
+        result = await self.execute(ship_list_query(fields), {"limit": limit, "offset": offset})
+        return result["digitalShip"]["list"]
+
+    async def iter_pages(self, page_size: int = 100, offset: int = 0, prefetch: int = 4,
+                         fields: Tuple[str, ...] = ListFields) -> AsyncIterator[Tuple[int, Optional[dict], Any]]:
+        """Yield `(offset, page, error)` for every page from `offset` on. The first page
+        supplies the count and the rest are fetched with at most `prefetch` in flight."""
+
+        async def fetch(page_offset: int) -> dict:
+            return await self.list(page_size, page_offset, fields)
+
+        first = await fetch(offset)
+        yield offset, first, None
+
+        offsets = range(offset + page_size, first["meta"]["count"], page_size)
+        async for item in imap_bounded(fetch, offsets, prefetch):
+            yield item
+
+    async def iter_all(self, page_size: int = 100, offset: int = 0, prefetch: int = 4,
+                       fields: Tuple[str, ...] = ListFields) -> AsyncIterator[dict]:
+        """Yield every ship from `offset` on. Raises the error of a page that failed."""
+
+        async for _, page, error in self.iter_pages(page_size, offset, prefetch, fields):
+            if error is not None:
+                raise error
+            for ship in page["data"]:
+                yield ship
+
+    async def fuel_table(self, id: str, **filters) -> dict:
+        """The ship's name and fuelTable, with one numpy array per column. `filters`
+        are the fueltable arguments draft, speed, tws, twa, waveDir and sigWaveHeight."""
+        from lib.streaming import execute_fuel_table
+
+        result = await self.call(execute_fuel_table, {"id": id, **filters})
+        return result["digitalShip"]["get"]
+
+    async def create(self, ship_input: dict) -> dict:
+        """Create a ship, returning its id, name and status, or the error message."""
+
+        result = await self.execute(create_ship, {"shipdata": ship_input})
+        return result["digitalShip"]["custom"]
@@ -0,0 +1,101 @@
+import time
+import zlib
+import logging
+from typing import Tuple
+
+# Response encodings the client can negotiate, preferred first.
+ResponseCompressions = ["zstd", "gzip", "none"]
+RequestCompressions = ["gzip", "zstd"]
+
+# Transfers below this many uncompressed bytes are not logged.
+LogMinBytes = 64 * 1024
+
+
+def require_zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("zstd compression needs zstandard, install it with pip install shipyard-client[zstd]")
+    return zstandard
+
+
+def accept_encoding(compression: str) -> str:
+    """The Accept-Encoding header for the `compression` setting. zstd falls back to
+    gzip when zstandard is not installed."""
+
+    if compression == "zstd":
+        try:
+            require_zstandard()
+            return "zstd, gzip"
+        except ImportError as e:
+            logging.warning(f"{e}, using gzip")
+            return "gzip"
+    if compression == "gzip":
+        return "gzip"
+    if compression == "none":
+        return "identity"
+    raise ValueError(f"Unknown compression {compression}, expected one of {ResponseCompressions}")
+
+
+class Decompressor:
+    """Incremental decoder of one response body in `encoding` (a Content-Encoding value),
+    counting bytes and time spent."""
+
+    def __init__(self, encoding: str):
+        self.encoding = (encoding or "identity").strip().lower()
+        self.compressed_bytes = 0
+        self.decompressed_bytes = 0
+        self.seconds = 0.0
+
+        if self.encoding in ["gzip", "x-gzip"]:
+            self._decoder = zlib.decompressobj(wbits=31)
+        elif self.encoding == "deflate":
+            self._decoder = zlib.decompressobj()
+        elif self.encoding == "zstd":
+            self._decoder = require_zstandard().ZstdDecompressor().decompressobj()
+        elif self.encoding == "identity":
+            self._decoder = None
+        else:
+            raise ValueError(f"Unsupported Content-Encoding {encoding}")
+
+    def decompress(self, chunk: bytes) -> bytes:
+        self.compressed_bytes += len(chunk)
+        if self._decoder is None:
+            self.decompressed_bytes += len(chunk)
+            return chunk
+
+        start = time.perf_counter()
+        data = self._decoder.decompress(chunk)
+        self.seconds += time.perf_counter() - start
+        self.decompressed_bytes += len(data)
+        return data
+
+    def flush(self) -> bytes:
+        if self._decoder is None or not hasattr(self._decoder, "flush"):
+            return b""
+        data = self._decoder.flush()
+        self.decompressed_bytes += len(data)
+        return data
+
+    def log(self, what: str = "Response"):
+        if self._decoder is not None and self.decompressed_bytes >= LogMinBytes:
+            log_transfer(what, self.encoding, self.decompressed_bytes, self.compressed_bytes, self.seconds)
+
+
+def compress(body: bytes, encoding: str) -> Tuple[bytes, float]:
+    """`body` compressed with `encoding`, and the seconds it took."""
+
+    start = time.perf_counter()
+    if encoding == "gzip":
+        data = zlib.compress(body, level=6, wbits=31)
+    elif encoding == "zstd":
+        data = require_zstandard().ZstdCompressor(level=3).compress(body)
+    else:
+        raise ValueError(f"Unknown request compression {encoding}, expected one of {RequestCompressions}")
+    return data, time.perf_counter() - start
+
+
+def log_transfer(what: str, encoding: str, size: int, compressed: int, seconds: float):
+    ratio = size / compressed if compressed else 0
+    logging.info(f"{what} {size / 1e6:.2f} MB as {compressed / 1e6:.2f} MB {encoding} "
+                 f"(ratio {ratio:.1f}x, {seconds * 1000:.1f} ms)")
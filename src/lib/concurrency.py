@@ -0,0 +1,40 @@
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, Optional, Tuple
+
+
+async def imap_bounded(
+    func: Callable[[Any], Awaitable[Any]],
+    items: Iterable[Any],
+    limit: int,
+) -> AsyncIterator[Tuple[Any, Any, Optional[BaseException]]]:
+    """Run the coroutine function `func` for every item with at most `limit` calls in flight.
+
+    Yields `(item, result, error)` tuples in completion order. An exception raised by
+    `func` is yielded as `error` instead of being raised, so one failing item does not
+    abort the others. Items are pulled from `items` lazily, so it may be a generator.
+    """
+
+    items = iter(items)
+    limit = max(1, limit)
+    pending: dict = {}
+
+    def fill():
+        while len(pending) < limit:
+            try:
+                item = next(items)
+            except StopIteration:
+                return
+            pending[asyncio.ensure_future(func(item))] = item
+
+    fill()
+    try:
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                item = pending.pop(task)
+                error = task.exception()
+                yield item, None if error else task.result(), error
+            fill()
+    finally:
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,22 @@
+import copy
+from functools import lru_cache
+
+from gql import gql
+
+from lib.profiling import span
+
+
+@lru_cache(maxsize=512)
+def _parse(query: str):
+    with span("gql parse", "gql", query_bytes=len(query)):
+        return gql(query)
+
+
+def document(query: str):
+    """`gql(query)`, parsed only the first time a query text is seen.
+
+    Every call returns a shallow copy, since executing a request attaches the
+    variables to it; the parsed document itself is shared.
+    """
+
+    return copy.copy(_parse(query))
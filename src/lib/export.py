@@ -0,0 +1,132 @@
+import json
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+
+
+def fuel_table_arrays(fuel_table: dict) -> Dict[str, np.ndarray]:
+    """Convert the column lists of a fuelTable response into typed numpy arrays.
+    Columns with missing values become float64 with NaN."""
+
+    arrays = {}
+    for column, values in fuel_table.items():
+        array = np.asarray(values)
+        if array.dtype.kind not in "biuf":
+            array = np.asarray(values, dtype=np.float64)
+        arrays[column] = array
+    return arrays
+
+
+def json_default(value):
+    """`default` for json.dumps that writes numpy arrays as lists."""
+
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def write_csv(arrays: Dict[str, np.ndarray], file, chunk_size: int = 65536):
+    """Write the columns as ", " separated text, formatting `chunk_size` rows per write.
+
+    Values are written as Python's str() of each value, like the JSON numbers. This
+    stays per row: numpy and pandas text formatting is slower for that output.
+    """
+
+    keys = tuple(arrays.keys())
+    file.write(', '.join(keys) + "\n")
+
+    row_format = ", ".join(["%r"] * len(keys))
+    length = len(arrays[keys[0]]) if keys else 0
+    for start in range(0, length, chunk_size):
+        columns = [arrays[key][start:start + chunk_size].tolist() for key in keys]
+        file.write("\n".join([row_format % row for row in zip(*columns)]))
+        file.write("\n")
+
+
+def write_npz(arrays: Dict[str, np.ndarray], path):
+    with open(path, "wb") as file:
+        np.savez(file, **arrays)
+
+
+def require_pyarrow():
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError("The parquet and arrow formats require pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+
+def arrow_table(arrays: Dict[str, np.ndarray]):
+    pa = require_pyarrow()
+    return pa.table({column: pa.array(array) for column, array in arrays.items()})
+
+
+def write_parquet(arrays: Dict[str, np.ndarray], path):
+    require_pyarrow()
+    import pyarrow.parquet as pq
+
+    pq.write_table(arrow_table(arrays), path)
+
+
+def write_arrow(arrays: Dict[str, np.ndarray], path):
+    """Write an Arrow IPC file (readable with pyarrow.ipc.open_file or pandas.read_feather)."""
+
+    pa = require_pyarrow()
+    table = arrow_table(arrays)
+    with pa.OSFile(str(path), "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def read_fuel_table(path) -> Dict[str, np.ndarray]:
+    """Read a fuel table written by `ship fuel-table` in any of its formats, chosen by suffix.
+    A .npy table of `ship fuel-table-partitioned` is memory-mapped."""
+
+    path = Path(path)
+    suffix = path.suffix.lower()
+
+    if suffix == ".npy":
+        data = np.load(path, mmap_mode="r")
+        return {column: data[column] for column in data.dtype.names}
+    if suffix == ".npz":
+        with np.load(path) as data:
+            return {column: data[column] for column in data.files}
+    if suffix == ".parquet":
+        require_pyarrow()
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(path)
+        return {column: table[column].to_numpy() for column in table.column_names}
+    if suffix in [".arrow", ".feather"]:
+        pa = require_pyarrow()
+        table = pa.ipc.open_file(pa.memory_map(str(path))).read_all()
+        return {column: table[column].to_numpy() for column in table.column_names}
+    if suffix == ".json":
+        with open(path) as file:
+            result = json.load(file)
+        fuel_table = result["digitalShip"]["get"]["fuelTable"] if "digitalShip" in result else result
+        return fuel_table_arrays(fuel_table)
+    if suffix == ".csv":
+        import pandas as pd
+
+        frame = pd.read_csv(path, skipinitialspace=True)
+        return {column: frame[column].to_numpy() for column in frame.columns}
+
+    raise ValueError(f"Unknown fuel table format {path.suffix}")
+
+
+def iter_table_chunks(path, chunk_size: int):
+    """Yield a csv or parquet file as pandas DataFrames of at most `chunk_size` rows."""
+
+    import pandas as pd
+
+    path = Path(path)
+    if path.suffix.lower() == ".parquet":
+        require_pyarrow()
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, skipinitialspace=True, chunksize=chunk_size)
@@ -0,0 +1,266 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+SortingColumns = [
+    "Draft [m]",
+    "Speed [m/s]",
+    "TWA [deg]",
+    "TWS [m/s]",
+    "Wave direction [deg]",
+    "Wave height Hs [m]"
+]
+
+
+def grid_axes(fuel_table: dict, columns: List[str] = SortingColumns) -> Tuple[List[np.ndarray], np.ndarray]:
+    """Place the rows of a fuel table on the regular grid spanned by `columns`.
+
+    Returns the sorted unique values of each column and, per row, its flat index
+    into a C-ordered array of shape `[len(axis) for axis in axes]`.
+    """
+
+    axes = []
+    codes = []
+    for column in columns:
+        axis, code = np.unique(np.asarray(fuel_table[column], dtype=np.float64), return_inverse=True)
+        axes.append(axis)
+        codes.append(code.ravel())
+
+    flat_index = np.ravel_multi_index(codes, [len(axis) for axis in axes])
+    return axes, flat_index
+
+
+# Smallest share of the grid cells that have to hold a row, below which from_dict refuses
+# to build a grid, e.g. for tables whose drafts each have their own speeds.
+MinFill = 0.5
+
+# fueltable query filters and the sorting column each one selects on.
+FilterColumns = {
+    "draft": "Draft [m]",
+    "speed": "Speed [m/s]",
+    "twa": "TWA [deg]",
+    "tws": "TWS [m/s]",
+    "waveDir": "Wave direction [deg]",
+    "sigWaveHeight": "Wave height Hs [m]",
+}
+
+
+class SparseTableError(ValueError):
+    pass
+
+
+class FuelTable:
+    """A fuel table stored as a dense grid over its sorting columns.
+
+    Each sorting column is kept once as its sorted unique values (an axis); a row's
+    integer code along an axis is its position in the grid. Output variables are
+    contiguous arrays of shape `shape`, NaN where the table has no row, and
+    `present` marks the grid cells that hold a row.
+
+    Selecting a value of an axis is a binary search followed by a basic numpy index,
+    so selections are views. Selections on leading axes (draft, then speed) stay
+    contiguous; weather selections are strided.
+
+    The grid only saves memory when most of its cells hold a row. Tables that are not
+    close to a full product of their axes are split into one FuelTable per value of
+    a column with `split`.
+    """
+
+    def __init__(self, axes: List[np.ndarray], grids: Dict[str, np.ndarray], present: np.ndarray = None,
+                 columns: List[str] = SortingColumns, name: str = None):
+        self.columns = [*columns]
+        self.axes = [np.asarray(axis) for axis in axes]
+        self.shape = tuple(len(axis) for axis in self.axes)
+        self.grids = grids
+        self.present = np.ones(self.shape, dtype=bool) if present is None else present
+        self.name = name
+
+        for variable, grid in grids.items():
+            if grid.shape != self.shape:
+                raise ValueError(f"Grid of {variable} has shape {grid.shape}, expected {self.shape}")
+
+    @classmethod
+    def from_dict(cls, fuel_table: dict, columns: List[str] = SortingColumns, dtype=np.float64,
+                  name: str = None, min_fill: float = MinFill) -> "FuelTable":
+        """Build from a column mapping such as the fuelTable of a query result. Raises
+        SparseTableError when fewer than `min_fill` of the grid cells would hold a row."""
+
+        missing = [column for column in columns if column not in fuel_table]
+        if missing:
+            raise KeyError(f"Fuel table is missing the sorting columns {missing}")
+
+        axes, flat_index = grid_axes(fuel_table, columns)
+        shape = tuple(len(axis) for axis in axes)
+        size = int(np.prod(shape))
+        if len(flat_index) < min_fill * size:
+            raise SparseTableError(f"{len(flat_index)} rows would fill {len(flat_index) / size:.1%} of a "
+                                   f"{' x '.join(map(str, shape))} grid")
+
+        present = np.zeros(size, dtype=bool)
+        present[flat_index] = True
+
+        grids = {}
+        for variable in fuel_table:
+            if variable in columns:
+                continue
+            grid = np.full(size, np.nan, dtype=dtype)
+            grid[flat_index] = np.asarray(fuel_table[variable], dtype=dtype)
+            grids[variable] = grid.reshape(shape)
+
+        return cls(axes, grids, present.reshape(shape), columns, name)
+
+    @classmethod
+    def split(cls, fuel_table: dict, column: str = "Draft [m]", columns: List[str] = SortingColumns,
+              dtype=np.float64, name: str = None, min_fill: float = MinFill) -> List["FuelTable"]:
+        """One table per value of `column`, for tables whose other axes differ between its
+        values. Raises SparseTableError when a part is still sparse."""
+
+        values, inverse = np.unique(np.asarray(fuel_table[column], dtype=np.float64), return_inverse=True)
+        order = np.argsort(inverse.ravel(), kind="stable")
+        bounds = np.searchsorted(inverse.ravel()[order], np.arange(len(values) + 1))
+        tables = []
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            rows = order[start:stop]
+            part = {key: np.asarray(column_values)[rows] for key, column_values in fuel_table.items()}
+            tables.append(cls.from_dict(part, columns, dtype, name, min_fill))
+        return tables
+
+    @classmethod
+    def from_result(cls, result: dict, dtype=np.float64) -> "FuelTable":
+        """Build from a fueltable query result."""
+
+        ship_data = result["digitalShip"]["get"]
+        return cls.from_dict(ship_data["fuelTable"], dtype=dtype, name=ship_data.get("name"))
+
+    @property
+    def variables(self) -> List[str]:
+        return [*self.grids.keys()]
+
+    @property
+    def nbytes(self) -> int:
+        return (sum(axis.nbytes for axis in self.axes) + sum(grid.nbytes for grid in self.grids.values())
+                + self.present.nbytes)
+
+    @property
+    def fill(self) -> float:
+        """The share of the grid cells that hold a row."""
+        return len(self) / max(self.present.size, 1)
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self.present))
+
+    def __repr__(self) -> str:
+        dims = ", ".join(f"{column}: {len(axis)}" for column, axis in zip(self.columns, self.axes))
+        return f"FuelTable({self.name!r}, {len(self)} rows, {dims}, variables={self.variables})"
+
+    def _column(self, key: str) -> str:
+        return FilterColumns.get(key, key)
+
+    def axis(self, column: str) -> np.ndarray:
+        """The sorted unique values of a sorting column, by column or filter name."""
+
+        return self.axes[self.columns.index(self._column(column))]
+
+    def code(self, column: str, value: float) -> int:
+        """The integer code of `value` along `column`, found by binary search."""
+
+        axis = self.axis(column)
+        code = int(np.searchsorted(axis, value))
+        for candidate in (code, code - 1):
+            if 0 <= candidate < len(axis) and np.isclose(axis[candidate], value):
+                return candidate
+        raise KeyError(f"{value} is not a value of {self._column(column)}")
+
+    def _index(self, column: str, selector):
+        axis = self.axis(column)
+        if isinstance(selector, tuple):
+            low, high = selector
+            start = 0 if low is None else int(np.searchsorted(axis, low, side="left"))
+            stop = len(axis) if high is None else int(np.searchsorted(axis, high, side="right"))
+            return slice(start, stop)
+        if isinstance(selector, (list, np.ndarray)):
+            return [self.code(column, value) for value in selector]
+        code = self.code(column, selector)
+        return slice(code, code + 1)
+
+    def select(self, **selectors) -> "FuelTable":
+        """Select on sorting columns, keyed by filter name (draft, speed, twa, tws,
+        waveDir, sigWaveHeight).
+
+        A value keeps the grid cells of that value, a (low, high) tuple an inclusive
+        range (either side may be None) and a list several values. Values and ranges
+        return views of this table; lists copy.
+        """
+
+        index = [slice(None)] * len(self.axes)
+        for key, selector in selectors.items():
+            column = self._column(key)
+            if column not in self.columns:
+                raise KeyError(f"Unknown sorting column {key}")
+            index[self.columns.index(column)] = self._index(column, selector)
+
+        # numpy applies several lists jointly, so index with at most one at a time.
+        lists = [i for i, selector in enumerate(index) if isinstance(selector, list)]
+        basic = tuple(slice(None) if isinstance(selector, list) else selector for selector in index)
+        table = self._take(basic, [axis[selector] for axis, selector in zip(self.axes, basic)])
+        for i in lists:
+            take = (slice(None),) * i + (index[i],)
+            axes = [*table.axes]
+            axes[i] = axes[i][index[i]]
+            table = table._take(take, axes)
+        return table
+
+    def _take(self, index: tuple, axes: List[np.ndarray]) -> "FuelTable":
+        return FuelTable(axes, {variable: grid[index] for variable, grid in self.grids.items()},
+                         self.present[index], self.columns, self.name)
+
+    def grid(self, variable: str) -> np.ndarray:
+        """The values of `variable` on the grid, a view."""
+
+        return self.grids[variable]
+
+    def column(self, name: str) -> np.ndarray:
+        """One column over the rows of the table, in grid order.
+
+        Output variables of a complete, contiguous table are zero-copy views.
+        """
+
+        if name in self.grids:
+            grid = self.grids[name]
+            return grid.reshape(-1) if self.present.all() else grid[self.present]
+
+        i = self.columns.index(self._column(name))
+        shape = [1] * len(self.axes)
+        shape[i] = len(self.axes[i])
+        values = np.broadcast_to(self.axes[i].reshape(shape), self.shape)
+        return values.reshape(-1) if self.present.all() else values[self.present]
+
+    def codes(self) -> np.ndarray:
+        """The integer code of every row along every axis, shape (rows, len(columns))."""
+
+        dtype = np.min_scalar_type(max(self.shape, default=1))
+        return np.column_stack(np.nonzero(self.present)).astype(dtype)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.column(name)
+
+    def to_dict(self) -> Dict[str, np.ndarray]:
+        """The table as a column mapping, as used by the fuel table writers."""
+
+        return {name: self.column(name) for name in [*self.columns, *self.variables]}
+
+    def to_frame(self, index: bool = False):
+        """The table as a pandas DataFrame, with the sorting columns as a MultiIndex if
+        `index`. Variables of a complete, contiguous table are not copied."""
+
+        import pandas as pd
+
+        data = {variable: self.column(variable) for variable in self.variables}
+        if index:
+            multi_index = pd.MultiIndex.from_product(self.axes, names=self.columns)
+            if not self.present.all():
+                multi_index = multi_index[self.present.reshape(-1)]
+            return pd.DataFrame(data, index=multi_index, copy=False)
+
+        return pd.DataFrame({**{column: self.column(column) for column in self.columns}, **data}, copy=False)
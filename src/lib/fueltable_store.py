@@ -0,0 +1,105 @@
+import os
+import json
+import hashlib
+import logging
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+class FuelTableStore:
+    """On-disk store of downloaded fuel tables.
+
+    Every table is saved as one compressed .npz file holding a float array per
+    column, together with the ship name and a fingerprint of the ship's status and
+    drafts at download time. A stored table is only returned while that fingerprint
+    still matches. The store is capped at `max_bytes`; the least recently used
+    files are evicted first.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(env: str, variables: dict) -> str:
+        """Key of a table by environment and fueltable query variables."""
+        payload = json.dumps({"env": env, **variables}, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    @staticmethod
+    def fingerprint(ship_status: dict) -> str:
+        """Fingerprint of the status/drafts metadata returned by the ship_status query."""
+        payload = json.dumps(ship_status, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"{key}.npz"
+
+    def get(self, key: str, fingerprint: str) -> Optional[Tuple[str, dict]]:
+        """Return `(name, fuel_table)` with one numpy array per column, or None if the
+        table is missing or outdated."""
+
+        path = self.path(key)
+        if not path.is_file():
+            return None
+
+        try:
+            with np.load(path) as data:
+                if str(data["__fingerprint__"]) != fingerprint:
+                    logging.info(f"Stored fuel table {key[:12]} is outdated")
+                    return None
+                name = str(data["__name__"])
+                columns = data["__columns__"]
+                fuel_table = {str(column): data[f"c{i}"] for i, column in enumerate(columns)}
+        except (OSError, KeyError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable fuel table {path}: {e}")
+            return None
+
+        os.utime(path)
+        return name, fuel_table
+
+    def put(self, key: str, fingerprint: str, name: str, fuel_table: dict):
+        arrays = {f"c{i}": np.asarray(values) for i, values in enumerate(fuel_table.values())}
+        if any(array.dtype.kind not in "biuf" for array in arrays.values()):
+            logging.info("Fuel table has non-numeric columns, not storing it")
+            return
+
+        path = self.path(key)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as file:
+            np.savez_compressed(
+                file,
+                __fingerprint__=np.array(fingerprint),
+                __name__=np.array(name),
+                __columns__=np.array([*fuel_table.keys()]),
+                **arrays,
+            )
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def entries(self) -> List[Path]:
+        """Stored tables, least recently used first."""
+        return sorted(self.directory.glob("*.npz"), key=lambda path: path.stat().st_mtime)
+
+    def size(self) -> int:
+        return sum(path.stat().st_size for path in self.entries())
+
+    def evict(self):
+        entries = self.entries()
+        total = sum(path.stat().st_size for path in entries)
+        for path in entries:
+            if total <= self.max_bytes:
+                break
+            total -= path.stat().st_size
+            path.unlink(missing_ok=True)
+            logging.info(f"Evicted stored fuel table {path.stem[:12]}")
+
+    def clear(self) -> int:
+        """Remove every stored table, returning the number of files removed."""
+        entries = self.entries()
+        for path in entries:
+            path.unlink(missing_ok=True)
+        return len(entries)
@@ -0,0 +1,132 @@
+import itertools
+from typing import Dict, List, Union
+
+import numpy as np
+
+from lib.fuel_table import FuelTable, SortingColumns, grid_axes
+
+EdgeModes = ["clip", "nan", "extrapolate"]
+
+
+class FuelTableInterpolator:
+    """Multilinear interpolation of fuel table output variables.
+
+    The table is placed once on the regular grid over the sorting columns, after
+    which any output variable can be evaluated at arbitrary points in vectorized
+    batches. Points outside the grid are handled according to `edge`:
+
+    clip: clamp the point onto the grid
+    nan: return NaN
+    extrapolate: extend the linear trend of the outermost cells
+
+    Grid nodes missing from the table are NaN and propagate into every point
+    whose interpolation stencil uses them.
+
+    `fuel_table` is a column mapping or a FuelTable, whose grids are used as is.
+    """
+
+    def __init__(self, fuel_table: Union[dict, FuelTable], columns: List[str] = SortingColumns, edge: str = "clip"):
+        if edge not in EdgeModes:
+            raise ValueError(f"Unknown edge mode {edge}, expected one of {EdgeModes}")
+
+        self.columns = columns
+        self.edge = edge
+
+        if isinstance(fuel_table, FuelTable):
+            if fuel_table.columns != [*columns]:
+                raise ValueError(f"FuelTable is gridded over {fuel_table.columns}, expected {columns}")
+            self.axes = fuel_table.axes
+            self.shape = fuel_table.shape
+            self.variables = fuel_table.variables
+            self._table = None
+            self._grids = {variable: fuel_table.grid(variable).astype(np.float64, copy=False)
+                           for variable in fuel_table.variables}
+            return
+
+        self.axes, self._flat_index = grid_axes(fuel_table, columns)
+        self.shape = tuple(len(axis) for axis in self.axes)
+        self.variables = [column for column in fuel_table if column not in columns]
+
+        self._table = fuel_table
+        self._grids: Dict[str, np.ndarray] = {}
+
+    def grid(self, variable: str) -> np.ndarray:
+        """The values of `variable` on the grid, NaN where the table has no row."""
+
+        if variable not in self._grids:
+            if variable not in self.variables:
+                raise KeyError(f"Unknown output variable {variable}")
+            grid = np.full(int(np.prod(self.shape)), np.nan)
+            grid[self._flat_index] = np.asarray(self._table[variable], dtype=np.float64)
+            self._grids[variable] = grid.reshape(self.shape)
+        return self._grids[variable]
+
+    def points(self, conditions) -> np.ndarray:
+        """Accept an (n, len(columns)) array or a mapping/DataFrame keyed by column name."""
+
+        if hasattr(conditions, "keys"):
+            return np.column_stack([np.asarray(conditions[column], dtype=np.float64) for column in self.columns])
+
+        points = np.asarray(conditions, dtype=np.float64)
+        if points.ndim == 1:
+            points = points[np.newaxis, :]
+        if points.shape[1] != len(self.columns):
+            raise ValueError(f"Expected points with {len(self.columns)} columns, got {points.shape[1]}")
+        return points
+
+    def __call__(self, variable: str, conditions, chunk_size: int = 262144) -> np.ndarray:
+        return self.evaluate(variable, conditions, chunk_size)
+
+    def evaluate(self, variable: str, conditions, chunk_size: int = 262144) -> np.ndarray:
+        """Interpolate `variable` at every point of `conditions`, `chunk_size` points at a time."""
+
+        points = self.points(conditions)
+        grid = self.grid(variable).ravel()
+        result = np.empty(len(points))
+
+        for start in range(0, len(points), chunk_size):
+            chunk = points[start:start + chunk_size]
+            result[start:start + chunk_size] = self._interpolate(grid, chunk)
+
+        return result
+
+    def _interpolate(self, grid: np.ndarray, points: np.ndarray) -> np.ndarray:
+        strides = np.cumprod((self.shape[1:] + (1,))[::-1])[::-1]
+        base = np.zeros(len(points), dtype=np.intp)
+        outside = np.zeros(len(points), dtype=bool)
+        active = []
+
+        for k, axis in enumerate(self.axes):
+            x = points[:, k]
+            outside |= (x < axis[0]) | (x > axis[-1])
+
+            # A single-valued axis contributes no interpolation dimension.
+            if len(axis) == 1:
+                continue
+
+            lower = np.clip(np.searchsorted(axis, x, side="right") - 1, 0, len(axis) - 2)
+            weight = (x - axis[lower]) / (axis[lower + 1] - axis[lower])
+            if self.edge != "extrapolate":
+                weight = np.clip(weight, 0, 1)
+
+            base += lower * strides[k]
+            active.append((strides[k], weight))
+
+        result = np.zeros(len(points))
+        for corner in itertools.product((0, 1), repeat=len(active)):
+            index = base.copy()
+            corner_weight = np.ones(len(points))
+            for upper, (stride, weight) in zip(corner, active):
+                if upper:
+                    index += stride
+                    corner_weight *= weight
+                else:
+                    corner_weight *= 1 - weight
+
+            contribution = corner_weight * grid[index]
+            contribution[corner_weight == 0] = 0
+            result += contribution
+
+        if self.edge == "nan":
+            result[outside] = np.nan
+        return result
@@ -1,7 +1,11 @@
-import sys
+import os
+import ast
 import json
+import hashlib
+import logging
 import importlib.util
 from pathlib import Path
+from typing import List, Optional
 
 
 def jsonify(path: Path):
@@ -21,3 +25,136 @@ def jsonify(path: Path):
         "value": input
     }
     return output
+
+
+def _resolve(name: str, directories: List[Path]) -> List[Path]:
+    """Source files of the local module `name` and its parent packages, if it is found in `directories`."""
+
+    parts = name.split(".")
+    for directory in directories:
+        files = []
+        for i in range(1, len(parts) + 1):
+            base = directory.joinpath(*parts[:i])
+            if (base / "__init__.py").is_file():
+                files.append(base / "__init__.py")
+            elif base.with_suffix(".py").is_file() and i == len(parts):
+                files.append(base.with_suffix(".py"))
+            else:
+                break
+        else:
+            return files
+    return []
+
+
+def local_imports(path: Path) -> List[Path]:
+    """Files of the modules imported by `path` that live next to it or in the working
+    directory. Installed packages are not followed."""
+
+    tree = ast.parse(path.read_bytes(), filename=str(path))
+    names = []
+    directories = [path.parent, Path.cwd()]
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names += [(alias.name, directories) for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                base = [path.parents[node.level - 1]]
+                module = node.module or ""
+            else:
+                base = directories
+                module = node.module
+            prefix = f"{module}." if module else ""
+            if module:
+                names.append((module, base))
+            names += [(f"{prefix}{alias.name}", base) for alias in node.names]
+
+    files = []
+    for name, search in names:
+        files += [file for file in _resolve(name, search) if file not in files]
+    return files
+
+
+def source_hash(path: Path) -> str:
+    """Hash of an input module's name, its source and the sources of everything it
+    imports locally, recursively."""
+
+    digest = hashlib.sha256(path.stem.encode())
+    seen = set()
+    pending = [path.resolve()]
+    while pending:
+        file = pending.pop()
+        if file in seen:
+            continue
+        seen.add(file)
+        pending += [imported.resolve() for imported in local_imports(file)]
+
+    for file in sorted(seen):
+        digest.update(str(file).encode())
+        digest.update(hashlib.sha256(file.read_bytes()).digest())
+    return digest.hexdigest()
+
+
+class JsonifyCache:
+    """On-disk cache of `jsonify` outputs, keyed by `source_hash` of the input file."""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> Optional[dict]:
+        path = self.path(key)
+        if not path.is_file():
+            return None
+        try:
+            with open(path) as file:
+                return json.load(file)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable cached input {path}: {e}")
+            return None
+
+    def put(self, key: str, output: dict):
+        path = self.path(key)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w") as file:
+            json.dump(output, file)
+        os.replace(tmp_path, path)
+
+    def entries(self) -> List[Path]:
+        return sorted(self.directory.glob("*.json"))
+
+    def clear(self) -> int:
+        entries = self.entries()
+        for path in entries:
+            path.unlink(missing_ok=True)
+        return len(entries)
+
+
+def jsonify_many(paths: List[Path], cache: JsonifyCache = None, processes: int = None) -> List[dict]:
+    """`jsonify` every path, in order. Cached outputs are reused; the remaining modules
+    are executed in a process pool when there is more than one."""
+
+    keys = [source_hash(path) for path in paths] if cache is not None else [None] * len(paths)
+    outputs = [cache.get(key) if cache is not None else None for key in keys]
+    missing = [i for i, output in enumerate(outputs) if output is None]
+
+    for i in sorted(set(range(len(paths))) - set(missing)):
+        logging.info(f"Using cached input {paths[i]}")
+
+    if len(missing) == 1:
+        outputs[missing[0]] = jsonify(paths[missing[0]])
+    elif missing:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            for i, output in zip(missing, pool.map(jsonify, [paths[i] for i in missing])):
+                outputs[i] = output
+
+    if cache is not None:
+        for i in missing:
+            cache.put(keys[i], outputs[i])
+
+    return outputs
@@ -0,0 +1,89 @@
+import os
+import csv
+from pathlib import Path
+from typing import Dict, List
+
+ManifestColumns = ["name", "model_type", "depth", "csr", "input_files"]
+ResultColumns = ["name", "id", "status", "error", "submitted", "completed"]
+
+# Ship statuses that no longer change. The API does not enumerate its statuses, so
+# tracking waits on every other value, known or not, and create-many can extend these.
+FinalStatuses = ["done", "failed", "error"]
+
+
+def require_yaml():
+    try:
+        import yaml
+    except ImportError:
+        raise ImportError("YAML manifests need PyYAML, install it with pip install shipyard-client[yaml]")
+    return yaml
+
+
+def _row(entry: dict, directory: Path) -> dict:
+    entry = {key.replace("modelType", "model_type").replace("inputFiles", "input_files"): value
+             for key, value in entry.items()}
+    if not entry.get("name"):
+        raise ValueError(f"Manifest entry without a name: {entry}")
+
+    input_files = entry.get("input_files") or []
+    if isinstance(input_files, str):
+        input_files = [file.strip() for file in input_files.split(";") if file.strip()]
+
+    return {
+        "name": str(entry["name"]),
+        "model_type": entry.get("model_type") or None,
+        "depth": float(entry["depth"]) if entry.get("depth") not in [None, ""] else None,
+        "csr": float(entry["csr"]) if entry.get("csr") not in [None, ""] else None,
+        "input_files": [directory / file for file in input_files],
+    }
+
+
+def read_manifest(path: Path) -> List[dict]:
+    """Read the ships of a CSV or YAML manifest.
+
+    Every entry has a name and optionally model_type, depth, csr and input_files,
+    which are ';' separated in CSV and resolved relative to the manifest. A YAML
+    manifest is a list of entries or a mapping with a `ships` list. Names must be
+    unique, they identify the ships in the results table.
+    """
+
+    if path.suffix.lower() in [".yaml", ".yml"]:
+        yaml = require_yaml()
+        with open(path) as file:
+            entries = yaml.safe_load(file) or []
+        if isinstance(entries, dict):
+            entries = entries.get("ships", [])
+    else:
+        with open(path, newline="") as file:
+            entries = [*csv.DictReader(file, skipinitialspace=True)]
+
+    rows = [_row(entry, path.parent) for entry in entries]
+
+    names = [row["name"] for row in rows]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate ship names in manifest: {', '.join(duplicates)}")
+
+    return rows
+
+
+def read_results(path: Path) -> Dict[str, dict]:
+    """The rows of a results table by ship name, empty if it does not exist."""
+
+    if not path.exists():
+        return {}
+    with open(path, newline="") as file:
+        return {row["name"]: {column: row.get(column) or None for column in ResultColumns}
+                for row in csv.DictReader(file)}
+
+
+def write_results(path: Path, results: Dict[str, dict]):
+    """Replace the results table atomically, so an interrupted run leaves a readable table."""
+
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    with open(tmp_path, "w", newline="") as file:
+        writer = csv.DictWriter(file, ResultColumns)
+        writer.writeheader()
+        for row in results.values():
+            writer.writerow({column: row.get(column) or "" for column in ResultColumns})
+    os.replace(tmp_path, path)
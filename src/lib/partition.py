@@ -0,0 +1,148 @@
+import asyncio
+import itertools
+import logging
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+from gql.transport.exceptions import TransportQueryError
+
+from lib.concurrency import imap_bounded
+from lib.documents import document
+from lib.fuel_table import FilterColumns, SortingColumns
+from lib.queries import ship_status
+from lib.streaming import execute_fuel_table
+
+# fueltable query filters that a download can be split along, with their column.
+PartitionAxes = {axis: FilterColumns[axis] for axis in ["draft", "speed", "waveDir", "sigWaveHeight"]}
+
+
+async def _probe(session, variables: dict, columns: List[str]) -> Dict[str, list]:
+    """The distinct values of `columns` in the fuel table filtered by `variables`."""
+
+    result = await execute_fuel_table(session, variables)
+    fuel_table = result["digitalShip"]["get"]["fuelTable"]
+    values = {column: np.unique(fuel_table.get(column, [])).tolist() for column in columns}
+    for column, column_values in values.items():
+        if not column_values:
+            raise ValueError(f"Could not determine the values of {column} with {variables}")
+    return values
+
+
+async def partition_values(session, id: str, axes: List[str]) -> Dict[str, Dict[str, list]]:
+    """The filter values of every axis in `axes` per draft name, in draft order, found
+    with small probing requests.
+
+    Every draft is probed on its own: its speeds in calm water, its wave directions
+    and heights at its first speed with a single wind condition. Speeds without a calm
+    water condition and wave conditions missing from that wind condition are not found.
+    """
+
+    status = await session.execute(document(ship_status), variable_values={"id": id})
+    drafts = sorted(status["digitalShip"]["get"]["drafts"], key=lambda draft: draft["draft"])
+
+    async def probe(name: str) -> Dict[str, list]:
+        values = {"draft": [name]}
+        if {"speed", "waveDir", "sigWaveHeight"} & {*axes}:
+            calm = await _probe(session, {"id": id, "draft": name, "waveDir": 0.0, "sigWaveHeight": 0.0},
+                                [PartitionAxes["speed"], "TWS [m/s]", "TWA [deg]"])
+            values["speed"] = calm[PartitionAxes["speed"]]
+
+            if {"waveDir", "sigWaveHeight"} & {*axes}:
+                wind = {"id": id, "draft": name, "speed": values["speed"][0], "tws": calm["TWS [m/s]"][0],
+                        "twa": calm["TWA [deg]"][0]}
+                waves = await _probe(session, wind, [PartitionAxes["waveDir"], PartitionAxes["sigWaveHeight"]])
+                values["waveDir"] = waves[PartitionAxes["waveDir"]]
+                values["sigWaveHeight"] = waves[PartitionAxes["sigWaveHeight"]]
+        return {axis: values[axis] for axis in axes}
+
+    probed = await asyncio.gather(*(probe(draft["name"]) for draft in drafts))
+    return {draft["name"]: values for draft, values in zip(drafts, probed)}
+
+
+def partitions(id: str, axes: List[str], values: Dict[str, Dict[str, list]]) -> List[dict]:
+    """fueltable query variables of every partition, in output order, for the values of
+    `axes` per draft from `partition_values`."""
+
+    rank = {name: i for i, name in enumerate(values)}
+    combinations = {combination for draft_values in values.values()
+                    for combination in itertools.product(*(draft_values[axis] for axis in axes))}
+
+    def key(combination: tuple) -> list:
+        return [rank[value] if axis == "draft" else value for axis, value in zip(axes, combination)]
+
+    return [{"id": id, **dict(zip(axes, combination))} for combination in sorted(combinations, key=key)]
+
+
+async def _fetch_partition(session, variables: dict, retries: int) -> dict:
+    for attempt in range(retries + 1):
+        try:
+            result = await execute_fuel_table(session, variables)
+            return result["digitalShip"]["get"]["fuelTable"]
+        except TransportQueryError:
+            raise
+        except Exception as e:
+            if attempt == retries:
+                raise
+            delay = 0.5 * 2 ** attempt
+            logging.warning(f"Partition {variables} failed ({e}), retrying in {delay:.1f} s")
+            await asyncio.sleep(delay)
+
+
+async def download_partitioned(session, id: str, axes: List[str], output: Path, concurrency: int = 8,
+                               retries: int = 3) -> int:
+    """Download the full fuel table of ship `id` split along `axes` and merge it into `output`.
+
+    Partitions are fetched concurrently, each sorted by the partition axes followed by
+    the remaining sorting columns and parked in a temporary file next to `output`.
+    They are then copied one at a time into a memory-mapped .npy file holding a
+    structured array with one float64 field per column, so neither the partitions
+    nor the merged table have to fit in memory. Returns the number of rows.
+    """
+
+    values = await partition_values(session, id, axes)
+    parts = partitions(id, axes, values)
+    logging.info(f"Downloading {len(parts)} partitions along {', '.join(axes)}")
+
+    partition_columns = [PartitionAxes[axis] for axis in axes]
+    order = [*partition_columns, *[column for column in SortingColumns if column not in partition_columns]]
+
+    with tempfile.TemporaryDirectory(dir=output.parent, prefix=".partitions-") as tmp_dir:
+        sizes: Dict[int, int] = {}
+        columns: List[str] = []
+
+        async def fetch(index: int):
+            fuel_table = await _fetch_partition(session, parts[index], retries)
+
+            if not columns:
+                columns.extend(fuel_table.keys())
+            elif [*fuel_table.keys()] != columns:
+                raise ValueError(f"Partition {parts[index]} has different columns")
+
+            rows = np.lexsort([fuel_table[column] for column in reversed(order)])
+            stacked = np.stack([np.asarray(fuel_table[column], dtype=np.float64)[rows] for column in columns])
+            np.save(Path(tmp_dir) / f"{index}.npy", stacked)
+            return stacked.shape[1]
+
+        async for index, size, error in imap_bounded(fetch, range(len(parts)), concurrency):
+            if error is not None:
+                raise RuntimeError(f"Partition {parts[index]} failed: {error}") from error
+            sizes[index] = size
+
+        total = sum(sizes.values())
+        dtype = np.dtype([(column, np.float64) for column in columns])
+        merged = np.lib.format.open_memmap(output, mode="w+", dtype=dtype, shape=(total,))
+
+        start = 0
+        for index in range(len(parts)):
+            stacked = np.load(Path(tmp_dir) / f"{index}.npy", mmap_mode="r")
+            for i, column in enumerate(columns):
+                merged[column][start:start + sizes[index]] = stacked[i]
+            start += sizes[index]
+            del stacked
+
+        merged.flush()
+        del merged
+
+    return total
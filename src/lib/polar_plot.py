@@ -1,12 +1,60 @@
+import json
+import base64
+from typing import Dict, List
+
 import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 
-def polar_plot(fuel_table: pd.DataFrame, name: str, default_variable: str, sorting_cols: list[str]) -> go.Figure:
+# Page script of compact figures: the variable buttons only carry a label, the
+# clicked variable is decoded from the lookup and restyled into the contour traces.
+CompactScript = """
+var gd = document.getElementById('{plot_id}');
+var variables = %s;
+var traces = %s;
+function decodeColumn(encoded, shape) {
+    var bytes = Uint8Array.from(atob(encoded), function (c) { return c.charCodeAt(0); });
+    var values = new Float32Array(bytes.buffer);
+    if (!shape) return values;
+    var rows = [];
+    for (var i = 0; i < shape[0]; i++) rows.push(values.subarray(i * shape[1], (i + 1) * shape[1]));
+    return rows;
+}
+gd.on('plotly_buttonclicked', function (event) {
+    var name = event.button.label;
+    var variable = variables[name];
+    var z = decodeColumn(variable.z, variable.shape);
+    Plotly.restyle(gd, {z: traces.map(function () { return z; })}, traces);
+    Plotly.restyle(gd, {
+        'contours.start': variable.contours.start, 'contours.end': variable.contours.end,
+        'contours.size': variable.contours.size, 'colorbar.title.text': name
+    }, [traces[0]]);
+});
+"""
+
+
+def contour_levels(values, steps: int = 180) -> dict:
+    """Contour start, end and size spanning `values` in `steps` equal steps, ignoring NaN."""
+
+    values = np.asarray(values, dtype=np.float64)
+    if not np.isfinite(values).any():
+        return dict(start=0.0, end=1.0, size=1.0)
+
+    start, end = float(np.nanmin(values)), float(np.nanmax(values))
+    return dict(start=start, end=end, size=(end - start) / steps if end > start else 1.0)
 
-    twa_theta = fuel_table["TWA [deg]"]
-    tws_r = fuel_table["TWS [m/s]"]
-    default_col = fuel_table[default_variable]
+
+def polar_plot(fuel_table: pd.DataFrame, name: str, default_variable: str, sorting_cols: List[str],
+               compact: bool = False) -> go.Figure:
+    """Polar contour plot of `default_variable` with a button per output variable.
+
+    A compact figure's buttons carry no data; write it with `compact_html`, which
+    adds the columns and the script that switches between them.
+    """
+
+    twa_theta = fuel_table["TWA [deg]"].to_numpy(dtype=np.float64)
+    tws_r = fuel_table["TWS [m/s]"].to_numpy(dtype=np.float64)
+    default_col = fuel_table[default_variable].to_numpy(dtype=np.float64)
 
     max_r = max(tws_r)
     
@@ -107,7 +155,10 @@ def polar_plot(fuel_table: pd.DataFrame, name: str, default_variable: str, sorti
         plot_bgcolor='rgba(0,0,0,0)',
     )
 
-    variable_options = get_variable_options(fuel_table, sorting_cols)
+    if compact:
+        variable_options = get_variable_labels(fuel_table, sorting_cols)
+    else:
+        variable_options = get_variable_options(fuel_table, sorting_cols)
 
     fig.update_layout(
         # add buttons to switch between output variables
@@ -122,7 +173,127 @@ def polar_plot(fuel_table: pd.DataFrame, name: str, default_variable: str, sorti
     return fig
 
 
-def get_variable_options(fuel_table: pd.DataFrame, sorting_cols: list[str]) -> list[dict]:
+def resample_polar(fuel_table: pd.DataFrame, variables: List[str], resolution: int = 200) -> tuple:
+    """Resample a TWA/TWS slice onto a regular Cartesian grid covering the half disc.
+
+    The grid has `resolution` points vertically and half as many horizontally.
+    Every point is interpolated bilinearly in (TWA, TWS); points outside the table
+    are NaN. Returns x, y and a dict of 2D grids of shape (len(y), len(x)).
+    """
+
+    from lib.interpolation import FuelTableInterpolator
+
+    columns = ["TWA [deg]", "TWS [m/s]"]
+    interpolator = FuelTableInterpolator({column: fuel_table[column] for column in [*columns, *variables]},
+                                         columns=columns, edge="nan")
+
+    max_r = float(interpolator.axes[1][-1])
+    x = np.linspace(0, max_r, resolution // 2 + 1)
+    y = np.linspace(-max_r, max_r, resolution + 1)
+    X, Y = np.meshgrid(x, y)
+    points = np.column_stack([np.rad2deg(np.arctan2(X, Y)).ravel(), np.hypot(X, Y).ravel()])
+
+    grids = {variable: interpolator(variable, points).reshape(X.shape) for variable in variables}
+    return x, y, grids
+
+
+def polar_contour(x: np.ndarray, y: np.ndarray, grids: Dict[str, np.ndarray], name: str, default_variable: str,
+                  tws: np.ndarray, levels: int = 12, compact: bool = False) -> go.Figure:
+    """Polar contour plot of resampled grids from `resample_polar`.
+
+    Plotly only draws one contour over a fixed grid plus the axis lines, so render
+    time depends on the grid resolution rather than on the table size. `tws` are
+    the wind speeds drawn as circles.
+    """
+
+    default_grid = grids[default_variable]
+    max_r = float(x[-1])
+
+    fig = go.Figure()
+
+    fig.add_trace(go.Contour(
+        x=x,
+        y=y,
+        z=default_grid,
+        contours=dict(
+            **contour_levels(default_grid, levels),
+            coloring="heatmap",
+            showlabels=True,
+        ),
+        line=dict(width=1),
+        connectgaps=False,
+        colorbar=dict(
+            title=dict(
+                text=default_variable,
+                side='right',
+            ),
+        ),
+    ))
+
+    # The white polar axes: a circle per wind speed and a spoke every 30 degrees
+    angles = np.deg2rad(np.linspace(0, 180, 61))
+    for r in np.unique(tws):
+        fig.add_trace(go.Scatter(x=r * np.sin(angles), y=r * np.cos(angles), mode="lines",
+                                 line=dict(color="white", width=1), hoverinfo="skip", showlegend=False))
+    for twa in range(0, 181, 30):
+        end = (max_r * np.sin(np.deg2rad(twa)), max_r * np.cos(np.deg2rad(twa)))
+        fig.add_trace(go.Scatter(x=[0, end[0]], y=[0, end[1]], mode="lines",
+                                 line=dict(color="white", width=1), hoverinfo="skip", showlegend=False))
+        fig.add_annotation(text=f"{twa}°", x=1.08 * end[0], y=1.08 * end[1], xref="x", yref="y", showarrow=False)
+
+    fig.update_layout(
+        title=dict(
+            text=name,
+            x=0.5,
+        ),
+        xaxis=dict(
+            showgrid=False,
+            zeroline=False,
+            visible=False,
+        ),
+        yaxis=dict(
+            scaleanchor="x",
+            scaleratio=1,
+            range=[-1.15*max_r, 1.15*max_r],
+            showgrid=False,
+            zeroline=False,
+            visible=False
+        ),
+        plot_bgcolor='rgba(0,0,0,0)',
+    )
+
+    if compact:
+        variable_options = [dict(args=[], label=variable, method="skip") for variable in grids]
+    else:
+        variable_options = [
+            dict(
+                args=[
+                    dict(
+                        z=[grid],
+                        contours=[dict(**contour_levels(grid, levels), coloring="heatmap", showlabels=True)],
+                        colorbar=[dict(title=dict(text=variable, side='right'))],
+                    ),
+                    [0],
+                ],
+                label=variable,
+                method="restyle",
+            )
+            for variable, grid in grids.items()
+        ]
+
+    fig.update_layout(
+        updatemenus=[
+            dict(
+                active=0,
+                buttons=variable_options,
+            ),
+        ]
+    )
+
+    return fig
+
+
+def get_variable_options(fuel_table: pd.DataFrame, sorting_cols: List[str]) -> List[dict]:
     variable_options = []
     for col_name in fuel_table.columns:
         if col_name in sorting_cols:
@@ -174,4 +345,40 @@ def get_variable_options(fuel_table: pd.DataFrame, sorting_cols: list[str]) -> l
         )
 
         variable_options.append(button_dict)
-    return variable_options
\ No newline at end of file
+    return variable_options
+
+def get_variable_labels(fuel_table: pd.DataFrame, sorting_cols: List[str]) -> List[dict]:
+    """Buttons of a compact figure, switched by the page script of `compact_html`."""
+
+    return [dict(args=[], label=col_name, method="skip")
+            for col_name in fuel_table.columns if col_name not in sorting_cols]
+
+
+def encode_column(col) -> str:
+    """A column as base64 of its little-endian float32 bytes."""
+
+    return base64.b64encode(np.asarray(col, dtype="<f4").tobytes()).decode("ascii")
+
+
+def compact_html(fig: go.Figure, columns: dict, traces: List[int] = (0, 1), steps: int = 180,
+                 include_plotlyjs=True) -> str:
+    """HTML of a compact figure, storing every output variable once as float32.
+
+    `columns` maps each variable to its values, 1D for the scattered traces of
+    `polar_plot` or 2D for the grid of `polar_contour`; they are restyled into the
+    z of `traces`, with contour levels computed here. `include_plotlyjs` is passed
+    to plotly: True embeds plotly.js for a self-contained file, "cdn" links to it.
+    """
+
+    variables = {}
+    for col_name, col in columns.items():
+        col = np.asarray(col)
+        variables[col_name] = dict(
+            z=encode_column(col),
+            shape=col.shape if col.ndim == 2 else None,
+            contours=contour_levels(col, steps),
+        )
+    lookup = json.dumps(variables).replace("</", "<\\/")
+
+    script = CompactScript % (lookup, json.dumps([*traces]))
+    return fig.to_html(include_plotlyjs=include_plotlyjs, full_html=True, post_script=script)
@@ -0,0 +1,126 @@
+import html
+import json
+import hashlib
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+import numpy as np
+
+from lib.fuel_table import FuelTable
+
+PlotlyBundle = "plotly.min.js"
+ManifestName = ".manifest.json"
+
+
+def slices(fuel_table: FuelTable, wave_direction: float, wave_height: float) -> Iterator[Tuple[float, float, dict]]:
+    """Every draft/speed slice of a table in one sea state, as (draft, speed, columns)."""
+
+    sea_state = fuel_table.select(waveDir=wave_direction, sigWaveHeight=wave_height)
+    for draft in sea_state.axis("draft"):
+        for speed in sea_state.axis("speed"):
+            table = sea_state.select(draft=draft, speed=speed)
+            if len(table):
+                yield float(draft), float(speed), table.to_dict()
+
+
+def slice_key(columns: dict, **params) -> str:
+    """Content hash of a slice and the parameters it is rendered with."""
+
+    digest = hashlib.sha256(json.dumps(params, sort_keys=True).encode())
+    for name, values in columns.items():
+        digest.update(name.encode())
+        digest.update(np.ascontiguousarray(values, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+def page_name(draft: float, speed: float, wave_direction: float, wave_height: float) -> str:
+    return f"draft-{draft:g}_speed-{speed:g}_wavedir-{wave_direction:g}_hs-{wave_height:g}.html"
+
+
+def sea_state_label(wave_direction: float, wave_height: float) -> str:
+    return f"wave direction {wave_direction:g} deg, Hs {wave_height:g} m"
+
+
+def render_page(path: str, columns: dict, name: str, default_variable: str, sorting_cols: List[str],
+                resolution: int = None, bundle: str = f"../{PlotlyBundle}") -> str:
+    """Render one compact polar plot page to `path`, loading plotly.js from `bundle`.
+
+    Runs in a worker process, so it takes plain data and imports plotting lazily.
+    """
+
+    import pandas as pd
+    from lib.polar_plot import polar_plot, polar_contour, resample_polar, compact_html
+
+    fuel_table = pd.DataFrame(columns)
+    variables = [col for col in fuel_table.columns if col not in sorting_cols]
+
+    if resolution is None:
+        fig = polar_plot(fuel_table, name, default_variable, sorting_cols, compact=True)
+        page = compact_html(fig, {col: fuel_table[col] for col in variables}, include_plotlyjs=bundle)
+    else:
+        x, y, grids = resample_polar(fuel_table, variables, resolution)
+        fig = polar_contour(x, y, grids, name, default_variable, fuel_table["TWS [m/s]"], compact=True)
+        page = compact_html(fig, grids, traces=[0], steps=12, include_plotlyjs=bundle)
+
+    tmp_path = Path(f"{path}.tmp")
+    tmp_path.write_text(page, encoding="utf-8")
+    tmp_path.replace(path)
+    return path
+
+
+def write_plotly_bundle(output_dir: Path) -> Path:
+    """Write the plotly.js bundle shared by all pages, unless it is already current."""
+
+    from plotly.offline import get_plotlyjs
+
+    path = output_dir / PlotlyBundle
+    bundle = get_plotlyjs()
+    if not path.exists() or path.read_text(encoding="utf-8") != bundle:
+        path.write_text(bundle, encoding="utf-8")
+    return path
+
+
+def load_manifest(output_dir: Path) -> dict:
+    path = output_dir / ManifestName
+    if not path.exists():
+        return {}
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_manifest(output_dir: Path, manifest: dict):
+    tmp_path = output_dir / f"{ManifestName}.tmp"
+    with open(tmp_path, "w") as file:
+        json.dump(manifest, file, indent=1, sort_keys=True)
+    tmp_path.replace(output_dir / ManifestName)
+
+
+def write_index(output_dir: Path, ships: List[dict], wave_direction: float, wave_height: float):
+    """Write index.html with a draft by speed table of links per ship, for one sea state.
+
+    `ships` holds dicts with id, name and pages, a list of (draft, speed, relative path).
+    """
+
+    sections = []
+    for ship in ships:
+        drafts = sorted({draft for draft, _, _ in ship["pages"]})
+        speeds = sorted({speed for _, speed, _ in ship["pages"]})
+        links = {(draft, speed): path for draft, speed, path in ship["pages"]}
+
+        rows = ["<tr><th>Draft [m] \\ Speed [m/s]</th>" + "".join(f"<th>{speed:g}</th>" for speed in speeds) + "</tr>"]
+        for draft in drafts:
+            cells = "".join(
+                f'<td><a href="{html.escape(links[draft, speed])}">plot</a></td>' if (draft, speed) in links else "<td></td>"
+                for speed in speeds
+            )
+            rows.append(f"<tr><th>{draft:g}</th>{cells}</tr>")
+
+        sections.append(f"<h2>{html.escape(ship['name'])} <small>{html.escape(ship['id'])}</small></h2>\n"
+                        f"<table>\n{chr(10).join(rows)}\n</table>")
+
+    page = ("<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\">\n<title>Polar plot report</title>\n"
+            "<style>body{font-family:sans-serif}table{border-collapse:collapse}"
+            "td,th{border:1px solid #ccc;padding:4px 8px;text-align:center}</style>\n</head>\n<body>\n"
+            f"<h1>Polar plot report</h1>\n<p>{html.escape(sea_state_label(wave_direction, wave_height))}</p>\n"
+            + "\n".join(sections) + "\n</body>\n</html>\n")
+    (output_dir / "index.html").write_text(page, encoding="utf-8")
@@ -0,0 +1,160 @@
+import os
+import json
+import math
+import time
+import threading
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+class HistogramSink:
+    """Duration histograms per span name, for sessions too long to keep every event.
+
+    Durations are counted in power-of-two microsecond buckets. The histograms are
+    written to `path` as JSON at most every `interval` seconds while spans come
+    in, and once more on `flush`.
+    """
+
+    def __init__(self, path: Path, interval: float = 10):
+        self.path = path
+        self.interval = interval
+        self.histograms: Dict[str, dict] = {}
+        self._written = time.monotonic()
+
+    def add(self, name: str, seconds: float):
+        histogram = self.histograms.setdefault(name, {"count": 0, "sum_ms": 0.0, "max_ms": 0.0, "buckets_us": {}})
+        histogram["count"] += 1
+        histogram["sum_ms"] += seconds * 1000
+        histogram["max_ms"] = max(histogram["max_ms"], seconds * 1000)
+
+        bucket = str(2 ** max(0, math.ceil(math.log2(max(seconds * 1e6, 1)))))
+        histogram["buckets_us"][bucket] = histogram["buckets_us"].get(bucket, 0) + 1
+
+        if time.monotonic() - self._written > self.interval:
+            self.flush()
+
+    def flush(self):
+        tmp_path = self.path.with_name(f"{self.path.name}.tmp")
+        with open(tmp_path, "w") as file:
+            json.dump(self.histograms, file, indent=1)
+        os.replace(tmp_path, self.path)
+        self._written = time.monotonic()
+
+
+class Profiler:
+    """Collects timed spans as Chrome trace events.
+
+    Span arguments ending in `_bytes` are also summed per name for the summary.
+    Spans may be recorded from any thread. With `keep_events` False spans only
+    go to the sink, so memory stays flat over long sessions.
+    """
+
+    def __init__(self, sink: HistogramSink = None, keep_events: bool = True):
+        self.sink = sink
+        self.keep_events = keep_events
+        self.events: List[dict] = []
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, category: str = "", **args):
+        """Time the block as span `name`. Yields the span's args, which the block may extend."""
+
+        start = time.perf_counter()
+        try:
+            yield args
+        finally:
+            self.record(name, category, start, time.perf_counter(), args)
+
+    def record(self, name: str, category: str, start: float, end: float, args: dict = None):
+        if not self.keep_events:
+            if self.sink is not None:
+                with self._lock:
+                    self.sink.add(name, end - start)
+            return
+
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": (start - self._origin) * 1e6,
+            "dur": (end - start) * 1e6,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": args or {},
+        }
+        with self._lock:
+            self.events.append(event)
+            if self.sink is not None:
+                self.sink.add(name, end - start)
+
+    def write_trace(self, path: Path):
+        """Write the spans as Chrome trace-event JSON, for chrome://tracing or Perfetto."""
+
+        with open(path, "w") as file:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, file)
+
+    def summary(self) -> str:
+        """A table of count, total, mean and max duration and bytes per span name."""
+
+        rows: Dict[str, dict] = {}
+        for event in self.events:
+            row = rows.setdefault(event["name"], {"category": event["cat"], "count": 0, "total": 0.0, "max": 0.0, "bytes": 0})
+            row["count"] += 1
+            row["total"] += event["dur"] / 1000
+            row["max"] = max(row["max"], event["dur"] / 1000)
+            row["bytes"] += sum(value for key, value in event["args"].items() if key.endswith("_bytes"))
+
+        width = max([len(name) for name in rows] + [4])
+        lines = [f"{'span':<{width}}  {'category':<8}  {'count':>5}  {'total ms':>9}  {'mean ms':>8}  {'max ms':>8}  {'bytes':>10}"]
+        for name, row in sorted(rows.items(), key=lambda item: -item[1]["total"]):
+            lines.append(f"{name:<{width}}  {row['category']:<8}  {row['count']:>5}  {row['total']:>9.1f}  "
+                         f"{row['total'] / row['count']:>8.1f}  {row['max']:>8.1f}  {row['bytes'] or '':>10}")
+        return "\n".join(lines)
+
+
+_active: Optional[Profiler] = None
+
+
+def start(profiler: Profiler):
+    global _active
+    _active = profiler
+
+
+def stop() -> Optional[Profiler]:
+    global _active
+    profiler, _active = _active, None
+    return profiler
+
+
+def active() -> Optional[Profiler]:
+    return _active
+
+
+def span(name: str, category: str = "", **args):
+    """A span of the active profiler, or a no-op that still yields `args` when not profiling."""
+
+    if _active is None:
+        return nullcontext(args)
+    return _active.span(name, category, **args)
+
+
+def server_time(headers) -> Optional[float]:
+    """Server processing time in ms from a Server-Timing or X-Response-Time header."""
+
+    try:
+        timing = headers.get("Server-Timing")
+        if timing:
+            durations = [float(part.strip()[4:]) for part in timing.replace(",", ";").split(";")
+                         if part.strip().startswith("dur=")]
+            if durations:
+                return sum(durations)
+
+        response_time = headers.get("X-Response-Time")
+        if response_time:
+            response_time = response_time.strip()
+            return float(response_time[:-2] if response_time.endswith("ms") else response_time)
+    except ValueError:
+        pass
+    return None
@@ -30,4 +30,35 @@ fueltable = """query fuelTable($id: String!, $draft: String, $speed: Float, $tws
     }
   }
 }
-"""
\ No newline at end of file
+"""
+
+ship_status = """query shipStatus($id: String!) {
+  digitalShip {
+    get(id: $id) {
+      status
+      drafts {
+        name
+        draft
+        loadcaseCount
+        failureCount
+      }
+    }
+  }
+}
+"""
+
+create_ship = """mutation createShip($shipdata: ShipInput!) {
+  digitalShip {
+    custom(shipInput: $shipdata) {
+      ... on DigitalShip {
+        id
+        name
+        status
+      }
+      ... on Error {
+        message
+      }
+    }
+  }
+}
+"""
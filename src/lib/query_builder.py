@@ -0,0 +1,142 @@
+from functools import lru_cache
+from typing import Optional, Tuple
+
+# Every field of a DigitalShip the client knows about. Scalars map to None.
+ShipFields = {
+    "modelType": {
+        "readableName": None,
+    },
+    "id": None,
+    "status": None,
+    "name": None,
+    "shipData": {
+        "shipType": None,
+        "lengthOverall": None,
+        "beam": None,
+        "depth": None,
+        "drafts": None,
+        "csr": None,
+        "deadweight": None,
+        "grossTonnage": None,
+        "typeOfFuel": None,
+        "speedAtCsr": None,
+    },
+    "outputVariables": None,
+    "company": {
+        "name": None,
+    },
+    "drafts": {
+        "name": None,
+        "draft": None,
+        "loadcaseCount": None,
+        "failureCount": None,
+    },
+    "fuelTable": None,
+}
+
+GetFields = ("modelType", "id", "status", "name", "shipData", "outputVariables", "company", "drafts")
+ListFields = ("modelType", "id", "status", "name", "shipData", "outputVariables", "company")
+
+
+def parse_fields(fields: str) -> Tuple[str, ...]:
+    """Split a comma separated projection like "id,status,shipData.beam" and check it
+    against ShipFields. A field with subfields and no dot selects all its subfields."""
+
+    paths = tuple(field.strip() for field in fields.split(",") if field.strip())
+    for path in paths:
+        spec: Optional[dict] = ShipFields
+        for part in path.split("."):
+            if spec is None or part not in spec:
+                raise ValueError(f"Unknown ship field {path}")
+            spec = spec[part]
+    return paths
+
+
+def projection(paths: Tuple[str, ...]) -> dict:
+    """The part of ShipFields selected by `paths`, in ShipFields order."""
+
+    def select(spec: dict, selected: dict) -> dict:
+        result = {}
+        for name, subfields in spec.items():
+            if name not in selected:
+                continue
+            if subfields is None or selected[name] is True:
+                result[name] = subfields
+            else:
+                result[name] = select(subfields, selected[name])
+        return result
+
+    selected: dict = {}
+    for path in paths:
+        node = selected
+        *parents, leaf = path.split(".")
+        for part in parents:
+            if node.get(part) is True:
+                break
+            node = node.setdefault(part, {})
+        else:
+            node[leaf] = True
+
+    return select(ShipFields, selected)
+
+
+def selection_set(spec: dict, indent: int) -> str:
+    lines = []
+    for name, subfields in spec.items():
+        if subfields is None:
+            lines.append(" " * indent + name)
+        else:
+            lines.append(" " * indent + name + " {")
+            lines.append(selection_set(subfields, indent + 2))
+            lines.append(" " * indent + "}")
+    return "\n".join(lines)
+
+
+@lru_cache(maxsize=None)
+def ship_selection(paths: Tuple[str, ...], indent: int = 6) -> str:
+    return selection_set(projection(paths), indent)
+
+
+@lru_cache(maxsize=None)
+def ship_get_query(paths: Tuple[str, ...] = GetFields) -> str:
+    return f"""query ships($id: String!) {{
+  digitalShip {{
+    get(id: $id) {{
+{ship_selection(paths, 6)}
+    }}
+  }}
+}}
+"""
+
+
+@lru_cache(maxsize=None)
+def ship_list_query(paths: Tuple[str, ...] = ListFields) -> str:
+    return f"""query ships($limit: Int!, $offset: Int!) {{
+  digitalShip {{
+    list(limit: $limit, offset: $offset) {{
+      meta {{
+        count
+        limit
+        offset
+      }}
+      data {{
+{ship_selection(paths, 8)}
+      }}
+    }}
+  }}
+}}
+"""
+
+
+def select_fields(ship: dict, paths: Tuple[str, ...]) -> dict:
+    """The part of a fetched ship selected by `paths`, as a query with those fields would return it."""
+
+    def select(data, spec: dict):
+        if isinstance(data, list):
+            return [select(item, spec) for item in data]
+        if not isinstance(data, dict):
+            return data
+        return {name: data[name] if subfields is None else select(data[name], subfields)
+                for name, subfields in spec.items() if name in data}
+
+    return select(ship, projection(paths))
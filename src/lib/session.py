@@ -0,0 +1,59 @@
+import asyncio
+import threading
+
+
+class SharedSession:
+    """One connected gql session on a background event loop, shared by many callers.
+
+    It can stand in for a gql `Client`: synchronous callers use `execute` from any
+    thread, and `async with shared as session` gives coroutines in any event loop a
+    session whose `execute` runs on the shared connection. All requests therefore go
+    through a single aiohttp connection pool with keep-alive.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.transport = client.transport
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="shipyard-session", daemon=True)
+        self._thread.start()
+        self.session = self._submit(client.connect_async()).result()
+
+    def _submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def execute(self, document, **kwargs):
+        return self._submit(self.session.execute(document, **kwargs)).result()
+
+    async def execute_async(self, document, **kwargs):
+        return await self.run_async(self.session.execute(document, **kwargs))
+
+    async def run_async(self, coro):
+        """Await `coro` on the shared loop, from a coroutine in any other event loop."""
+        return await asyncio.wrap_future(self._submit(coro))
+
+    async def __aenter__(self):
+        return SharedSessionView(self)
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    def close(self):
+        self._submit(self.client.close_async()).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+
+
+class SharedSessionView:
+    """What `async with shared` gives to coroutines running in another event loop."""
+
+    def __init__(self, shared: SharedSession):
+        self._shared = shared
+
+    async def execute(self, document, **kwargs):
+        return await self._shared.execute_async(document, **kwargs)
+
+    async def call(self, function, *args):
+        """Await `function(session, *args)` on the shared loop, with the real gql session."""
+        return await asyncio.wrap_future(self._shared._submit(function(self._shared.session, *args)))
@@ -0,0 +1,85 @@
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+from lib.interpolation import FuelTableInterpolator
+from lib.voyage import FuelVariable
+
+WeatherColumns = [
+    "TWA [deg]",
+    "TWS [m/s]",
+    "Wave direction [deg]",
+    "Wave height Hs [m]"
+]
+
+NauticalMilesPerDay = 86400 / 1852
+
+
+def weather_grid(interpolator: FuelTableInterpolator) -> pd.DataFrame:
+    """Every combination of the weather axes of the fuel table."""
+
+    axes = [interpolator.axes[interpolator.columns.index(column)] for column in WeatherColumns]
+    mesh = np.meshgrid(*axes, indexing="ij")
+    return pd.DataFrame({column: values.ravel() for column, values in zip(WeatherColumns, mesh)})
+
+
+def optimize_speed(interpolator: FuelTableInterpolator, draft: float, conditions: pd.DataFrame = None,
+                   variable: str = FuelVariable) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Find the speed with the least fuel per nautical mile for every weather condition.
+
+    All conditions are evaluated in one pass over the speed axis of the table: the
+    consumption is interpolated on a (conditions x speeds) grid, from which both the
+    optimum and the Pareto front of speed against `variable` follow by array
+    reductions. Without `conditions`, every weather combination of the table is used.
+
+    Returns the conditions with the optimum, and the Pareto front in long format
+    with a "Condition" column indexing into the conditions.
+    """
+
+    if conditions is None:
+        conditions = weather_grid(interpolator)
+    conditions = conditions.reset_index(drop=True)
+
+    speeds = interpolator.axes[interpolator.columns.index("Speed [m/s]")]
+    n_conditions = len(conditions)
+
+    points = {
+        "Draft [m]": np.full(n_conditions * len(speeds), draft, dtype=np.float64),
+        "Speed [m/s]": np.tile(speeds, n_conditions),
+    }
+    for column in WeatherColumns:
+        points[column] = np.repeat(conditions[column].to_numpy(dtype=np.float64), len(speeds))
+
+    consumption = interpolator(variable, points).reshape(n_conditions, len(speeds))
+    valid = ~np.isnan(consumption)
+
+    # Consumption per day divided by the distance per day; standstill covers no distance.
+    with np.errstate(divide="ignore", invalid="ignore"):
+        per_nm = consumption / (speeds * NauticalMilesPerDay)
+    per_nm = np.where(valid & (speeds > 0), per_nm, np.inf)
+
+    best = np.argmin(per_nm, axis=1)
+    rows = np.arange(n_conditions)
+    found = np.isfinite(per_nm[rows, best])
+
+    optimum = conditions.copy()
+    optimum["Draft [m]"] = draft
+    optimum["Optimal speed [m/s]"] = np.where(found, speeds[best], np.nan)
+    optimum[f"{variable} at optimum"] = np.where(found, consumption[rows, best], np.nan)
+    optimum["Per nautical mile"] = np.where(found, per_nm[rows, best], np.nan)
+
+    # A speed is on the Pareto front if every faster speed consumes more.
+    filled = np.where(valid, consumption, np.inf)
+    faster_min = np.minimum.accumulate(filled[:, ::-1], axis=1)[:, ::-1]
+    faster_min = np.concatenate([faster_min[:, 1:], np.full((n_conditions, 1), np.inf)], axis=1)
+    front = valid & (filled < faster_min)
+
+    condition_index, speed_index = np.nonzero(front)
+    pareto = pd.DataFrame({
+        "Condition": condition_index,
+        "Speed [m/s]": speeds[speed_index],
+        variable: consumption[condition_index, speed_index],
+    })
+
+    return optimum, pareto
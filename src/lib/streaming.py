@@ -0,0 +1,221 @@
+import json
+import asyncio
+from typing import AsyncIterator
+
+import numpy as np
+from gql.transport.exceptions import TransportQueryError
+
+from lib.documents import document
+from lib.export import fuel_table_arrays
+from lib.queries import fueltable
+from lib.client import ShipyardClient
+from lib.session import SharedSessionView
+from lib.transport import ShipyardTransport
+
+FuelTablePath = ("data", "digitalShip", "get", "fuelTable")
+
+_Whitespace = b" \t\r\n"
+
+
+def _parse_numbers(segment: bytes) -> np.ndarray:
+    segment = segment.strip()
+    if not segment:
+        return np.empty(0)
+    return np.array(segment.replace(b"null", b"nan").split(b",")).astype(np.float64)
+
+
+class ResponseDecoder:
+    """Incremental decoder of a GraphQL response body.
+
+    Reads the body chunk by chunk. Arrays directly below `table_path` are parsed
+    in bulk into float64 numpy arrays, so the columns of a fuel table never exist
+    as Python lists; everything else is decoded as ordinary JSON. The first column
+    grows as it is read, the following ones are preallocated to its length.
+    """
+
+    def __init__(self, chunks: AsyncIterator[bytes], table_path: tuple = FuelTablePath):
+        self._chunks = chunks.__aiter__()
+        self.table_path = table_path
+        self.buffer = b""
+        self.pos = 0
+        self.length = 0
+
+    async def _fill(self) -> bool:
+        """Append the next chunk, dropping the consumed bytes. False at the end of the body."""
+
+        try:
+            chunk = await self._chunks.__anext__()
+        except StopAsyncIteration:
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    async def _peek(self) -> int:
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _Whitespace:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not await self._fill():
+                raise ValueError("Unexpected end of response")
+
+    async def _expect(self, char: bytes):
+        found = await self._peek()
+        if found != char[0]:
+            raise ValueError(f"Expected {char.decode()} in response, found {chr(found)}")
+        self.pos += 1
+
+    async def _string(self) -> str:
+        await self._expect(b'"')
+        scan = self.pos
+        while True:
+            end = self.buffer.find(b'"', scan)
+            if end == -1:
+                scan = len(self.buffer) - self.pos
+                if not await self._fill():
+                    raise ValueError("Unexpected end of response")
+                continue
+
+            backslashes = 0
+            while end - backslashes - 1 >= self.pos and self.buffer[end - backslashes - 1] == ord("\\"):
+                backslashes += 1
+            if backslashes % 2:
+                scan = end + 1
+                continue
+
+            raw = b'"' + self.buffer[self.pos:end + 1]
+            self.pos = end + 1
+            return json.loads(raw)
+
+    async def _literal(self):
+        end = self.pos
+        while True:
+            while end < len(self.buffer) and self.buffer[end] not in b",]}" + _Whitespace:
+                end += 1
+            if end < len(self.buffer):
+                break
+            offset = end - self.pos
+            if not await self._fill():
+                break
+            end = self.pos + offset
+
+        raw = self.buffer[self.pos:end]
+        self.pos = end
+        return json.loads(raw)
+
+    async def _numbers(self) -> np.ndarray:
+        values = np.empty(self.length or 1024)
+        count = 0
+
+        while True:
+            end = self.buffer.find(b"]", self.pos)
+            if end != -1:
+                segment, self.pos = self.buffer[self.pos:end], end + 1
+            else:
+                cut = self.buffer.rfind(b",", self.pos)
+                if cut == -1:
+                    if not await self._fill():
+                        raise ValueError("Unexpected end of response")
+                    continue
+                segment, self.pos = self.buffer[self.pos:cut], cut + 1
+
+            parsed = _parse_numbers(segment)
+            if count + len(parsed) > len(values):
+                grown = np.empty(max(2 * len(values), count + len(parsed)))
+                grown[:count] = values[:count]
+                values = grown
+            values[count:count + len(parsed)] = parsed
+            count += len(parsed)
+
+            if end != -1:
+                break
+
+        if not self.length:
+            self.length = count
+        return values if count == len(values) else values[:count].copy()
+
+    async def _value(self, path: tuple):
+        char = await self._peek()
+
+        if char == ord("{"):
+            return await self._object(path)
+        if char == ord("["):
+            await self._expect(b"[")
+            if path[:-1] == self.table_path and await self._peek() != ord('"'):
+                return await self._numbers()
+            return await self._array(path)
+        if char == ord('"'):
+            return await self._string()
+        return await self._literal()
+
+    async def _object(self, path: tuple) -> dict:
+        await self._expect(b"{")
+        result = {}
+        if await self._peek() == ord("}"):
+            self.pos += 1
+            return result
+
+        while True:
+            key = await self._string()
+            await self._expect(b":")
+            result[key] = await self._value(path + (key,))
+
+            char = await self._peek()
+            self.pos += 1
+            if char == ord("}"):
+                return result
+            if char != ord(","):
+                raise ValueError(f"Expected , or }} in response, found {chr(char)}")
+
+    async def _array(self, path: tuple) -> list:
+        result = []
+        if await self._peek() == ord("]"):
+            self.pos += 1
+            return result
+
+        while True:
+            result.append(await self._value(path + (len(result),)))
+
+            char = await self._peek()
+            self.pos += 1
+            if char == ord("]"):
+                return result
+            if char != ord(","):
+                raise ValueError(f"Expected , or ] in response, found {chr(char)}")
+
+    async def decode(self):
+        return await self._value(())
+
+
+async def decode_response(chunks: AsyncIterator[bytes]):
+    return await ResponseDecoder(chunks).decode()
+
+
+async def execute_fuel_table(session, variables: dict) -> dict:
+    """Execute the fueltable query with the columns of `fuelTable` decoded as numpy arrays.
+
+    On a ShipyardTransport the response is decoded while it streams in, bounded by
+    the client's execute_timeout like a normal execute; other sessions fall back to
+    a normal execute followed by a conversion.
+    """
+
+    if isinstance(session, (ShipyardClient, SharedSessionView)):
+        return await session.call(execute_fuel_table, variables)
+
+    transport = getattr(session, "transport", None)
+    if not isinstance(transport, ShipyardTransport):
+        result = await session.execute(document(fueltable), variable_values=variables)
+        ship_data = result["digitalShip"]["get"]
+        ship_data["fuelTable"] = fuel_table_arrays(ship_data["fuelTable"])
+        return result
+
+    request = document(fueltable)
+    request.variable_values = variables
+    timeout = getattr(getattr(session, "client", None), "execute_timeout", None)
+    result = await asyncio.wait_for(transport.execute_streaming(request, decode_response), timeout)
+
+    if result.errors:
+        raise TransportQueryError(str(result.errors[0]), errors=result.errors, data=result.data,
+                                  extensions=result.extensions)
+    return result.data
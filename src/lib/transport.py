@@ -0,0 +1,206 @@
+import json
+import hashlib
+import logging
+from typing import Dict, Set, Tuple
+
+from graphql import ExecutionResult, print_ast
+from gql.transport.aiohttp import AIOHTTPTransport
+from gql.transport.file_upload import close_files
+from gql.transport.exceptions import (
+    TransportConnectionFailed,
+    TransportError,
+    TransportProtocolError,
+    TransportServerError,
+)
+
+from lib.profiling import span, server_time
+from lib.compression import Decompressor, LogMinBytes, accept_encoding, compress, log_transfer
+
+PersistedQueryNotFound = {"PersistedQueryNotFound", "PERSISTED_QUERY_NOT_FOUND"}
+PersistedQueryNotSupported = {"PersistedQueryNotSupported", "PERSISTED_QUERY_NOT_SUPPORTED"}
+
+
+def _error_codes(errors: list) -> Set[str]:
+    codes = set()
+    for error in errors or []:
+        codes.add(error.get("message"))
+        codes.add((error.get("extensions") or {}).get("code"))
+    return codes
+
+
+class ShipyardTransport(AIOHTTPTransport):
+    """AIOHTTPTransport that prints and hashes every document once, with optional
+    Automatic Persisted Queries.
+
+    With `persisted_queries`, a request first carries only the sha256 hash of its query
+    text in `extensions.persistedQuery`. The full text is sent only when the server
+    answers PersistedQueryNotFound, after which it knows the hash. A server that does
+    not support persisted queries switches them off for the rest of the session.
+
+    Responses are requested in `compression` (zstd, gzip or none) and decompressed
+    here rather than by aiohttp, streaming into the decoder for fuel tables. With
+    `request_compression`, request bodies of at least `request_compression_min_bytes`
+    are sent compressed with that Content-Encoding; the server has to accept it.
+    """
+
+    def __init__(self, *args, persisted_queries: bool = False, compression: str = "gzip",
+                 request_compression: str = None, request_compression_min_bytes: int = 65536,
+                 client_session_args: dict = None, **kwargs):
+        super().__init__(*args, client_session_args={"auto_decompress": False, **(client_session_args or {})}, **kwargs)
+        self.persisted_queries = persisted_queries
+        self.request_compression = request_compression
+        self.request_compression_min_bytes = request_compression_min_bytes
+        self.headers = {**(self.headers or {}), "Accept-Encoding": accept_encoding(compression)}
+        self._queries: Dict[int, tuple] = {}
+
+    def query(self, document) -> Tuple[str, str]:
+        """The printed text and sha256 hash of `document`."""
+
+        entry = self._queries.get(id(document))
+        if entry is None or entry[0] is not document:
+            if len(self._queries) > 1024:
+                self._queries.clear()
+            text = print_ast(document)
+            entry = (document, text, hashlib.sha256(text.encode()).hexdigest())
+            self._queries[id(document)] = entry
+        return entry[1], entry[2]
+
+    async def execute(self, request, *, extra_args=None, upload_files=False):
+        if self.session is None:
+            return await super().execute(request, extra_args=extra_args, upload_files=upload_files)
+        if upload_files:
+            # Multipart bodies are built by gql, responses still arrive compressed.
+            post_args = self._prepare_request(request, extra_args, upload_files)
+            try:
+                return await self._send(post_args)
+            finally:
+                close_files(list(self.files.values()))
+
+        query, query_hash = self.query(request.document)
+
+        payload = {}
+        if request.operation_name:
+            payload["operationName"] = request.operation_name
+        if request.variable_values:
+            payload["variables"] = request.variable_values
+        extensions = dict(request.extensions or {})
+
+        if self.persisted_queries:
+            persisted = {"version": 1, "sha256Hash": query_hash}
+            result = await self._post({**payload, "extensions": {**extensions, "persistedQuery": persisted}}, extra_args)
+
+            codes = _error_codes(result.errors)
+            if codes & PersistedQueryNotSupported:
+                logging.info("Server does not support persisted queries, sending full queries")
+                self.persisted_queries = False
+            elif not codes & PersistedQueryNotFound:
+                return result
+            else:
+                extensions["persistedQuery"] = persisted
+
+        payload["query"] = query
+        if extensions:
+            payload["extensions"] = extensions
+        return await self._post(payload, extra_args)
+
+    def _request_body(self, payload: dict) -> Tuple[bytes, dict]:
+        """The encoded request body and its headers, compressed if configured and large enough."""
+
+        body = json.dumps(payload).encode()
+        headers = {"Content-Type": "application/json"}
+        if self.request_compression and len(body) >= self.request_compression_min_bytes:
+            compressed, seconds = compress(body, self.request_compression)
+            if len(body) >= LogMinBytes:
+                log_transfer("Request", self.request_compression, len(body), len(compressed), seconds)
+            body = compressed
+            headers["Content-Encoding"] = self.request_compression
+        return body, headers
+
+    async def _result(self, resp, body: bytes) -> ExecutionResult:
+        self.response_headers = resp.headers
+        try:
+            result = self.json_deserialize(body)
+        except ValueError:
+            result = None
+
+        if not isinstance(result, dict) or ("errors" not in result and "data" not in result):
+            self._raise_transport_server_error_if_status_more_than_400(resp)
+            raise TransportProtocolError(f"Server did not return a valid GraphQL result: "
+                                         f"{body[:1000].decode(errors='replace')}")
+
+        return ExecutionResult(errors=result.get("errors"), data=result.get("data"), extensions=result.get("extensions"))
+
+    async def _post(self, payload: dict, extra_args: dict = None):
+        body, headers = self._request_body(payload)
+        return await self._send({"data": body, "headers": headers, **(extra_args or {})}, len(body))
+
+    async def _send(self, post_args: dict, sent_bytes: int = None) -> ExecutionResult:
+        """POST `post_args` and decode the response, decompressing it first."""
+
+        try:
+            with span("request", "network", sent_bytes=sent_bytes) as args:
+                async with self.session.post(self.url, ssl=self.ssl, **post_args) as resp:
+                    raw = await resp.read()
+                    args["received_bytes"] = len(raw)
+                    args["server_ms"] = server_time(resp.headers)
+                    args["status"] = resp.status
+            with span("decompress", "decode", encoding=resp.headers.get("Content-Encoding")):
+                decompressor = Decompressor(resp.headers.get("Content-Encoding"))
+                data = decompressor.decompress(raw) + decompressor.flush()
+                decompressor.log()
+            with span("json decode", "decode"):
+                return await self._result(resp, data)
+        except TransportError:
+            raise
+        except Exception as e:
+            raise TransportConnectionFailed(str(e)) from e
+
+    async def execute_streaming(self, request, decode) -> ExecutionResult:
+        """Execute `request`, handing the response body to `decode` chunk by chunk instead
+        of buffering it. `decode` is awaited with an async iterator of bytes and returns
+        the decoded response object."""
+
+        if self.session is None:
+            raise TransportConnectionFailed("Transport is not connected")
+
+        query, _ = self.query(request.document)
+        payload = {"query": query}
+        if request.operation_name:
+            payload["operationName"] = request.operation_name
+        if request.variable_values:
+            payload["variables"] = request.variable_values
+
+        body, headers = self._request_body(payload)
+
+        async def chunks(resp, decompressor: Decompressor):
+            async for chunk in resp.content.iter_chunked(65536):
+                data = decompressor.decompress(chunk)
+                if data:
+                    yield data
+            data = decompressor.flush()
+            if data:
+                yield data
+
+        try:
+            with span("request streaming", "network", sent_bytes=len(body)) as args:
+                async with self.session.post(self.url, ssl=self.ssl, data=body, headers=headers) as resp:
+                    args["server_ms"] = server_time(resp.headers)
+                    args["status"] = resp.status
+                    if resp.status >= 400 and resp.content_type != "application/json":
+                        raise TransportServerError(f"{resp.status}, message='{resp.reason}', url='{self.url}'", resp.status)
+                    decompressor = Decompressor(resp.headers.get("Content-Encoding"))
+                    result = await decode(chunks(resp, decompressor))
+                    args["received_bytes"] = decompressor.compressed_bytes
+                    args["decompress_ms"] = decompressor.seconds * 1000
+                    decompressor.log()
+        except TransportError:
+            raise
+        except ValueError as e:
+            raise TransportProtocolError(f"Invalid response: {e}") from e
+        except Exception as e:
+            raise TransportConnectionFailed(str(e)) from e
+
+        if not isinstance(result, dict) or ("errors" not in result and "data" not in result):
+            raise TransportProtocolError('No "data" or "errors" keys in answer')
+
+        return ExecutionResult(errors=result.get("errors"), data=result.get("data"), extensions=result.get("extensions"))
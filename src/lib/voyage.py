@@ -0,0 +1,145 @@
+from typing import Callable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from lib.interpolation import FuelTableInterpolator
+
+FuelVariable = "FC ME [ton/day]"
+PowerVariable = "Power brake [kW]"
+HeelVariable = "Heel [deg]"
+LeewayVariable = "Leeway [deg]"
+
+_SumColumns = ["Hours", "Distance [nm]", "Fuel [t]", "Energy [kWh]", "Heel hours", "Leeway hours"]
+
+
+class VoyageEstimator:
+    """Accumulate fuel, energy, heel and leeway per leg over a route streamed in chunks.
+
+    Every row of the route holds the sorting columns of the fuel table at one
+    point in time. Its conditions apply until the time of the next row of the
+    same ship, so the last row of each chunk is held back until the next chunk
+    arrives. Rows are grouped by the optional `ship` and `leg` columns; only the
+    running per-leg sums are kept, so memory does not grow with the route.
+    """
+
+    def __init__(self, interpolator: Callable[[Optional[str]], FuelTableInterpolator], time_column: str = "time",
+                 step_hours: float = None):
+        self.interpolator = interpolator
+        self.time_column = time_column
+        self.step_hours = step_hours
+
+        self._carry: Optional[pd.DataFrame] = None
+        self._sums: Optional[pd.DataFrame] = None
+
+    def add(self, chunk: pd.DataFrame):
+        if self._carry is not None:
+            chunk = pd.concat([self._carry, chunk], ignore_index=True)
+        else:
+            chunk = chunk.reset_index(drop=True)
+
+        if len(chunk) == 0:
+            return
+
+        self._carry = chunk.iloc[-1:]
+        self._accumulate(chunk.iloc[:-1], chunk)
+
+    def finish(self) -> pd.DataFrame:
+        """Account for the final row and return one row per leg plus a total."""
+
+        if self._carry is not None:
+            self._accumulate(self._carry, self._carry)
+            self._carry = None
+
+        if self._sums is None:
+            return pd.DataFrame()
+
+        legs = self._sums.reset_index()
+        total = legs[_SumColumns + ["Max heel [deg]"]].agg(
+            {**{column: "sum" for column in _SumColumns}, "Max heel [deg]": "max"})
+        total["Start"] = legs["Start"].min()
+        total["End"] = legs["End"].max()
+        for column in self._keys(legs):
+            total[column] = "total"
+        numeric = _SumColumns + ["Max heel [deg]", "Start", "End"]
+        total = pd.DataFrame([total]).astype({column: legs[column].dtype for column in numeric})
+        legs = pd.concat([legs, total], ignore_index=True)
+
+        hours = legs["Hours"].astype(float).replace(0, np.nan)
+        legs["Mean power [kW]"] = legs["Energy [kWh]"] / hours
+        legs["Mean heel [deg]"] = legs["Heel hours"] / hours
+        legs["Mean leeway [deg]"] = legs["Leeway hours"] / hours
+        return legs.drop(columns=["Heel hours", "Leeway hours"])
+
+    def _keys(self, frame: pd.DataFrame) -> List[str]:
+        return [column for column in ["ship", "leg"] if column in frame.columns]
+
+    def _hours(self, rows: pd.DataFrame, chunk: pd.DataFrame) -> np.ndarray:
+        """Hours until the next row of `chunk`, zero at the end of the route or of a ship."""
+
+        if self.time_column in chunk.columns:
+            times = pd.to_datetime(chunk[self.time_column])
+            hours = (times.shift(-1) - times).dt.total_seconds().to_numpy() / 3600
+        elif self.step_hours is not None:
+            # Like a time column, the last row has no following row to last until.
+            hours = np.full(len(chunk), self.step_hours, dtype=np.float64)
+            hours[-1] = np.nan
+        else:
+            raise ValueError(f"The route has no {self.time_column} column and no step is given")
+
+        if "ship" in chunk.columns:
+            hours[(chunk["ship"] != chunk["ship"].shift(-1)).to_numpy()] = 0
+        hours = np.nan_to_num(hours[:len(rows)], nan=0)
+        return np.maximum(hours, 0)
+
+    def _accumulate(self, rows: pd.DataFrame, chunk: pd.DataFrame):
+        hours = self._hours(rows, chunk)
+        values = {variable: np.zeros(len(rows)) for variable in [FuelVariable, PowerVariable, HeelVariable, LeewayVariable]}
+
+        ships = rows["ship"].unique() if "ship" in rows.columns else [None]
+        for ship_id in ships:
+            mask = slice(None) if ship_id is None else (rows["ship"] == ship_id).to_numpy()
+            interpolator = self.interpolator(ship_id)
+            points = interpolator.points(rows[mask])
+            for variable in values:
+                if variable in interpolator.variables:
+                    values[variable][mask] = interpolator(variable, points)
+
+        frame = pd.DataFrame({
+            "Hours": hours,
+            "Distance [nm]": rows["Speed [m/s]"].to_numpy() * hours * 3600 / 1852,
+            "Fuel [t]": values[FuelVariable] * hours / 24,
+            "Energy [kWh]": values[PowerVariable] * hours,
+            "Heel hours": values[HeelVariable] * hours,
+            "Leeway hours": values[LeewayVariable] * hours,
+            "Max heel [deg]": np.abs(values[HeelVariable]),
+        })
+
+        times = pd.to_datetime(rows[self.time_column]) if self.time_column in rows.columns else pd.Series(pd.NaT, index=rows.index)
+        frame["Start"] = times.to_numpy()
+        frame["End"] = times.to_numpy()
+
+        keys = self._keys(rows)
+        for column in keys:
+            frame[column] = rows[column].to_numpy()
+        if not keys:
+            keys = ["leg"]
+            frame["leg"] = 0
+
+        grouped = frame.groupby(keys, sort=False)
+        sums = grouped[_SumColumns].sum()
+        sums["Max heel [deg]"] = grouped["Max heel [deg]"].max()
+        sums["Start"] = grouped["Start"].min()
+        sums["End"] = grouped["End"].max()
+
+        if self._sums is None:
+            self._sums = sums
+            return
+
+        previous = self._sums.reindex(self._sums.index.union(sums.index, sort=False))
+        current = sums.reindex(previous.index)
+        previous[_SumColumns] = previous[_SumColumns].add(current[_SumColumns], fill_value=0)
+        previous["Max heel [deg]"] = np.fmax(previous["Max heel [deg]"], current["Max heel [deg]"])
+        previous["Start"] = pd.concat([previous["Start"], current["Start"]], axis=1).min(axis=1)
+        previous["End"] = pd.concat([previous["End"], current["End"]], axis=1).max(axis=1)
+        self._sums = previous
@@ -0,0 +1,17 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT), str(ROOT / "src")]
+
+from benchmarks.mock_server import MockServer
+
+
+@pytest.fixture
+def mock_server():
+    server = MockServer(ships=20, fuel_table_rows=1000)
+    server.start()
+    yield server
+    server.stop()
@@ -0,0 +1,34 @@
+import json
+import configparser
+
+import pytest
+from click.testing import CliRunner
+
+from src.cli.client import shipyard_client
+from benchmarks.mock_server import MockServer
+
+
+@pytest.fixture
+def auth_server():
+    server = MockServer(ships=20, fuel_table_rows=1000, auth="errors")
+    server.start()
+    yield server
+    server.stop()
+
+
+def test_steps_share_one_login(auth_server, tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    config_file = tmp_path / ".shipyard" / "config.ini"
+    config_file.parent.mkdir()
+    config_file.write_text(f"[DEFAULT]\nenv = local\n\n[local]\nurl = {auth_server.url}\nusername = u\npassword = p\n")
+    script = tmp_path / "script.txt"
+    script.write_text("".join(f"s{i}: ship get ship-{i}\n" for i in range(6)) + "wait\nversion: shipyard-version\n")
+
+    result = CliRunner().invoke(shipyard_client, ["batch", str(script)])
+
+    steps = [json.loads(line) for line in result.stdout.splitlines()]
+    assert len(steps) == 7 and all(step["ok"] for step in steps)
+    assert auth_server.stats["logins"] == 1
+    config = configparser.ConfigParser()
+    config.read(config_file)
+    assert config["local"]["token"]
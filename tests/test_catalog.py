@@ -0,0 +1,58 @@
+import pytest
+
+from lib.catalog import ShipCatalog, parse_condition, parse_sort
+from lib.client import ShipyardClient
+
+
+def ship(id: str, name: str, beam: float = 30.0) -> dict:
+    return {"id": id, "name": name, "status": "done", "modelType": {"readableName": "bulk"},
+            "company": {"name": "Shipping"}, "shipData": {"beam": beam}, "drafts": []}
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    catalog = ShipCatalog(tmp_path / "catalog.db", "local")
+    catalog.put([ship("ship-1", "100% green", 32.0), ship("ship-2", "1000 green", 40.0),
+                 ship("ship-3", "bulk_carrier", 28.0), ship("ship-4", "bulkXcarrier"), ship("ship-5", "back\\slash")])
+    yield catalog
+    catalog.close()
+
+
+def search(catalog: ShipCatalog, *conditions: str, sort: str = None) -> list:
+    order = [parse_sort(sort)] if sort else []
+    return [ship["id"] for ship in catalog.search([parse_condition(condition) for condition in conditions], order)]
+
+
+def test_like_wildcards_are_literal(catalog):
+    assert search(catalog, "name~%") == ["ship-1"]
+    assert search(catalog, "name~0% g") == ["ship-1"]
+    assert search(catalog, "name~_") == ["ship-3"]
+    assert search(catalog, "name~k_c") == ["ship-3"]
+    assert search(catalog, "name~\\") == ["ship-5"]
+    assert search(catalog, "name~green") == ["ship-1", "ship-2"]
+
+
+def test_aliases_and_numeric_conditions(catalog):
+    assert search(catalog, "beam>30", sort="-beam") == ["ship-2", "ship-1"]
+    assert search(catalog, "shipData.beam<=28") == ["ship-3"]
+    assert search(catalog, "modelType=bulk", "company~Ship") == ["ship-1", "ship-2", "ship-3", "ship-4", "ship-5"]
+
+
+def test_invalid_conditions():
+    with pytest.raises(ValueError, match="Unknown field"):
+        parse_condition("colour=red")
+    with pytest.raises(ValueError, match="numeric"):
+        parse_condition("beam>wide")
+
+
+def test_sync_against_the_mock_server(mock_server, tmp_path):
+    catalog = ShipCatalog(tmp_path / "catalog.db", "local")
+    shipyard = ShipyardClient(mock_server.url)
+    try:
+        first = shipyard.run(catalog.sync(shipyard, page_size=7))
+        second = shipyard.run(catalog.sync(shipyard, page_size=7))
+        assert first == {"listed": 20, "fetched": 20, "removed": 0, "failed": 0}
+        assert second == {"listed": 20, "fetched": 0, "removed": 0, "failed": 0}
+        assert search(catalog, "name~Ship 1", sort="id")[:2] == ["ship-1", "ship-10"]
+    finally:
+        catalog.close()
@@ -0,0 +1,58 @@
+import time
+import asyncio
+
+import jwt
+import pytest
+
+from lib.client import ShipyardClient
+from benchmarks.mock_server import MockServer
+
+
+@pytest.fixture(params=["status", "errors"])
+def auth_server(request):
+    server = MockServer(ships=20, fuel_table_rows=1000, auth=request.param)
+    server.start()
+    yield server
+    server.stop()
+
+
+def rejected_token() -> str:
+    """A token that looks valid to the client but is not signed by the server."""
+    return jwt.encode({"exp": int(time.time()) + 3600}, "other", algorithm="HS256")
+
+
+def test_rejected_token_is_refreshed(auth_server):
+    tokens = []
+    shipyard = ShipyardClient(auth_server.url, token=rejected_token(), username="u", password="p",
+                              on_token=tokens.append)
+
+    assert shipyard.run(shipyard.version()) == "benchmark"
+    assert auth_server.stats["rejected"] == 1
+    assert auth_server.stats["logins"] == 1
+    assert tokens == [shipyard.token]
+
+
+def test_concurrent_requests_share_one_login(auth_server):
+    shipyard = ShipyardClient(auth_server.url, token=rejected_token(), username="u", password="p")
+
+    async def get_all():
+        return await asyncio.gather(*(shipyard.get(f"ship-{i}") for i in range(10)))
+
+    ships = shipyard.run(get_all())
+
+    assert [ship["id"] for ship in ships] == [f"ship-{i}" for i in range(10)]
+    assert auth_server.stats["logins"] == 1
+
+
+def test_missing_token_logs_in_once(auth_server):
+    shipyard = ShipyardClient(auth_server.url, username="u", password="p")
+
+    async def get_all():
+        return await asyncio.gather(*(shipyard.get(f"ship-{i}") for i in range(10)))
+
+    shipyard.run(get_all())
+    # The client is usable again in a new event loop.
+    assert shipyard.run(shipyard.version()) == "benchmark"
+
+    assert auth_server.stats["rejected"] == 0
+    assert auth_server.stats["logins"] == 1
@@ -0,0 +1,37 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from lib.fuel_table import FuelTable, SortingColumns, SparseTableError
+
+
+def fuel_table(speeds: dict) -> dict:
+    """A table over `speeds` per draft and a small weather grid."""
+
+    rows = np.array([(draft, speed, *weather) for draft, draft_speeds in speeds.items() for speed in draft_speeds
+                     for weather in itertools.product([0.0, 90.0], [0.0, 10.0], [0.0, 180.0], [0.0, 2.0])])
+    table = {column: rows[:, i] for i, column in enumerate(SortingColumns)}
+    table["FC ME [ton/day]"] = rows[:, 0] + rows[:, 1] ** 2
+    return table
+
+
+def test_full_product_is_gridded():
+    table = FuelTable.from_dict(fuel_table({8.0: [4.0, 6.0], 12.0: [4.0, 6.0]}))
+
+    assert table.fill == 1
+    assert table.shape == (2, 2, 2, 2, 2, 2)
+    np.testing.assert_array_equal(table.select(draft=12.0, speed=6.0)["FC ME [ton/day]"], 48.0)
+
+
+def test_sparse_table_is_split_per_draft():
+    columns = fuel_table({8.0: [4.0, 6.0], 12.0: [5.0, 7.0], 14.0: [4.5, 6.5]})
+
+    with pytest.raises(SparseTableError):
+        FuelTable.from_dict(columns)
+
+    tables = FuelTable.split(columns)
+    assert [table.axis("draft").tolist() for table in tables] == [[8.0], [12.0], [14.0]]
+    assert [table.axis("speed").tolist() for table in tables] == [[4.0, 6.0], [5.0, 7.0], [4.5, 6.5]]
+    assert all(table.fill == 1 for table in tables)
+    assert sum(len(table) for table in tables) == len(columns["Draft [m]"])
@@ -0,0 +1,73 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from lib.fuel_table import FuelTable, SortingColumns
+from lib.interpolation import FuelTableInterpolator
+
+Axes = [[8.0, 12.0], [4.0, 6.0, 10.0], [0.0, 90.0, 180.0], [0.0, 10.0], [0.0], [0.0, 2.0]]
+Slopes = np.array([1.0, 2.0, 0.01, 0.5, 0.0, 3.0])
+
+
+def linear_table() -> dict:
+    """A table of a linear function, which multilinear interpolation reproduces exactly."""
+
+    rows = np.array([*itertools.product(*Axes)])
+    table = {column: rows[:, i] for i, column in enumerate(SortingColumns)}
+    table["FC ME [ton/day]"] = rows @ Slopes
+    return table
+
+
+def point(**values) -> np.ndarray:
+    defaults = {"draft": 10.0, "speed": 5.0, "twa": 45.0, "tws": 5.0, "wave_direction": 0.0, "wave_height": 1.0}
+    return np.array([*{**defaults, **values}.values()])
+
+
+@pytest.mark.parametrize("table", [linear_table(), FuelTable.from_dict(linear_table())], ids=["dict", "FuelTable"])
+def test_inside_and_on_the_edges(table):
+    interpolator = FuelTableInterpolator(table)
+    points = np.array([
+        point(),
+        point(draft=8.0, speed=4.0, twa=0.0, tws=0.0, wave_height=0.0),
+        point(draft=12.0, speed=10.0, twa=180.0, tws=10.0, wave_height=2.0),
+        point(speed=6.0, twa=90.0),
+    ])
+
+    np.testing.assert_allclose(interpolator("FC ME [ton/day]", points), points @ Slopes)
+
+
+@pytest.mark.parametrize("edge, expected", [
+    ("clip", [12.0, 10.0, 180.0]),
+    ("extrapolate", [14.0, 12.0, 200.0]),
+])
+def test_outside_the_grid(edge, expected):
+    interpolator = FuelTableInterpolator(linear_table(), edge=edge)
+    outside = point(draft=14.0, speed=12.0, twa=200.0)
+
+    inside = outside.copy()
+    inside[:3] = expected
+    np.testing.assert_allclose(interpolator("FC ME [ton/day]", outside), [inside @ Slopes])
+
+
+def test_outside_the_grid_is_nan():
+    interpolator = FuelTableInterpolator(linear_table(), edge="nan")
+    points = np.array([point(speed=3.9), point(speed=10.0), point(wave_direction=1.0)])
+
+    result = interpolator("FC ME [ton/day]", points)
+
+    assert np.isnan(result[0]) and np.isnan(result[2])
+    assert result[1] == pytest.approx(points[1] @ Slopes)
+
+
+def test_missing_node_only_affects_its_cells():
+    table = linear_table()
+    keep = ~((table["Draft [m]"] == 12.0) & (table["Speed [m/s]"] == 10.0))
+    table = {column: values[keep] for column, values in table.items()}
+    interpolator = FuelTableInterpolator(table)
+
+    result = interpolator("FC ME [ton/day]", np.array([point(speed=8.0), point(speed=6.0), point(draft=8.0, speed=8.0)]))
+
+    assert np.isnan(result[0])
+    assert result[1] == pytest.approx(point(speed=6.0) @ Slopes)
+    assert result[2] == pytest.approx(point(draft=8.0, speed=8.0) @ Slopes)
@@ -0,0 +1,43 @@
+import asyncio
+from typing import Tuple
+
+from gql import Client
+
+from lib.documents import document
+from lib.queries import version
+from lib.transport import ShipyardTransport
+from benchmarks.mock_server import MockServer
+
+
+async def execute_twice(url: str) -> Tuple[ShipyardTransport, list]:
+    transport = ShipyardTransport(url=url, persisted_queries=True)
+    async with Client(transport=transport) as session:
+        results = [await session.execute(document(version)) for _ in range(2)]
+    return transport, results
+
+
+def test_miss_sends_full_query_then_hit(mock_server):
+    transport, results = asyncio.run(execute_twice(mock_server.url))
+
+    assert results == [{"version": "benchmark"}] * 2
+    # The first request misses and is resent with the query text, the second hits.
+    assert mock_server.stats["apq_miss"] == 1
+    assert mock_server.stats["apq_hit"] == 1
+    assert mock_server.stats["requests"] == 3
+    assert len(mock_server.persisted) == 1
+    assert transport.persisted_queries
+
+
+def test_not_supported_falls_back_to_full_queries():
+    server = MockServer(ships=20, fuel_table_rows=1000, persisted_queries=False)
+    server.start()
+    try:
+        transport, results = asyncio.run(execute_twice(server.url))
+    finally:
+        server.stop()
+
+    assert results == [{"version": "benchmark"}] * 2
+    # One rejected hash-only request, then full queries only.
+    assert server.stats["requests"] == 3
+    assert server.persisted == {}
+    assert not transport.persisted_queries
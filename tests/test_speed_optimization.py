@@ -0,0 +1,44 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from lib.fuel_table import SortingColumns
+from lib.interpolation import FuelTableInterpolator
+from lib.speed_optimization import optimize_speed
+from lib.voyage import FuelVariable
+
+Speeds = np.arange(0.0, 13.0)
+
+
+def interpolator(edge: str = "clip") -> FuelTableInterpolator:
+    """Fuel of a fixed 128 t/day plus 64 per m of wave height plus speed cubed."""
+
+    rows = np.array([*itertools.product([10.0], Speeds, [0.0, 180.0], [0.0, 20.0], [0.0, 180.0], [0.0, 4.0])])
+    table = {column: rows[:, i] for i, column in enumerate(SortingColumns)}
+    table[FuelVariable] = 128 + 64 * rows[:, 5] + rows[:, 1] ** 3
+    return FuelTableInterpolator(table, edge=edge)
+
+
+def test_optimum_and_pareto_front():
+    conditions = pd.DataFrame({"TWA [deg]": [0.0, 90.0], "TWS [m/s]": [0.0, 10.0],
+                               "Wave direction [deg]": [0.0, 0.0], "Wave height Hs [m]": [0.0, 2.0]})
+
+    optimum, pareto = optimize_speed(interpolator(), 10.0, conditions)
+
+    # (a + v^3) / v is least at v = (a / 2)^(1/3): 4 m/s for a = 128, 5.04 m/s for a = 256.
+    assert optimum["Optimal speed [m/s]"].tolist() == [4.0, 5.0]
+    assert optimum[f"{FuelVariable} at optimum"].tolist() == [192.0, 381.0]
+    # Consumption rises with speed, so every speed is on the front.
+    assert pareto.groupby("Condition")["Speed [m/s]"].apply(list).tolist() == [Speeds.tolist()] * 2
+
+
+def test_conditions_off_the_table_have_no_optimum():
+    conditions = pd.DataFrame({"TWA [deg]": [0.0, 0.0], "TWS [m/s]": [0.0, 30.0],
+                               "Wave direction [deg]": [0.0, 0.0], "Wave height Hs [m]": [0.0, 0.0]})
+
+    optimum, pareto = optimize_speed(interpolator(edge="nan"), 10.0, conditions)
+
+    assert optimum["Optimal speed [m/s]"].tolist()[0] == 4.0
+    assert np.isnan(optimum["Optimal speed [m/s]"].tolist()[1])
+    assert set(pareto["Condition"]) == {0}
@@ -0,0 +1,71 @@
+import json
+import asyncio
+
+import numpy as np
+import pytest
+
+from lib.client import ShipyardClient
+from lib.streaming import ResponseDecoder
+
+Body = json.dumps({
+    "data": {"digitalShip": {"get": {
+        "name": 'Quote " backslash \\ tab \t unicode é ☃ slash \\"',
+        "drafts": [{"name": "design", "draft": 12.5, "failureCount": 0, "done": True, "note": None}],
+        "fuelTable": {
+            "Speed [m/s]": [4, -0.5, 1.25e-07, 6.02e+23, None, 12],
+            "FC ME [ton/day]": [None, 10.5, -3e-05, 0, 1, 2.0],
+            "Empty": [],
+        },
+    }}},
+    "errors": None,
+}, ensure_ascii=False).encode()
+
+
+async def chunks(body: bytes, size: int):
+    for start in range(0, len(body), size):
+        yield body[start:start + size]
+
+
+def decode(body: bytes, size: int):
+    return asyncio.run(ResponseDecoder(chunks(body, size)).decode())
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 7, 16, 64, len(Body)])
+def test_chunk_boundaries(size):
+    expected = json.loads(Body)
+    result = decode(Body, size)
+
+    table = result["data"]["digitalShip"]["get"].pop("fuelTable")
+    expected_table = expected["data"]["digitalShip"]["get"].pop("fuelTable")
+    assert result == expected
+    assert [*table] == [*expected_table]
+    for column, values in expected_table.items():
+        assert table[column].dtype == np.float64
+        np.testing.assert_array_equal(table[column], np.array(values, dtype=np.float64))
+
+
+def test_columns_longer_than_the_first_grow():
+    body = json.dumps({"data": {"digitalShip": {"get": {"fuelTable": {
+        "a": [1, 2], "b": [*range(5000)]}}}}}).encode()
+
+    table = decode(body, 100)["data"]["digitalShip"]["get"]["fuelTable"]
+
+    np.testing.assert_array_equal(table["a"], [1, 2])
+    np.testing.assert_array_equal(table["b"], np.arange(5000))
+
+
+def test_truncated_body_raises():
+    with pytest.raises(ValueError):
+        decode(Body[:-20], 7)
+
+
+def test_execute_fuel_table(mock_server):
+    shipyard = ShipyardClient(mock_server.url)
+
+    ship = shipyard.run(shipyard.fuel_table("ship-1", draft="design_draft", waveDir=90.0))
+
+    expected = json.loads(mock_server.fuel_table((("draft", "design_draft"), ("waveDir", 90.0))))
+    assert ship["name"] == "Ship 1"
+    assert [*ship["fuelTable"]] == [*expected]
+    for column, values in expected.items():
+        np.testing.assert_array_equal(ship["fuelTable"][column], values)
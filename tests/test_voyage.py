@@ -0,0 +1,63 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from lib.fuel_table import SortingColumns
+from lib.interpolation import FuelTableInterpolator
+from lib.voyage import FuelVariable, PowerVariable, HeelVariable, LeewayVariable, VoyageEstimator
+
+
+def interpolator(ship=None) -> FuelTableInterpolator:
+    """Fuel of 24 t/day, 1000 kW, 2 deg heel and 1 deg leeway everywhere."""
+
+    rows = np.array([*itertools.product([8.0, 12.0], [4.0, 10.0], [0.0, 180.0], [0.0, 20.0], [0.0, 180.0], [0.0, 4.0])])
+    table = {column: rows[:, i] for i, column in enumerate(SortingColumns)}
+    table.update({FuelVariable: np.full(len(rows), 24.0), PowerVariable: np.full(len(rows), 1000.0),
+                  HeelVariable: np.full(len(rows), -2.0), LeewayVariable: np.full(len(rows), 1.0)})
+    return FuelTableInterpolator(table)
+
+
+def route() -> pd.DataFrame:
+    """Two legs of three hourly rows, then a last leg of one row that lasts zero hours."""
+
+    times = pd.date_range("2024-01-01", periods=7, freq="h")
+    return pd.DataFrame({
+        "time": times,
+        "leg": ["a", "a", "a", "b", "b", "b", "c"],
+        "Draft [m]": 10.0,
+        "Speed [m/s]": 5.0,
+        "TWA [deg]": 90.0,
+        "TWS [m/s]": 10.0,
+        "Wave direction [deg]": 90.0,
+        "Wave height Hs [m]": 1.0,
+    })
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7])
+def test_last_leg_without_hours(chunk_size):
+    estimator = VoyageEstimator(interpolator)
+    frame = route()
+    for start in range(0, len(frame), chunk_size):
+        estimator.add(frame.iloc[start:start + chunk_size])
+    legs = estimator.finish().set_index("leg")
+
+    assert legs.loc[["a", "b", "c"], "Hours"].tolist() == [3.0, 3.0, 0.0]
+    assert legs.loc["c", "Fuel [t]"] == 0
+    assert np.isnan(legs.loc["c", "Mean power [kW]"])
+    assert legs.loc["total", "Hours"] == 6.0
+    assert legs.loc["total", "Fuel [t]"] == pytest.approx(6.0)
+    assert legs.loc["total", "Mean power [kW]"] == pytest.approx(1000.0)
+    assert legs.loc["total", "Max heel [deg]"] == pytest.approx(2.0)
+    assert legs.loc["total", "End"] == frame["time"].iloc[-1]
+    assert legs["Hours"].dtype == np.float64
+
+
+def test_step_hours_match_a_time_column():
+    with_time = VoyageEstimator(interpolator)
+    with_time.add(route())
+    with_step = VoyageEstimator(interpolator, step_hours=1.0)
+    with_step.add(route().drop(columns="time"))
+
+    pd.testing.assert_series_equal(with_time.finish()["Hours"], with_step.finish()["Hours"])